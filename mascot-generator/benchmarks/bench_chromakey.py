@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Benchmark for chromakey green screen removal.
+
+Generates synthetic green-screen images with a detailed, fur-like subject
+edge (thousands of anti-aliased strands blended into the green, which is
+where spill pixels come from) and times remove_green_screen on them. No API
+calls are made.
+
+Each size is keyed --runs times with the fixed spill alpha, with
+--soft-alpha, and in strips of --strip-rows rows into a memory-mapped
+output, and the median is reported. Peak traced memory (NumPy buffers
+included) is measured in a separate run for the whole-image and strip
+modes.
+
+Usage:
+    python bench_chromakey.py                          # 1024x1024, 2048x2048, 4096x4096
+    python bench_chromakey.py --sizes 7680x4320 --strip-rows 128
+    python bench_chromakey.py --sizes 3840x2160 --runs 5 --json chromakey.json
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "scripts"))
+
+from generate_image import (  # noqa: E402
+    DEFAULT_STRIP_ROWS,
+    key_green_screen,
+    parse_size,
+    remove_green_screen,
+)
+
+DEFAULT_SIZES = "1024x1024,2048x2048,4096x4096"
+GREEN = np.array([0, 255, 0], dtype=np.float32)
+
+
+def make_test_image(width: int, height: int, seed: int = 0) -> Image.Image:
+    """Build a green-screen image of a furry blob.
+
+    The subject is an ellipse whose radius is perturbed by many random
+    high-frequency terms, so its outline has fine strands all the way
+    around. Pixels within a few pixels of the outline are blended with the
+    green background, like the anti-aliased edges of a generated image.
+
+    Args:
+        width: Image width in pixels.
+        height: Image height in pixels.
+        seed: Seed for the random outline and subject texture.
+
+    Returns:
+        RGB PIL Image.
+    """
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:height, 0:width].astype(np.float32)
+    dx = (xx - width / 2) / (width * 0.35)
+    dy = (yy - height / 2) / (height * 0.35)
+    angle = np.arctan2(dy, dx)
+    radius = np.hypot(dx, dy)
+
+    outline = np.ones_like(angle)
+    for _ in range(24):
+        frequency = rng.integers(20, 400)
+        outline += rng.uniform(0.005, 0.03) * np.sin(frequency * angle + rng.uniform(0, 2 * np.pi))
+
+    # Coverage goes from 1 inside to 0 outside over ~3px at the outline
+    edge_width = 3 / (min(width, height) * 0.35)
+    coverage = np.clip((outline - radius) / edge_width + 0.5, 0.0, 1.0)[..., None]
+
+    subject = np.empty((height, width, 3), dtype=np.float32)
+    subject[..., 0] = 150 + 60 * np.sin(xx / 37)
+    subject[..., 1] = 100 + 40 * np.cos(yy / 23)
+    subject[..., 2] = 70 + 30 * np.sin((xx + yy) / 51)
+    subject += rng.normal(0, 8, subject.shape).astype(np.float32)
+
+    pixels = subject * coverage + GREEN * (1 - coverage)
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), "RGB")
+
+
+def _key_into_memmap(image: Image.Image, strip_rows: int) -> None:
+    width, height = image.size
+    with tempfile.TemporaryFile() as f:
+        out = np.memmap(f, dtype=np.uint8, mode="w+", shape=(height, width, 4))
+        key_green_screen(image, out=out, strip_rows=strip_rows)
+        del out
+
+
+def _time_keying(image: Image.Image, runs: int, strip_rows: int | None = None, **options) -> float:
+    """Median wall time of keying over runs, in ms."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        if strip_rows:
+            _key_into_memmap(image, strip_rows)
+        else:
+            remove_green_screen(image, **options)
+        timings.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(timings), 1)
+
+
+def _peak_mb(image: Image.Image, strip_rows: int | None = None) -> float:
+    """Peak traced allocations of one keying run, in MB."""
+    tracemalloc.start()
+    try:
+        if strip_rows:
+            _key_into_memmap(image, strip_rows)
+        else:
+            remove_green_screen(image)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / (1024 * 1024), 1)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark chromakey green screen removal on synthetic images",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument(
+        "--sizes",
+        default=DEFAULT_SIZES,
+        help=f"Comma-separated WIDTHxHEIGHT sizes (default: {DEFAULT_SIZES})",
+    )
+    parser.add_argument("--runs", type=int, default=3, help="Timed runs per size and variant")
+    parser.add_argument("--strip-rows", type=int, default=DEFAULT_STRIP_ROWS,
+                        help=f"Rows per strip in the tiled runs (default: {DEFAULT_STRIP_ROWS})")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic images")
+    parser.add_argument("--json", metavar="PATH", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    report = {"config": {"runs": args.runs, "seed": args.seed, "strip_rows": args.strip_rows},
+              "sizes": {}}
+    for size in args.sizes.split(","):
+        width, height = parse_size(size)
+        image = make_test_image(width, height, args.seed)
+        keyed = np.array(remove_green_screen(image))
+        metrics = {
+            "megapixels": round(width * height / 1e6, 2),
+            "spill_pixels": int(((keyed[..., 3] > 0) & (keyed[..., 3] < 255)).sum()),
+            "fixed_alpha_ms": _time_keying(image, args.runs),
+            "soft_alpha_ms": _time_keying(image, args.runs, soft_alpha=True),
+            "tiled_ms": _time_keying(image, args.runs, strip_rows=args.strip_rows),
+            "peak_mb": _peak_mb(image),
+            "tiled_peak_mb": _peak_mb(image, strip_rows=args.strip_rows),
+        }
+        report["sizes"][size] = metrics
+        print(f"{size:>10}: {metrics['megapixels']}MP  spill pixels {metrics['spill_pixels']:,}  "
+              f"fixed alpha {metrics['fixed_alpha_ms']}ms  soft alpha {metrics['soft_alpha_ms']}ms  "
+              f"tiled {metrics['tiled_ms']}ms  peak {metrics['peak_mb']}MB "
+              f"(tiled {metrics['tiled_peak_mb']}MB)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
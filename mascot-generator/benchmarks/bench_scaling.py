@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Multi-core scaling benchmark for chromakey green screen removal.
+
+Measures two ways of spreading keying over cores, for each worker count:
+
+- strips: one large image split into strips keyed on a thread pool
+  (remove_green_screen(..., workers=N))
+- files: a batch of image files keyed by a process pool
+  (remove_green_screen_files(..., workers=N))
+
+For each it reports the median wall time, the speedup over one worker and
+the scaling efficiency (speedup / workers). Every output is compared with
+the single-worker output, and the script exits 1 if any differs.
+
+Usage:
+    python bench_scaling.py                            # 1, 2, 4, ... up to all cores
+    python bench_scaling.py --workers 1,2,4,8 --size 7680x4320 --images 16 --json scaling.json
+"""
+
+import argparse
+import hashlib
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "scripts"))
+sys.path.insert(0, str(BENCH_DIR))
+
+from bench_chromakey import make_test_image  # noqa: E402
+from generate_image import (  # noqa: E402
+    DEFAULT_STRIP_ROWS,
+    parse_size,
+    remove_green_screen,
+    remove_green_screen_files,
+    resolve_workers,
+)
+
+
+def _default_worker_counts() -> str:
+    cores = resolve_workers(0)
+    counts = [1]
+    while counts[-1] * 2 <= cores:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cores:
+        counts.append(cores)
+    return ",".join(str(count) for count in counts)
+
+
+def _digest(arrays: list[np.ndarray]) -> str:
+    digest = hashlib.sha256()
+    for array in arrays:
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def _median_ms(run, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(timings), 1)
+
+
+def _scaling(timings_ms: dict[int, float]) -> dict[str, dict]:
+    """Add speedup and efficiency relative to the smallest worker count."""
+    base_workers = min(timings_ms)
+    base_ms = timings_ms[base_workers]
+    return {
+        str(workers): {
+            "ms": ms,
+            "speedup": round(base_ms / ms, 2),
+            "efficiency": round(base_ms / ms * base_workers / workers, 2),
+        }
+        for workers, ms in sorted(timings_ms.items())
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark multi-core scaling of green screen removal",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("--workers", default=_default_worker_counts(),
+                        help="Comma-separated worker counts (default: powers of two up to all cores)")
+    parser.add_argument("--size", default="4096x4096", help="Image size in the strips scenario")
+    parser.add_argument("--strip-rows", type=int, default=DEFAULT_STRIP_ROWS,
+                        help=f"Rows per strip (default: {DEFAULT_STRIP_ROWS})")
+    parser.add_argument("--images", type=int, default=8, help="Files in the files scenario")
+    parser.add_argument("--image-size", default="1024x1024", help="Image size in the files scenario")
+    parser.add_argument("--runs", type=int, default=3, help="Timed runs per worker count")
+    parser.add_argument("--json", metavar="PATH", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    worker_counts = [int(count) for count in args.workers.split(",")]
+    cores = resolve_workers(0)
+    if max(worker_counts) > cores:
+        print(f"Warning: only {cores} cores available; counts above that cannot scale",
+              file=sys.stderr)
+
+    image = make_test_image(*parse_size(args.size))
+    remove_green_screen(image)  # Build or load the lookup table before timing
+
+    strip_ms, strip_digests = {}, {}
+    for workers in worker_counts:
+        strip_digests[workers] = _digest([np.array(remove_green_screen(
+            image, strip_rows=args.strip_rows, workers=workers
+        ))])
+        strip_ms[workers] = _median_ms(
+            lambda: remove_green_screen(image, strip_rows=args.strip_rows, workers=workers),
+            args.runs,
+        )
+
+    file_ms, file_digests = {}, {}
+    with tempfile.TemporaryDirectory(prefix="bench-scaling-") as tmp:
+        width, height = parse_size(args.image_size)
+        inputs = []
+        for index in range(args.images):
+            path = f"{tmp}/input-{index}.png"
+            make_test_image(width, height, seed=index).save(path)
+            inputs.append(path)
+
+        for workers in worker_counts:
+            jobs = [(path, f"{tmp}/output-{workers}-{index}.png") for index, path in enumerate(inputs)]
+            file_ms[workers] = _median_ms(lambda: remove_green_screen_files(jobs, workers), args.runs)
+            file_digests[workers] = _digest([np.array(Image.open(dst)) for _, dst in jobs])
+
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k != "json"},
+        "cores": cores,
+        "scenarios": {"strips": _scaling(strip_ms), "files": _scaling(file_ms)},
+    }
+
+    for scenario, results in report["scenarios"].items():
+        print(f"{scenario}:")
+        for workers, metrics in results.items():
+            print(f"  {workers:>3} workers: {metrics['ms']:>9}ms  speedup {metrics['speedup']:>5}x  "
+                  f"efficiency {metrics['efficiency']:.0%}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    mismatches = [
+        f"{scenario} with {workers} workers"
+        for scenario, digests in (("strips", strip_digests), ("files", file_digests))
+        for workers, digest in digests.items()
+        if digest != digests[min(digests)]
+    ]
+    if mismatches:
+        print("\nOutput differs from the single-worker result:", file=sys.stderr)
+        for mismatch in mismatches:
+            print(f"  {mismatch}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
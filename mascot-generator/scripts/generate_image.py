@@ -19,23 +19,42 @@ Usage:
     # Generate SVG wrapper alongside PNG
     python generate_image.py --prompt "Owl mascot" --output mascot.png --green-screen --svg
 
+    # Generate every image listed in a JSON/YAML manifest, several at a time
+    python generate_image.py --manifest assets.json --green-screen --concurrency 4 --workers 2
+
+    # Key a very large image in bounded memory
+    python generate_image.py --prompt "Owl banner master" --output banner.png --green-screen \
+        --strip-rows 256
+
 Environment:
     GEMINI_API_KEY: API key for Gemini (alternative to --api-key flag)
+    MASCOT_GENERATOR_CACHE_DIR: Where green lookup tables are cached
+        (default: ~/.cache/mascot-generator)
 """
 
 import argparse
 import base64
+import functools
+import hashlib
+import io
 import json
+import multiprocessing
 import os
 import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 from urllib.error import HTTPError
 from urllib.request import Request, urlopen
 
 import numpy as np
 from PIL import Image
-from scipy.ndimage import binary_erosion
+from scipy.ndimage import binary_dilation, binary_erosion
 
 
 MODELS = {
@@ -53,6 +72,43 @@ GREEN_SCREEN_PROMPT_SUFFIX = (
     "should have non-green colors."
 )
 
+# Spill suppression: fraction of a fringe pixel's green excess removed, and
+# the alpha given to spill pixels unless soft alpha is requested
+SPILL_REDUCTION = 0.7
+SPILL_ALPHA = 200
+
+# Green/not-green lookup tables are cached here, one per threshold set;
+# override with MASCOT_GENERATOR_CACHE_DIR. Bump LUT_VERSION whenever the
+# classification in _hsv_green_mask changes so stale tables are ignored.
+DEFAULT_CACHE_DIR = "~/.cache/mascot-generator"
+LUT_VERSION = 1
+LUT_SIZE = 1 << 24  # One entry per 24-bit RGB color
+LUT_BUILD_CHUNK = 1 << 20
+
+# Tiled keying: rows per strip by default, and the rows of context each
+# strip needs on either side (the 1px erosion and dilation look one row out)
+DEFAULT_STRIP_ROWS = 256
+STRIP_HALO_ROWS = 1
+
+# Manifest mode: per-item settings (CLI flags supply the defaults), and the
+# ones forwarded to remove_green_screen
+MANIFEST_KEYS = (
+    "prompt", "output", "size", "references", "model", "green_screen", "svg",
+    "hue_center", "hue_range", "min_saturation", "min_value", "soft_alpha", "strip_rows",
+)
+KEY_OPTIONS = ("hue_center", "hue_range", "min_saturation", "min_value", "soft_alpha")
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RATE_LIMIT = 10  # Generation requests per minute
+
+
+def resolve_workers(workers: int) -> int:
+    """Map a --workers value to a worker count: 0 means one per available core."""
+    if workers < 0:
+        raise ValueError(f"workers must be 0 (all cores) or positive, got {workers}")
+    if workers == 0:
+        return len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    return workers
+
 
 def generate_image(
     api_key: str,
@@ -116,37 +172,28 @@ def generate_image(
     raise ValueError("No image data found in response")
 
 
-def remove_green_screen(
-    image: Image.Image,
-    hue_center: int = 60,
-    hue_range: int = 25,
-    min_saturation: int = 75,
-    min_value: int = 70,
-) -> Image.Image:
-    """Remove chromakey green background using HSV thresholds.
-
-    Converts green pixels to transparent, then applies edge cleanup
-    (erosion) for clean anti-aliased edges.
-
-    Uses 0-180 hue scale (OpenCV convention) where pure green = 60.
-    Default range of ±25 detects hues 35-85 (yellow-green through teal).
+def _hsv_green_mask(
+    rgb: np.ndarray,
+    hue_center: int,
+    hue_range: int,
+    min_saturation: int,
+    min_value: int,
+) -> np.ndarray:
+    """Classify uint8 RGB pixels as chromakey green using HSV thresholds.
 
     Args:
-        image: Input PIL Image (RGB or RGBA).
-        hue_center: Center of green hue (0-180 scale). Default 60 (pure green).
-        hue_range: Half-width of hue detection window. Default 25 → detects 35-85.
-        min_saturation: Minimum saturation to count as green (0-255). Default 75.
-        min_value: Minimum brightness to count as green (0-255). Default 70.
+        rgb: uint8 array whose last axis is (R, G, B).
+        hue_center: Center of green hue (0-180 scale).
+        hue_range: Half-width of hue detection window.
+        min_saturation: Minimum saturation to count as green (0-255).
+        min_value: Minimum brightness to count as green (0-255).
 
     Returns:
-        RGBA PIL Image with green pixels replaced by transparency.
+        Boolean array of rgb's shape without the last axis.
     """
-    rgba = image.convert("RGBA")
-    arr = np.array(rgba)
-
     # Convert RGB to HSV manually (avoid OpenCV dependency)
-    rgb_float = arr[:, :, :3].astype(np.float32) / 255.0
-    r, g, b = rgb_float[:, :, 0], rgb_float[:, :, 1], rgb_float[:, :, 2]
+    rgb_float = rgb.astype(np.float32) / 255.0
+    r, g, b = rgb_float[..., 0], rgb_float[..., 1], rgb_float[..., 2]
 
     cmax = np.maximum(np.maximum(r, g), b)
     cmin = np.minimum(np.minimum(r, g), b)
@@ -181,31 +228,291 @@ def remove_green_screen(
     else:
         hue_mask = (hue >= hue_low) & (hue <= hue_high)
 
-    green_mask = hue_mask & (saturation >= min_saturation) & (value >= min_value)
+    return hue_mask & (saturation >= min_saturation) & (value >= min_value)
+
+
+def _lut_path(hue_center: int, hue_range: int, min_saturation: int, min_value: int) -> Path:
+    """Cache file for the lookup table of one threshold set."""
+    cache_dir = os.environ.get("MASCOT_GENERATOR_CACHE_DIR") or DEFAULT_CACHE_DIR
+    key = f"v{LUT_VERSION}-{hue_center}-{hue_range}-{min_saturation}-{min_value}"
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+    return Path(cache_dir).expanduser() / f"green-lut-{digest}.npy"
+
+
+def _build_green_lut(
+    hue_center: int,
+    hue_range: int,
+    min_saturation: int,
+    min_value: int,
+) -> np.ndarray:
+    """Classify every 24-bit color, in chunks to bound memory."""
+    lut = np.empty(LUT_SIZE, dtype=bool)
+    for start in range(0, LUT_SIZE, LUT_BUILD_CHUNK):
+        index = np.arange(start, start + LUT_BUILD_CHUNK, dtype=np.uint32)
+        rgb = np.stack([index & 0xFF, (index >> 8) & 0xFF, index >> 16], axis=-1).astype(np.uint8)
+        lut[start:start + LUT_BUILD_CHUNK] = _hsv_green_mask(
+            rgb, hue_center, hue_range, min_saturation, min_value
+        )
+    return lut
+
+
+@functools.lru_cache(maxsize=8)
+def green_lut(
+    hue_center: int = 60,
+    hue_range: int = 25,
+    min_saturation: int = 75,
+    min_value: int = 70,
+) -> np.ndarray:
+    """Return the RGB -> is-green lookup table for a set of HSV thresholds.
+
+    The table is built once per threshold set (about a second) and stored
+    on disk as a 2 MB bitset, so later runs only load it. Tables are also
+    kept in memory for the life of the process.
+
+    Args:
+        hue_center: Center of green hue (0-180 scale).
+        hue_range: Half-width of hue detection window.
+        min_saturation: Minimum saturation to count as green (0-255).
+        min_value: Minimum brightness to count as green (0-255).
+
+    Returns:
+        Read-only boolean array of LUT_SIZE entries, indexed by
+        R | G << 8 | B << 16.
+    """
+    path = _lut_path(hue_center, hue_range, min_saturation, min_value)
+    try:
+        packed = np.load(path)
+        if packed.shape == (LUT_SIZE // 8,) and packed.dtype == np.uint8:
+            lut = np.unpackbits(packed).view(bool)
+            lut.flags.writeable = False
+            return lut
+    except (OSError, ValueError):
+        pass  # Missing or unreadable; rebuild below
+
+    lut = _build_green_lut(hue_center, hue_range, min_saturation, min_value)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so concurrent runs never read a partial table
+        with tempfile.NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False) as f:
+            np.save(f, np.packbits(lut))
+        os.replace(f.name, path)
+    except OSError:
+        pass  # The cache is an optimization; an unwritable directory just means rebuilding
+    lut.flags.writeable = False
+    return lut
+
+
+def _key_strip(rgba: np.ndarray, lut: np.ndarray, soft_alpha: bool) -> None:
+    """Key an RGBA array in place: background, fringe erosion and spill suppression."""
+    # Each RGBA pixel read as a little-endian uint32 is R | G << 8 | B << 16 | A << 24
+    green_mask = lut[rgba.view("<u4")[..., 0] & 0xFFFFFF]
 
     # Step 1: Set green pixels to fully transparent
-    arr[green_mask, 3] = 0
+    rgba[green_mask, 3] = 0
 
     # Step 2: Erode the opaque region by 1px to remove green fringe
-    opaque_mask = arr[:, :, 3] > 0
+    opaque_mask = rgba[:, :, 3] > 0
     eroded = binary_erosion(opaque_mask, iterations=1)
     fringe = opaque_mask & ~eroded
 
     # Step 3: Green spill reduction on fringe pixels adjacent to green
-    from scipy.ndimage import binary_dilation
     near_green = binary_dilation(green_mask, iterations=1) & ~green_mask
     spill_pixels = fringe & near_green
 
-    for coord_y, coord_x in zip(*np.where(spill_pixels)):
-        pixel = arr[coord_y, coord_x, :3].astype(np.float32)
-        green_excess = max(0.0, pixel[1] - max(pixel[0], pixel[2]))
-        arr[coord_y, coord_x, 1] = int(max(0, pixel[1] - green_excess * 0.7))
-        arr[coord_y, coord_x, 3] = 200  # partial transparency at spill edges
+    spill = rgba[spill_pixels, :3].astype(np.float32)
+    green_excess = np.maximum(0.0, spill[:, 1] - np.maximum(spill[:, 0], spill[:, 2]))
+    rgba[spill_pixels, 1] = np.maximum(0.0, spill[:, 1] - green_excess * SPILL_REDUCTION)
+    if soft_alpha:
+        rgba[spill_pixels, 3] = 255 - green_excess
+    else:
+        rgba[spill_pixels, 3] = SPILL_ALPHA  # partial transparency at spill edges
 
     # Step 4: Fully remove remaining fringe pixels (not near green spill)
-    arr[fringe & ~spill_pixels, 3] = 0
+    rgba[fringe & ~spill_pixels, 3] = 0
+
+
+def key_green_screen(
+    image: Image.Image,
+    out: Optional[np.ndarray] = None,
+    hue_center: int = 60,
+    hue_range: int = 25,
+    min_saturation: int = 75,
+    min_value: int = 70,
+    soft_alpha: bool = False,
+    strip_rows: Optional[int] = None,
+    workers: int = 1,
+) -> np.ndarray:
+    """Key an image into an RGBA array, optionally one horizontal strip at a time.
+
+    With strip_rows, each strip is converted and keyed together with
+    STRIP_HALO_ROWS rows of its neighbours on either side, so erosion and
+    dilation see exactly what they would on the whole image, and only its
+    own rows are written to out. The result is identical to keying the
+    whole image at once, while working memory is bounded by the strip
+    size. Pass a np.memmap as out to keep the result itself off the heap.
+
+    With workers > 1, strips are keyed concurrently on a thread pool (NumPy
+    and scipy.ndimage release the GIL for the heavy work). Every strip
+    writes only its own rows, so the output does not depend on the number
+    of workers or the order strips finish in.
+
+    Args:
+        image: Input PIL Image (RGB or RGBA).
+        out: Preallocated (height, width, 4) uint8 array to write into.
+            Default: a new array.
+        hue_center: Center of green hue (0-180 scale). Default 60 (pure green).
+        hue_range: Half-width of hue detection window. Default 25 → detects 35-85.
+        min_saturation: Minimum saturation to count as green (0-255). Default 75.
+        min_value: Minimum brightness to count as green (0-255). Default 70.
+        soft_alpha: Scale spill alpha by green excess. Default False.
+        strip_rows: Rows keyed per strip. Default None keys the whole image at
+            once, or uses DEFAULT_STRIP_ROWS when workers > 1.
+        workers: Threads keying strips concurrently; 0 for one per core. Default 1.
+
+    Returns:
+        out, holding the keyed RGBA pixels.
+
+    Raises:
+        ValueError: If out has the wrong shape or dtype, strip_rows < 1 or workers < 0.
+    """
+    workers = resolve_workers(workers)
+    if workers > 1 and strip_rows is None:
+        strip_rows = DEFAULT_STRIP_ROWS
+    width, height = image.size
+    if out is not None and (out.shape != (height, width, 4) or out.dtype != np.uint8):
+        raise ValueError(
+            f"out must be a ({height}, {width}, 4) uint8 array, got {out.shape} {out.dtype}"
+        )
+    if strip_rows is not None and strip_rows < 1:
+        raise ValueError(f"strip_rows must be at least 1, got {strip_rows}")
+
+    lut = green_lut(hue_center, hue_range, min_saturation, min_value)
+    if strip_rows is None or strip_rows >= height:
+        if out is None:
+            out = np.array(image.convert("RGBA"))
+        else:
+            out[:] = np.asarray(image.convert("RGBA"))
+        _key_strip(out, lut, soft_alpha)
+        return out
+
+    if out is None:
+        out = np.empty((height, width, 4), dtype=np.uint8)
+
+    def _key_rows(top: int) -> None:
+        bottom = min(top + strip_rows, height)
+        halo_top = max(top - STRIP_HALO_ROWS, 0)
+        halo_bottom = min(bottom + STRIP_HALO_ROWS, height)
+        strip = np.array(image.crop((0, halo_top, width, halo_bottom)).convert("RGBA"))
+        _key_strip(strip, lut, soft_alpha)
+        out[top:bottom] = strip[top - halo_top:bottom - halo_top]
+
+    tops = range(0, height, strip_rows)
+    if workers == 1:
+        for top in tops:
+            _key_rows(top)
+    else:
+        image.load()  # Decode once up front; lazy loading is not safe across threads
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_key_rows, tops))
+    return out
+
+
+def remove_green_screen(
+    image: Image.Image,
+    hue_center: int = 60,
+    hue_range: int = 25,
+    min_saturation: int = 75,
+    min_value: int = 70,
+    soft_alpha: bool = False,
+    strip_rows: Optional[int] = None,
+    workers: int = 1,
+) -> Image.Image:
+    """Remove chromakey green background using HSV thresholds.
+
+    Converts green pixels to transparent, then applies edge cleanup
+    (erosion) for clean anti-aliased edges.
+
+    Whether a pixel is green depends only on its color, so the HSV
+    thresholds are applied once to all 16M colors (see green_lut) and the
+    image is keyed by looking up each pixel in that table.
+
+    Fringe pixels next to the background get their green excess (green
+    above the larger of red and blue) reduced. By default they are also
+    made partially transparent with a fixed alpha; with soft_alpha the
+    alpha falls with the excess instead, so strongly green-tinted edge
+    pixels (fur, hair, feathers) fade out while nearly neutral ones stay
+    almost opaque.
+
+    Uses 0-180 hue scale (OpenCV convention) where pure green = 60.
+    Default range of ±25 detects hues 35-85 (yellow-green through teal).
+
+    Args:
+        image: Input PIL Image (RGB or RGBA).
+        hue_center: Center of green hue (0-180 scale). Default 60 (pure green).
+        hue_range: Half-width of hue detection window. Default 25 → detects 35-85.
+        min_saturation: Minimum saturation to count as green (0-255). Default 75.
+        min_value: Minimum brightness to count as green (0-255). Default 70.
+        soft_alpha: Scale spill alpha by green excess (255 - excess) instead
+            of using SPILL_ALPHA. Default False.
+        strip_rows: Key this many rows at a time to bound memory (see
+            key_green_screen). Default None keys the whole image at once.
+        workers: Threads keying strips concurrently; 0 for one per core.
+            Default 1.
+
+    Returns:
+        RGBA PIL Image with green pixels replaced by transparency.
+    """
+    return Image.fromarray(key_green_screen(
+        image,
+        hue_center=hue_center,
+        hue_range=hue_range,
+        min_saturation=min_saturation,
+        min_value=min_value,
+        soft_alpha=soft_alpha,
+        strip_rows=strip_rows,
+        workers=workers,
+    ))
+
+
+def _remove_green_screen_file(input_path: str, output_path: str, options: dict) -> str:
+    """Key one image file and save it as PNG (runs in a worker process)."""
+    with Image.open(input_path) as image:
+        keyed = remove_green_screen(image, **options)
+    keyed.save(output_path, "PNG")
+    return output_path
+
+
+def remove_green_screen_files(
+    jobs: list[tuple[str, str]],
+    workers: int = 1,
+    **options,
+) -> list[str]:
+    """Key many image files, one per worker process.
+
+    Each file is keyed single-threaded inside its process, so throughput
+    scales with cores without threads and processes competing. Output is
+    the same as calling remove_green_screen on each file. The first error
+    raised by any job is re-raised here.
+
+    Args:
+        jobs: (input path, output PNG path) pairs.
+        workers: Worker processes; 0 for one per core. Default 1 keys the
+            files one after another in this process.
+        **options: Keyword arguments for remove_green_screen (thresholds,
+            soft_alpha, strip_rows).
 
-    return Image.fromarray(arr)
+    Returns:
+        Output paths, in the order of jobs.
+    """
+    workers = min(resolve_workers(workers), len(jobs)) or 1
+    # Build or load the lookup table once, so workers find it in the disk cache
+    lut_names = ("hue_center", "hue_range", "min_saturation", "min_value")
+    green_lut(**{name: options[name] for name in lut_names if name in options})
+    if workers == 1:
+        return [_remove_green_screen_file(src, dst, options) for src, dst in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_remove_green_screen_file, src, dst, options) for src, dst in jobs]
+        return [future.result() for future in futures]
 
 
 def resize_to_png(image: Image.Image, width: int, height: int) -> Image.Image:
@@ -241,6 +548,291 @@ def parse_size(size_str: str) -> tuple[int, int]:
     return int(parts[0]), int(parts[1])
 
 
+def _transparent_percent(rgba: np.ndarray, chunk_rows: int = DEFAULT_STRIP_ROWS) -> float:
+    """Percentage of fully transparent pixels, counted a band of rows at a time."""
+    height, width = rgba.shape[:2]
+    transparent = sum(
+        int(np.count_nonzero(rgba[top:top + chunk_rows, :, 3] == 0))
+        for top in range(0, height, chunk_rows)
+    )
+    return transparent / (height * width) * 100
+
+
+def finish_image(
+    image_bytes: bytes,
+    item: dict,
+    workers: int = 1,
+    log: Callable[..., None] = print,
+) -> None:
+    """Key, resize and save a generated image, plus its SVG wrapper if asked.
+
+    Args:
+        image_bytes: PNG bytes returned by generate_image.
+        item: Settings keyed by MANIFEST_KEYS (output, size, green_screen,
+            svg, thresholds, soft_alpha, strip_rows).
+        workers: Threads keying the image's strips.
+        log: print-compatible function receiving progress messages.
+    """
+    output_path = Path(item["output"])
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    image = Image.open(io.BytesIO(image_bytes))
+    keyed: Optional[np.ndarray] = None  # Keyed pixels, if they are already in an array
+
+    # Remove green screen if requested
+    if item["green_screen"]:
+        log("Removing green screen... ", end="", flush=True)
+        key_options = {name: item[name] for name in KEY_OPTIONS}
+        if item["strip_rows"]:
+            # Unlinked temp file: the pages are backed by disk and freed with the array
+            width, height = image.size
+            out = np.memmap(
+                tempfile.TemporaryFile(dir=output_path.parent),
+                dtype=np.uint8, mode="w+", shape=(height, width, 4),
+            )
+            keyed = key_green_screen(
+                image, out=out, strip_rows=item["strip_rows"], workers=workers, **key_options
+            )
+            image = Image.fromarray(keyed)
+        else:
+            image = remove_green_screen(image, workers=workers, **key_options)
+        log("done.")
+
+    # Resize if target size specified
+    if item["size"]:
+        width, height = parse_size(item["size"])
+        log(f"Resizing to {width}x{height}... ", end="", flush=True)
+        image = resize_to_png(image, width, height)
+        keyed = None
+        log("done.")
+
+    # Save PNG
+    image.save(str(output_path), "PNG")
+    file_size_kb = output_path.stat().st_size / 1024
+    log(f"Saved: {output_path} ({file_size_kb:.0f} KB)")
+
+    # Verify transparency if green screen was used
+    if item["green_screen"] and image.mode == "RGBA":
+        # Read the memory-mapped strips in place rather than copying the image to the heap
+        transparent_pct = _transparent_percent(keyed if keyed is not None else np.asarray(image))
+        log(f"Transparency: {transparent_pct:.1f}% of pixels are transparent")
+
+    # Generate SVG wrapper if requested
+    if item["svg"]:
+        svg_path = output_path.with_suffix(".svg")
+        img_width, img_height = image.size
+        svg_content = png_to_svg_embed(str(output_path), img_width, img_height)
+        svg_path.write_text(svg_content)
+        svg_size_kb = svg_path.stat().st_size / 1024
+        log(f"Saved: {svg_path} ({svg_size_kb:.0f} KB)")
+
+
+def load_manifest(path: str, defaults: dict) -> list[dict]:
+    """Read a JSON or YAML manifest of images to generate.
+
+    The manifest is a list of items, or an object with an "items" list and
+    optional "defaults" applied to every item. Each item needs "prompt" and
+    "output" and may set any other MANIFEST_KEYS; anything unset falls back
+    to the manifest defaults, then to the command-line flags.
+
+    Args:
+        path: Manifest file; .yaml/.yml files are parsed with PyYAML.
+        defaults: Settings for keys the manifest leaves unset.
+
+    Returns:
+        One dict per item with every key in MANIFEST_KEYS.
+
+    Raises:
+        ValueError: If the manifest is malformed or PyYAML is missing for YAML.
+    """
+    with open(path, encoding="utf-8") as f:
+        if Path(path).suffix.lower() in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError("YAML manifests need PyYAML: pip install pyyaml") from None
+            try:
+                data = yaml.safe_load(f)
+            except yaml.YAMLError as e:
+                raise ValueError(f"{path}: invalid YAML: {e}") from None
+        else:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}: invalid JSON: {e}") from None
+
+    if isinstance(data, dict):
+        manifest_defaults = data.get("defaults") or {}
+        if not isinstance(manifest_defaults, dict):
+            raise ValueError(f"{path}: 'defaults' is not an object")
+        unknown = set(manifest_defaults) - set(MANIFEST_KEYS)
+        if unknown:
+            raise ValueError(f"{path}: defaults has unknown keys: {', '.join(sorted(unknown))}")
+        defaults = {**defaults, **manifest_defaults}
+        data = data.get("items")
+    if not isinstance(data, list) or not data:
+        raise ValueError(f"{path}: expected a non-empty list of items")
+
+    items = []
+    for index, entry in enumerate(data):
+        if not isinstance(entry, dict):
+            raise ValueError(f"{path}: item {index} is not an object")
+        unknown = set(entry) - set(MANIFEST_KEYS)
+        if unknown:
+            raise ValueError(f"{path}: item {index} has unknown keys: {', '.join(sorted(unknown))}")
+        item = {**defaults, **entry}
+        if not item.get("prompt") or not item.get("output"):
+            raise ValueError(f"{path}: item {index} needs both 'prompt' and 'output'")
+        if item["model"] not in MODELS:
+            raise ValueError(f"{path}: item {index} has invalid model {item['model']!r}")
+        if isinstance(item["references"], str):
+            item["references"] = [item["references"]]
+        items.append(item)
+    return items
+
+
+class RateLimiter:
+    """Spaces calls evenly so no more than per_minute start in any minute."""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        """Block until the calling thread may start its call."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        time.sleep(slot - now)
+
+
+def _finish_manifest_item(image_bytes: bytes, item: dict) -> str:
+    """finish_image in a worker process, returning its log instead of printing it."""
+    messages: list[str] = []
+
+    def _log(*values, end: str = "\n", **_) -> None:
+        messages.append(" ".join(str(value) for value in values) + end)
+
+    finish_image(image_bytes, item, log=_log)
+    return "".join(messages)
+
+
+def run_manifest(
+    items: list[dict],
+    api_key: str,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    rate_limit: float = DEFAULT_RATE_LIMIT,
+    workers: int = 1,
+) -> list[Optional[str]]:
+    """Generate and post-process every manifest item, isolating failures.
+
+    Up to concurrency generation requests are in flight at once, started no
+    faster than rate_limit per minute. Each image is handed to a pool of
+    worker processes for keying, resizing and saving as soon as it arrives,
+    while other generations are still running. A failing item is reported
+    and skipped; it does not stop the others. If a worker process dies (for
+    example killed for using too much memory), every item in its pool fails
+    with it, so each of those is retried once, alone in a fresh one-worker
+    pool, and new items go to a new pool. An item is reported as failed for
+    this only if its retry kills the worker too.
+
+    Args:
+        items: Items from load_manifest.
+        api_key: Gemini API key.
+        concurrency: Maximum generation requests in flight.
+        rate_limit: Maximum generation requests started per minute (0: unlimited).
+        workers: Worker processes for keying, resizing and saving; 0 for one per core.
+
+    Returns:
+        Per item, None if it succeeded or its error message.
+    """
+    limiter = RateLimiter(rate_limit)
+    errors: list[Optional[str]] = [None] * len(items)
+    done_count = 0
+
+    def _generate(item: dict) -> bytes:
+        limiter.wait()
+        return generate_image(
+            api_key=api_key,
+            prompt=item["prompt"],
+            model=item["model"],
+            green_screen=item["green_screen"],
+            reference_image_paths=item["references"],
+        )
+
+    def _report(index: int, message: str, error: Optional[str] = None) -> None:
+        nonlocal done_count
+        done_count += 1
+        status = "FAILED" if error else "ok"
+        print(f"[{done_count}/{len(items)}] {status} {items[index]['output']}"
+              + (f": {error}" if error else ""), flush=True)
+        if message:
+            print("    " + message.rstrip("\n").replace("\n", "\n    "), flush=True)
+
+    workers = min(resolve_workers(workers), len(items))
+    # Spawn, not fork: workers start while the API threads are mid-request, and
+    # forking a process with running threads can copy locks held by them
+    mp_context = multiprocessing.get_context("spawn")
+    finish_pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp_context)
+    # Retries run one at a time in their own pool, so a retry that breaks it
+    # can only be the item that kills workers
+    retry_pool: Optional[ProcessPoolExecutor] = None
+    retries: deque[int] = deque()
+    image_bytes: dict[int, bytes] = {}  # Generated images still being finished
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as api_pool:
+            stages: dict[Future, tuple[str, int]] = {
+                api_pool.submit(_generate, item): ("generate", index) for index, item in enumerate(items)
+            }
+            while stages:
+                finished, _ = wait(stages, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    stage, index = stages.pop(future)
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool as e:
+                        if stage == "finish":
+                            retries.append(index)
+                            continue
+                        retry_pool.shutdown(wait=False)
+                        retry_pool = None
+                        errors[index] = f"finish failed: {e}"
+                        _report(index, "", errors[index])
+                        del image_bytes[index]
+                        continue
+                    except Exception as e:
+                        errors[index] = f"{'finish' if stage == 'retry' else stage} failed: {e}"
+                        _report(index, "", errors[index])
+                        image_bytes.pop(index, None)
+                        continue
+                    if stage != "generate":
+                        _report(index, result)
+                        del image_bytes[index]
+                        continue
+                    image_bytes[index] = result
+                    try:
+                        finish_future = finish_pool.submit(_finish_manifest_item, result, items[index])
+                    except BrokenProcessPool:
+                        # A worker died; the items it held are retried as their futures fail
+                        finish_pool.shutdown(wait=False)
+                        finish_pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp_context)
+                        finish_future = finish_pool.submit(_finish_manifest_item, result, items[index])
+                    stages[finish_future] = ("finish", index)
+
+                if retries and "retry" not in (stage for stage, _ in stages.values()):
+                    if retry_pool is None:
+                        retry_pool = ProcessPoolExecutor(max_workers=1, mp_context=mp_context)
+                    index = retries.popleft()
+                    retry_future = retry_pool.submit(_finish_manifest_item, image_bytes[index], items[index])
+                    stages[retry_future] = ("retry", index)
+    finally:
+        finish_pool.shutdown()
+        if retry_pool is not None:
+            retry_pool.shutdown()
+    return errors
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(
         description="Generate mascot images with optional green screen removal",
@@ -255,14 +847,32 @@ def main() -> int:
     )
     parser.add_argument(
         "--prompt",
-        required=True,
         help="Text prompt describing the image to generate",
     )
     parser.add_argument(
         "--output",
-        required=True,
         help="Output file path (e.g., mascot.png)",
     )
+    parser.add_argument(
+        "--manifest",
+        metavar="PATH",
+        help="Generate every item of a JSON or YAML manifest concurrently instead of "
+             "one --prompt/--output; other flags are defaults for its items",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Manifest mode: generation requests in flight (default: {DEFAULT_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=DEFAULT_RATE_LIMIT,
+        metavar="PER_MINUTE",
+        help="Manifest mode: generation requests started per minute, 0 for no limit "
+             f"(default: {DEFAULT_RATE_LIMIT})",
+    )
     parser.add_argument(
         "--size",
         help="Target size as WIDTHxHEIGHT (e.g., 256x256, 1200x400). "
@@ -315,15 +925,53 @@ def main() -> int:
         default=70,
         help="Minimum value/brightness for green detection (default: 70)",
     )
+    parser.add_argument(
+        "--soft-alpha",
+        action="store_true",
+        help="Fade green-tinted edge pixels by their green excess instead of a fixed alpha",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Cores to key the image with, splitting it into strips; in manifest mode, "
+             "processes keying, resizing and saving images (0: all cores; default: 1)",
+    )
+    parser.add_argument(
+        "--strip-rows",
+        type=int,
+        metavar="ROWS",
+        help="Key the image in strips of this many rows (e.g. "
+             f"{DEFAULT_STRIP_ROWS}) into a memory-mapped buffer, bounding "
+             "memory for very large images",
+    )
 
     args = parser.parse_args()
+    if args.workers < 0:
+        parser.error("--workers must be 0 (all cores) or positive")
 
     if not args.api_key:
         print("Error: API key required. Use --api-key or set GEMINI_API_KEY")
         return 1
 
-    output_path = Path(args.output)
-    output_path.parent.mkdir(parents=True, exist_ok=True)
+    settings = {name: getattr(args, name) for name in MANIFEST_KEYS}
+    if args.manifest:
+        if args.concurrency < 1:
+            parser.error("--concurrency must be at least 1")
+        try:
+            items = load_manifest(args.manifest, settings)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            return 1
+        errors = run_manifest(items, args.api_key, args.concurrency, args.rate_limit, args.workers)
+        failed = [(item, error) for item, error in zip(items, errors) if error]
+        print(f"\nManifest: {len(items) - len(failed)} succeeded, {len(failed)} failed")
+        for item, error in failed:
+            print(f"  {item['output']}: {error}")
+        return 1 if failed else 0
+
+    if not args.prompt or not args.output:
+        parser.error("--prompt and --output are required without --manifest")
 
     # Generate image
     print(f"Generating image with {args.model} model... ", end="", flush=True)
@@ -336,49 +984,7 @@ def main() -> int:
     )
     print("done.")
 
-    # Load as PIL Image
-    import io
-    image = Image.open(io.BytesIO(image_bytes))
-
-    # Remove green screen if requested
-    if args.green_screen:
-        print("Removing green screen... ", end="", flush=True)
-        image = remove_green_screen(
-            image,
-            hue_center=args.hue_center,
-            hue_range=args.hue_range,
-            min_saturation=args.min_saturation,
-            min_value=args.min_value,
-        )
-        print("done.")
-
-    # Resize if target size specified
-    if args.size:
-        width, height = parse_size(args.size)
-        print(f"Resizing to {width}x{height}... ", end="", flush=True)
-        image = resize_to_png(image, width, height)
-        print("done.")
-
-    # Save PNG
-    image.save(str(output_path), "PNG")
-    file_size_kb = output_path.stat().st_size / 1024
-    print(f"Saved: {output_path} ({file_size_kb:.0f} KB)")
-
-    # Verify transparency if green screen was used
-    if args.green_screen:
-        arr = np.array(image)
-        if arr.shape[2] == 4:
-            transparent_pct = (arr[:, :, 3] == 0).sum() / arr[:, :, 3].size * 100
-            print(f"Transparency: {transparent_pct:.1f}% of pixels are transparent")
-
-    # Generate SVG wrapper if requested
-    if args.svg:
-        svg_path = output_path.with_suffix(".svg")
-        img_width, img_height = image.size
-        svg_content = png_to_svg_embed(str(output_path), img_width, img_height)
-        svg_path.write_text(svg_content)
-        svg_size_kb = svg_path.stat().st_size / 1024
-        print(f"Saved: {svg_path} ({svg_size_kb:.0f} KB)")
+    finish_image(image_bytes, settings, workers=args.workers)
 
     return 0
 
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark compute_agreement on generated responses.
+
+Times the agreement engine (hashed vectors, pairwise matrix and
+divergent-section search) on two and four responses from 1 KB to 1 MB each.
+A few fixed response pairs are scored first, and the script exits 1 if any
+lands on the wrong side of its expected agreement, e.g. two non-English
+answers that say the same thing must not score as unrelated.
+
+Usage:
+    python bench_agreement.py [--max-kb 1000] [--repeat 3]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from analyze_responses import compute_agreement  # noqa: E402
+
+# (first response, second response, minimum agreement, maximum agreement)
+_EXPECTED = [
+    (
+        "La caché de sesiones vive en Redis. Conviene añadir un límite de tamaño "
+        "y una política de expiración para que la memoria no crezca sin control.",
+        "Las sesiones se guardan en la caché de Redis. Conviene añadir un límite de "
+        "tamaño y una política de expiración, o la memoria crecerá sin control.",
+        0.5, 1.0,
+    ),
+    (
+        "Дело в том, что индекс не используется: запрос фильтрует по выражению.",
+        "Индекс не используется, потому что запрос фильтрует по выражению.",
+        0.3, 1.0,
+    ),
+    (
+        "Use a connection pool and retry idempotent requests with backoff.",
+        "The painting dates from the late baroque period and hangs in Vienna.",
+        0.0, 0.2,
+    ),
+]
+
+_WORDS = (
+    "cache latency retry pool request session index query memory budget "
+    "timeout thread process schema table stream buffer token model response"
+).split()
+
+
+def make_response(size_bytes: int, rng: random.Random) -> str:
+    """Build a paragraphed response of about size_bytes from a small vocabulary."""
+    paragraphs = []
+    total = 0
+    while total < size_bytes:
+        paragraph = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(20, 60))) + "."
+        paragraphs.append(paragraph)
+        total += len(paragraph) + 2
+    return "\n\n".join(paragraphs)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark compute_agreement")
+    parser.add_argument("--max-kb", type=float, default=1000, help="Largest response size in KB")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is kept)")
+    args = parser.parse_args()
+
+    failures = []
+    for first, second, low, high in _EXPECTED:
+        report = compute_agreement({"a": first, "b": second})
+        score = report["matrix"][0][1] if report else None
+        if score is None or not low <= score <= high:
+            failures.append(f"{first[:40]!r} vs {second[:40]!r}: {score} not in [{low}, {high}]")
+    for failure in failures:
+        print(f"Unexpected agreement {failure}", file=sys.stderr)
+    if failures:
+        return 1
+
+    rng = random.Random(0)
+    sizes = [size for size in (1_000, 10_000, 100_000, 1_000_000) if size <= args.max_kb * 1000]
+    print(f"{'responses':>10} {'size':>10} {'best':>10}")
+    for count in (2, 4):
+        for size in sizes:
+            responses = {f"model{i}": make_response(size, rng) for i in range(count)}
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                compute_agreement(responses)
+                best = min(best, time.perf_counter() - start)
+            print(f"{count:>10} {size // 1000:>8}KB {best * 1000:>8.1f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark classify_content_type on large responses.
+
+Times the single-pass compiled classifier against the previous
+substring-scan implementation on generated responses from 10 KB to 10 MB,
+plus an adversarial input with no word breaks. Throughput (MB/s) staying
+flat as size grows shows the scan is linear. A few short inputs are
+classified first, and the script exits 1 if any gets the wrong type.
+
+Usage:
+    python bench_classifier.py [--max-mb 10] [--repeat 3]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from extract_context import classify_content_type, classify_content_types  # noqa: E402
+
+
+def legacy_classify_content_type(text: str) -> str:
+    """The substring-scan classifier this benchmark compares against."""
+    text_lower = text.lower()
+    if any(pattern in text for pattern in ['```', 'def ', 'class ', 'function ', 'import ', 'async ', 'await ']):
+        return 'code'
+    if any(marker in text_lower for marker in ['draft', 'write', 'compose', 'post', 'email', 'letter', 'story', 'poem']):
+        return 'creative'
+    if any(marker in text_lower for marker in ['recommend', 'strategy', 'approach', 'decision', 'plan', 'should', 'best practice']):
+        return 'strategic'
+    if any(marker in text_lower for marker in ['analyze', 'explain', 'breakdown', 'comparison', 'evaluate', 'assessment']):
+        return 'analysis'
+    return 'qa'
+
+
+_PROSE = (
+    "The service stores sessions in postgres and caches hot keys. Latency is "
+    "dominated by the network round trip, so batching requests helps. You "
+    "should measure before changing the retry policy; the current approach "
+    "is reasonable for most workloads. "
+)
+# Short inputs and the type each must get, checked before timing
+_EXPECTED = [
+    ("class Foo:\n    pass", "code"),
+    ("class Foo {\n  constructor() {}\n}", "code"),
+    ("class Foo extends Bar", "code"),
+    ("public class Foo implements Runnable", "code"),
+    ("export class Cache<T> {", "code"),
+    ("What was covered in the first class of the course?", "qa"),
+]
+
+_CODE = "```python\ndef handler(event):\n    return await process(event)\n```\n"
+
+
+def make_response(size_bytes: int, rng: random.Random) -> str:
+    """Build a prose-and-code response of about size_bytes."""
+    parts = []
+    total = 0
+    while total < size_bytes:
+        part = _CODE if rng.random() < 0.1 else _PROSE
+        parts.append(part)
+        total += len(part)
+    return "".join(parts)
+
+
+def time_call(fn, text: str, repeat: int) -> float:
+    """Best wall time in seconds over repeat runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark classify_content_type")
+    parser.add_argument("--max-mb", type=float, default=10, help="Largest response size in MB")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is kept)")
+    args = parser.parse_args()
+
+    wrong = [(text, expected, classify_content_type(text)) for text, expected in _EXPECTED
+             if classify_content_type(text) != expected]
+    for text, expected, actual in wrong:
+        print(f"Misclassified {text!r}: expected {expected}, got {actual}", file=sys.stderr)
+    if wrong:
+        return 1
+
+    rng = random.Random(0)
+    sizes = [10_000, 100_000, 1_000_000, 10_000_000]
+    sizes = [size for size in sizes if size <= args.max_mb * 1_000_000]
+
+    print(f"{'input':>20} {'compiled':>12} {'MB/s':>8} {'legacy':>12} {'MB/s':>8}")
+    cases = [(f"mixed {size // 1000} KB", make_response(size, rng)) for size in sizes]
+    cases.append(("no word breaks 1 MB", "de" * 500_000))
+    for label, text in cases:
+        mb = len(text) / 1_000_000
+        compiled = time_call(classify_content_type, text, args.repeat)
+        legacy = time_call(legacy_classify_content_type, text, args.repeat)
+        print(f"{label:>20} {compiled * 1000:>10.2f}ms {mb / compiled:>8.1f} "
+              f"{legacy * 1000:>10.2f}ms {mb / legacy:>8.1f}")
+
+    texts = [make_response(rng.randint(500, 20_000), rng) for _ in range(2000)]
+    start = time.perf_counter()
+    classify_content_types(texts)
+    elapsed = time.perf_counter() - start
+    print(f"\nbatch: {len(texts)} responses in {elapsed * 1000:.0f}ms "
+          f"({len(texts) / elapsed:.0f} responses/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
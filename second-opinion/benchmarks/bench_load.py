@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for the second-opinion pipeline against the local mock server.
+
+Starts mock_server.py in a subprocess, points api_clients at it through
+OPENAI_BASE_URL / GEMINI_BASE_URL, and measures:
+
+- single: sequential run_second_opinion calls (end-to-end latency per call)
+- batch: one run_batch_async pass over generated JSONL records
+
+For each scenario it reports throughput, p50/p95/p99 latency, error count
+and peak memory. With --baseline, metrics are compared against a previous
+--json report and the script exits 1 if any regresses beyond --tolerance,
+so it can gate changes in CI.
+
+Usage:
+    python bench_load.py --runs 50 --records 500 --concurrency 32 \
+        --latency lognormal:0.2,0.5 --rate-limit-rate 0.02 --json base.json
+    python bench_load.py ... --baseline base.json --tolerance 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "scripts"))
+sys.path.insert(0, str(BENCH_DIR))
+
+from mock_server import add_config_arguments  # noqa: E402
+
+# Metrics where larger is better; everything else regresses when it grows
+HIGHER_IS_BETTER = {"throughput_rps"}
+COMPARED_METRICS = ("throughput_rps", "p50_ms", "p95_ms", "p99_ms", "peak_python_mb")
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of values (0.0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def _summarize(latencies_ms: list[float], wall_seconds: float, count: int, errors: int) -> dict:
+    return {
+        "count": count,
+        "errors": errors,
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_rps": round(count / wall_seconds, 2) if wall_seconds else 0.0,
+        "p50_ms": round(percentile(latencies_ms, 50), 1),
+        "p95_ms": round(percentile(latencies_ms, 95), 1),
+        "p99_ms": round(percentile(latencies_ms, 99), 1),
+    }
+
+
+def _make_record(index: int, task_words: int) -> dict:
+    task = f"Task {index}: " + " ".join(["review this design for race conditions"] * task_words)
+    return {
+        "id": f"bench-{index}",
+        "conversation_history": [{"role": "user", "content": task}],
+        "claude_response": f"Response {index}: " + "the design looks sound overall. " * task_words,
+    }
+
+
+def start_mock_server(args: argparse.Namespace) -> tuple[subprocess.Popen, str]:
+    """Launch the mock server on a free port and return (process, base URL)."""
+    command = [
+        sys.executable, str(BENCH_DIR / "mock_server.py"), "--port", "0",
+        "--latency", args.latency,
+        "--error-rate", str(args.error_rate),
+        "--rate-limit-rate", str(args.rate_limit_rate),
+        "--retry-after", str(args.retry_after),
+        "--reasoning-kb", str(args.reasoning_kb),
+        "--response-words", str(args.response_words),
+    ]
+    if args.seed is not None:
+        command += ["--seed", str(args.seed)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    banner = process.stdout.readline().strip()
+    if not banner:
+        process.kill()
+        raise RuntimeError("Mock server failed to start")
+    return process, banner.rsplit(" ", 1)[-1]
+
+
+async def bench_single(runs: int, task_words: int, timeout: int) -> dict:
+    """Sequential end-to-end calls, one record at a time."""
+    from pipeline import collect_second_opinion_async
+
+    latencies_ms = []
+    errors = 0
+    start = time.perf_counter()
+    for index in range(runs):
+        record = _make_record(index, task_words)
+        call_start = time.perf_counter()
+        result = await collect_second_opinion_async(
+            record["conversation_history"], record["claude_response"], timeout=timeout
+        )
+        latencies_ms.append((time.perf_counter() - call_start) * 1000)
+        errors += sum(1 for response in result["responses"].values() if not response["success"])
+    return _summarize(latencies_ms, time.perf_counter() - start, runs, errors)
+
+
+class _RecordReader:
+    """File-like reader that generates JSONL records on demand."""
+
+    def __init__(self, records: int, task_words: int):
+        self._records = records
+        self._task_words = task_words
+        self._index = 0
+
+    def readline(self) -> str:
+        if self._index >= self._records:
+            return ""
+        line = json.dumps(_make_record(self._index, self._task_words)) + "\n"
+        self._index += 1
+        return line
+
+
+class _ResultSink:
+    """Writable stream that keeps per-model latencies instead of the output."""
+
+    def __init__(self):
+        self.latencies_ms: list[float] = []
+        self.errors = 0
+
+    def write(self, text: str) -> int:
+        result = json.loads(text)
+        for summary in result["models"].values():
+            self.latencies_ms.append(summary["response_time_ms"])
+            if not summary["success"]:
+                self.errors += 1
+        if result["error"] and not result["models"]:
+            self.errors += 1
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+async def bench_batch(records: int, concurrency: int, in_flight: int, task_words: int, timeout: int) -> dict:
+    """One batch pass; latencies are per-model response times."""
+    from api_clients import get_providers
+    from batch import run_batch_async
+
+    sink = _ResultSink()
+    provider_in_flight = {provider["model_id"]: in_flight for provider in get_providers()}
+    start = time.perf_counter()
+    await run_batch_async(
+        _RecordReader(records, task_words), sink, concurrency=concurrency,
+        provider_in_flight=provider_in_flight, timeout=timeout
+    )
+    return _summarize(sink.latencies_ms, time.perf_counter() - start, records, sink.errors)
+
+
+def _run_scenario(coro_factory, trace_memory: bool) -> dict:
+    from api_clients import close_clients
+
+    async def _run() -> dict:
+        try:
+            return await coro_factory()
+        finally:
+            await close_clients()
+
+    if trace_memory:
+        tracemalloc.start()
+    metrics = asyncio.run(_run())
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        metrics["peak_python_mb"] = round(peak / (1024 * 1024), 2)
+    return metrics
+
+
+def compare_to_baseline(
+    report: dict,
+    baseline: dict,
+    tolerance: float,
+    compared_metrics: tuple[str, ...] = COMPARED_METRICS,
+    higher_is_better: set[str] = HIGHER_IS_BETTER
+) -> list[str]:
+    """Return human-readable regressions of report relative to baseline."""
+    regressions = []
+    for scenario, metrics in report["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(scenario)
+        if not base:
+            continue
+        for metric in compared_metrics:
+            if metric not in metrics or not base.get(metric):
+                continue
+            current, previous = metrics[metric], base[metric]
+            if metric in higher_is_better:
+                regressed = current < previous * (1 - tolerance)
+            else:
+                regressed = current > previous * (1 + tolerance)
+            if regressed:
+                change = (current - previous) / previous * 100
+                regressions.append(f"{scenario}.{metric}: {previous} -> {current} ({change:+.1f}%)")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the second-opinion pipeline against a local mock provider",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("--scenario", choices=["single", "batch", "all"], default="all")
+    parser.add_argument("--runs", type=int, default=20, help="Sequential calls in the single scenario")
+    parser.add_argument("--records", type=int, default=200, help="Records in the batch scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="Batch records in flight")
+    parser.add_argument("--in-flight", type=int, default=8, help="Batch requests in flight per provider")
+    parser.add_argument("--task-words", type=int, default=50, help="Size knob for generated prompts")
+    parser.add_argument("--timeout", type=int, default=60, help="Per-request timeout in seconds")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Track peak Python allocations with tracemalloc (slower)")
+    parser.add_argument("--json", metavar="PATH", help="Write the report as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="Previous --json report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed relative regression vs. baseline (default: 0.2)")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    process, base_url = start_mock_server(args)
+    os.environ["OPENAI_BASE_URL"] = f"{base_url}/v1"
+    os.environ["GEMINI_BASE_URL"] = f"{base_url}/v1beta"
+    os.environ.setdefault("OPENAI_API_KEY", "mock")
+    os.environ.setdefault("GEMINI_API_KEY", "mock")
+
+    report = {"config": {k: v for k, v in vars(args).items() if k not in ("json", "baseline")},
+              "scenarios": {}}
+    try:
+        if args.scenario in ("single", "all"):
+            report["scenarios"]["single"] = _run_scenario(
+                lambda: bench_single(args.runs, args.task_words, args.timeout), args.trace_memory
+            )
+        if args.scenario in ("batch", "all"):
+            report["scenarios"]["batch"] = _run_scenario(
+                lambda: bench_batch(args.records, args.concurrency, args.in_flight,
+                                    args.task_words, args.timeout),
+                args.trace_memory
+            )
+    finally:
+        process.terminate()
+        process.wait()
+
+    # ru_maxrss is KB on Linux, bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    report["peak_rss_mb"] = round(maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+    for scenario, metrics in report["scenarios"].items():
+        line = (f"{scenario:>6}: {metrics['count']} in {metrics['wall_seconds']}s "
+                f"({metrics['throughput_rps']}/s)  p50 {metrics['p50_ms']}ms  "
+                f"p95 {metrics['p95_ms']}ms  p99 {metrics['p99_ms']}ms  errors {metrics['errors']}")
+        if "peak_python_mb" in metrics:
+            line += f"  peak {metrics['peak_python_mb']}MB"
+        print(line)
+    print(f"peak RSS: {report['peak_rss_mb']}MB")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\nRegressions beyond {args.tolerance:.0%}:", file=sys.stderr)
+            for regression in regressions:
+                print(f"  {regression}", file=sys.stderr)
+            return 1
+        print(f"\nNo regressions beyond {args.tolerance:.0%} vs. {args.baseline}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
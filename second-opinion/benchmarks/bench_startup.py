@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the second-opinion pipeline.
+
+Every measurement runs in a fresh interpreter, so nothing is already
+imported or connected:
+
+- import: time to import api_clients and pipeline
+- first_request: one uncached run_second_opinion call against the mock server,
+  timed from the end of the imports to the formatted result
+- cache_hit: the same call served entirely from a pre-filled response cache
+
+Each scenario is repeated --runs times and the median is reported. The HTTP
+stack must stay unloaded after the imports and after a cache hit; the script
+exits 1 if it is loaded there. With --baseline, metrics are compared against
+a previous --json report and the script exits 1 if any regresses beyond
+--tolerance.
+
+Usage:
+    python bench_startup.py --runs 10 --json startup.json
+    python bench_startup.py --runs 10 --baseline startup.json --tolerance 0.25
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+SCRIPTS_DIR = BENCH_DIR.parent / "scripts"
+sys.path.insert(0, str(BENCH_DIR))
+
+from bench_load import compare_to_baseline, start_mock_server  # noqa: E402
+from mock_server import add_config_arguments  # noqa: E402
+
+# Modules that make up the HTTP stack; none should load until a request is sent
+HTTP_STACK_MODULES = ("httpx", "httpcore", "h2")
+COMPARED_METRICS = ("import_api_clients_ms", "import_pipeline_ms", "request_ms", "process_ms")
+
+# Runs in a fresh interpreter; prints one JSON object on stdout
+_CHILD_SCRIPT = """
+import asyncio, json, sys, time
+
+started = time.perf_counter()
+import api_clients
+api_clients_done = time.perf_counter()
+from pipeline import collect_second_opinion_async
+from response_cache import ResponseCache
+imported = time.perf_counter()
+loaded_on_import = [m for m in {modules!r} if m in sys.modules]
+
+result = {{
+    "import_api_clients_ms": (api_clients_done - started) * 1000,
+    "import_pipeline_ms": (imported - started) * 1000,
+    "http_stack_on_import": loaded_on_import,
+}}
+
+if {request!r}:
+    async def _run():
+        try:
+            return await collect_second_opinion_async(
+                [{{"role": "user", "content": "Review this design for race conditions please"}}],
+                "The design looks sound overall.",
+                cache=ResponseCache() if {use_cache!r} else None,
+            )
+        finally:
+            await api_clients.close_clients()
+
+    outcome = asyncio.run(_run())
+    result["request_ms"] = (time.perf_counter() - imported) * 1000
+    result["errors"] = sum(1 for r in outcome["responses"].values() if not r["success"])
+    result["cache_hits"] = sum(1 for r in outcome["responses"].values() if r.get("cached"))
+    result["http_stack_on_request"] = [m for m in {modules!r} if m in sys.modules]
+
+print(json.dumps(result))
+"""
+
+
+def _run_child(request: bool, use_cache: bool, env: dict) -> dict:
+    """Run one measurement in a fresh interpreter and return its metrics."""
+    code = _CHILD_SCRIPT.format(modules=HTTP_STACK_MODULES, request=request, use_cache=use_cache)
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", code], cwd=SCRIPTS_DIR, env=env,
+        capture_output=True, text=True, check=True
+    )
+    metrics = json.loads(completed.stdout.strip().splitlines()[-1])
+    metrics["process_ms"] = (time.perf_counter() - start) * 1000
+    return metrics
+
+
+def _median_scenario(samples: list[dict]) -> dict:
+    """Median of each timing across samples; other fields come from the last sample."""
+    summary = dict(samples[-1])
+    summary["runs"] = len(samples)
+    for metric in COMPARED_METRICS:
+        if metric in summary:
+            summary[metric] = round(statistics.median(s[metric] for s in samples), 1)
+    return summary
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark second-opinion import time and time to first request",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per scenario")
+    parser.add_argument("--json", metavar="PATH", help="Write the report as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="Previous --json report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed relative regression vs. baseline (default: 0.25)")
+    add_config_arguments(parser)
+    parser.set_defaults(latency="fixed:0")
+    args = parser.parse_args()
+
+    process, base_url = start_mock_server(args)
+    cache_dir = tempfile.TemporaryDirectory(prefix="bench-startup-")
+    env = {
+        **os.environ,
+        "OPENAI_BASE_URL": f"{base_url}/v1",
+        "GEMINI_BASE_URL": f"{base_url}/v1beta",
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "mock"),
+        "GEMINI_API_KEY": os.environ.get("GEMINI_API_KEY", "mock"),
+        "SECOND_OPINION_CACHE_DIR": cache_dir.name,
+    }
+
+    report = {"config": {k: v for k, v in vars(args).items() if k not in ("json", "baseline")},
+              "scenarios": {}}
+    try:
+        report["scenarios"]["import"] = _median_scenario(
+            [_run_child(False, False, env) for _ in range(args.runs)]
+        )
+        report["scenarios"]["first_request"] = _median_scenario(
+            [_run_child(True, False, env) for _ in range(args.runs)]
+        )
+        _run_child(True, True, env)  # Fill the cache
+        report["scenarios"]["cache_hit"] = _median_scenario(
+            [_run_child(True, True, env) for _ in range(args.runs)]
+        )
+    finally:
+        process.terminate()
+        process.wait()
+        cache_dir.cleanup()
+
+    failures = []
+    for scenario, metrics in report["scenarios"].items():
+        line = (f"{scenario:>13}: import api_clients {metrics['import_api_clients_ms']}ms  "
+                f"pipeline {metrics['import_pipeline_ms']}ms")
+        if "request_ms" in metrics:
+            line += f"  request {metrics['request_ms']}ms  errors {metrics['errors']}"
+        line += f"  process {metrics['process_ms']}ms"
+        print(line)
+        if metrics["http_stack_on_import"]:
+            failures.append(f"{scenario}: imports loaded {', '.join(metrics['http_stack_on_import'])}")
+        if scenario == "cache_hit" and metrics["http_stack_on_request"]:
+            failures.append(f"cache_hit: loaded {', '.join(metrics['http_stack_on_request'])} "
+                            f"({metrics['cache_hits']} cache hits)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if failures:
+        print("\nHTTP stack loaded too early:", file=sys.stderr)
+        for failure in failures:
+            print(f"  {failure}", file=sys.stderr)
+        return 1
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(
+            report, baseline, args.tolerance, compared_metrics=COMPARED_METRICS, higher_is_better=set()
+        )
+        if regressions:
+            print(f"\nRegressions beyond {args.tolerance:.0%}:", file=sys.stderr)
+            for regression in regressions:
+                print(f"  {regression}", file=sys.stderr)
+            return 1
+        print(f"\nNo regressions beyond {args.tolerance:.0%} vs. {args.baseline}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI Responses and Gemini generateContent APIs.
+
+Speaks just enough HTTP/1.1 (keep-alive, Content-Length or chunked request
+bodies, chunked SSE responses) for api_clients to run unmodified against it
+via OPENAI_BASE_URL / GEMINI_BASE_URL. Latency, error rates, 429s and the
+size of reasoning blocks are configurable so slow, flaky or throttled
+providers can be reproduced offline.
+
+Usage:
+    python mock_server.py --port 8900 --latency lognormal:0.8,0.5 \
+        --error-rate 0.02 --rate-limit-rate 0.05 --reasoning-kb 256
+
+    export OPENAI_BASE_URL=http://127.0.0.1:8900/v1
+    export GEMINI_BASE_URL=http://127.0.0.1:8900/v1beta
+    export OPENAI_API_KEY=mock GEMINI_API_KEY=mock
+
+GET /__stats returns request counts by provider and status.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+from typing import TypedDict
+
+
+class MockConfig(TypedDict):
+    """Behaviour of the mock providers."""
+    latency: str  # "fixed:S", "uniform:LO,HI" or "lognormal:MEDIAN,SIGMA" (seconds)
+    error_rate: float  # Fraction of requests answered with HTTP 500/503
+    rate_limit_rate: float  # Fraction of requests answered with HTTP 429
+    retry_after: float  # Retry-After seconds sent with 429/503
+    reasoning_kb: int  # Size of the OpenAI reasoning item placed before the message
+    response_words: int  # Length of the generated answer
+    stream_chunks: int  # Number of SSE text chunks for streamed answers
+    seed: int | None
+
+
+DEFAULT_CONFIG = MockConfig(
+    latency="fixed:0.05",
+    error_rate=0.0,
+    rate_limit_rate=0.0,
+    retry_after=0.5,
+    reasoning_kb=0,
+    response_words=300,
+    stream_chunks=20,
+    seed=None,
+)
+
+_WORDS = (
+    "the model considers each part of the task and responds with a clear "
+    "structured answer covering edge cases trade offs and a short summary"
+).split()
+
+_REASONS = {200: "OK", 404: "Not Found", 429: "Too Many Requests",
+            500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+def sample_latency(spec: str, rng: random.Random) -> float:
+    """Draw one latency in seconds from a distribution spec."""
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v]
+    if kind == "fixed":
+        return values[0]
+    if kind == "uniform":
+        return rng.uniform(values[0], values[1])
+    if kind == "lognormal":
+        median, sigma = values
+        return rng.lognormvariate(math.log(median), sigma)
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+class MockProviderServer:
+    """asyncio HTTP server answering OpenAI- and Gemini-shaped requests."""
+
+    def __init__(self, config: MockConfig | None = None):
+        self.config = MockConfig(**{**DEFAULT_CONFIG, **(config or {})})
+        self.rng = random.Random(self.config["seed"])
+        self.stats: dict[str, dict[str, int]] = {}
+        self._server: asyncio.AbstractServer | None = None
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def _count(self, provider: str, status: int) -> None:
+        counts = self.stats.setdefault(provider, {})
+        counts[str(status)] = counts.get(str(status), 0) + 1
+
+    def _answer(self) -> str:
+        return " ".join(self.rng.choice(_WORDS) for _ in range(self.config["response_words"]))
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                if "content-length" in headers:
+                    body = await reader.readexactly(int(headers["content-length"]))
+                elif headers.get("transfer-encoding", "").lower() == "chunked":
+                    body = await _read_chunked(reader)
+                else:
+                    body = b""
+
+                await self._dispatch(method, target, body, writer)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method: str, target: str, body: bytes, writer: asyncio.StreamWriter) -> None:
+        path = target.split("?", 1)[0]
+
+        if method == "GET" and path == "/__stats":
+            await _write_response(writer, 200, json.dumps(self.stats).encode())
+            return
+
+        if path.endswith("/responses"):
+            provider = "openai"
+        elif ":generateContent" in path or ":streamGenerateContent" in path:
+            provider = "gemini"
+        else:
+            await _write_response(writer, 404, b'{"error": "unknown endpoint"}')
+            return
+
+        try:
+            payload = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            payload = {}
+        streaming = payload.get("stream") is True or ":streamGenerateContent" in path
+        latency = sample_latency(self.config["latency"], self.rng)
+
+        # Fault injection: throttling first, then server errors
+        roll = self.rng.random()
+        if roll < self.config["rate_limit_rate"]:
+            await asyncio.sleep(latency * 0.05)
+            self._count(provider, 429)
+            await _write_response(
+                writer, 429, b'{"error": {"message": "Rate limit reached (mock)"}}',
+                extra_headers={"Retry-After": f"{self.config['retry_after']:g}"}
+            )
+            return
+        if roll < self.config["rate_limit_rate"] + self.config["error_rate"]:
+            await asyncio.sleep(latency * 0.2)
+            status = self.rng.choice([500, 503])
+            self._count(provider, status)
+            extra = {"Retry-After": f"{self.config['retry_after']:g}"} if status == 503 else None
+            await _write_response(
+                writer, status, b'{"error": {"message": "Upstream failure (mock)"}}',
+                extra_headers=extra
+            )
+            return
+
+        self._count(provider, 200)
+        answer = self._answer()
+        prompt_chars = len(json.dumps(payload))
+
+        if streaming:
+            await self._stream_answer(provider, answer, latency, prompt_chars, writer)
+            return
+
+        await asyncio.sleep(latency)
+        if provider == "openai":
+            document = self._openai_body(answer, prompt_chars)
+        else:
+            document = self._gemini_body(answer, prompt_chars)
+        await _write_response(writer, 200, json.dumps(document).encode())
+
+    def _openai_body(self, answer: str, prompt_chars: int) -> dict:
+        reasoning_bytes = self.config["reasoning_kb"] * 1024
+        output = []
+        if reasoning_bytes:
+            output.append({
+                "type": "reasoning",
+                "id": "rs_mock",
+                "summary": [{"type": "summary_text", "text": "Reasoning about the task."}],
+                "encrypted_content": "x" * reasoning_bytes,
+            })
+        output.append({
+            "type": "message",
+            "id": "msg_mock",
+            "role": "assistant",
+            "content": [{"type": "output_text", "text": answer, "annotations": []}],
+        })
+        return {
+            "id": "resp_mock",
+            "object": "response",
+            "status": "completed",
+            "output": output,
+            "usage": self._openai_usage(answer, prompt_chars),
+        }
+
+    def _openai_usage(self, answer: str, prompt_chars: int) -> dict:
+        reasoning_bytes = self.config["reasoning_kb"] * 1024
+        return {
+            "input_tokens": prompt_chars // 4,
+            "output_tokens": len(answer) // 4 + reasoning_bytes // 4,
+            "output_tokens_details": {"reasoning_tokens": reasoning_bytes // 4},
+        }
+
+    def _gemini_body(self, answer: str, prompt_chars: int) -> dict:
+        return {
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"text": answer}]},
+                "finishReason": "STOP",
+            }],
+            "usageMetadata": self._gemini_usage(answer, prompt_chars),
+        }
+
+    def _gemini_usage(self, answer: str, prompt_chars: int) -> dict:
+        return {
+            "promptTokenCount": prompt_chars // 4,
+            "candidatesTokenCount": len(answer) // 4,
+            "totalTokenCount": (prompt_chars + len(answer)) // 4,
+        }
+
+    async def _stream_answer(
+        self,
+        provider: str,
+        answer: str,
+        latency: float,
+        prompt_chars: int,
+        writer: asyncio.StreamWriter
+    ) -> None:
+        """Send the answer as SSE events: first chunk after 30% of the latency, the rest spread evenly.
+
+        Usage arrives at the end, like the real APIs: on response.completed for
+        OpenAI and as usageMetadata on the final Gemini chunk.
+        """
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Transfer-Encoding: chunked\r\n\r\n"
+        )
+        words = answer.split(" ")
+        n_chunks = max(1, min(self.config["stream_chunks"], len(words)))
+        step = math.ceil(len(words) / n_chunks)
+        pieces = [" ".join(words[i:i + step]) + " " for i in range(0, len(words), step)]
+
+        await asyncio.sleep(latency * 0.3)
+        for index, piece in enumerate(pieces):
+            if provider == "openai":
+                event = {"type": "response.output_text.delta", "delta": piece}
+                data = f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            else:
+                event = {"candidates": [{"content": {"role": "model", "parts": [{"text": piece}]}}]}
+                if index == len(pieces) - 1:
+                    event["usageMetadata"] = self._gemini_usage(answer, prompt_chars)
+                data = f"data: {json.dumps(event)}\r\n\r\n"
+            _write_chunk(writer, data.encode())
+            await writer.drain()
+            await asyncio.sleep(latency * 0.7 / len(pieces))
+
+        if provider == "openai":
+            usage = self._openai_usage(answer, prompt_chars)
+            done = {"type": "response.completed", "response": {"status": "completed", "usage": usage}}
+            _write_chunk(writer, f"event: response.completed\ndata: {json.dumps(done)}\n\n".encode())
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+
+async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+    parts = []
+    while True:
+        size = int((await reader.readline()).split(b";")[0].strip(), 16)
+        if size == 0:
+            await reader.readline()
+            return b"".join(parts)
+        parts.append(await reader.readexactly(size))
+        await reader.readline()
+
+
+def _write_chunk(writer: asyncio.StreamWriter, data: bytes) -> None:
+    writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+
+async def _write_response(
+    writer: asyncio.StreamWriter,
+    status: int,
+    body: bytes,
+    extra_headers: dict | None = None
+) -> None:
+    headers = [
+        f"HTTP/1.1 {status} {_REASONS.get(status, 'Unknown')}",
+        "Content-Type: application/json",
+        f"Content-Length: {len(body)}",
+    ]
+    for name, value in (extra_headers or {}).items():
+        headers.append(f"{name}: {value}")
+    writer.write(("\r\n".join(headers) + "\r\n\r\n").encode() + body)
+    await writer.drain()
+
+
+def add_config_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add mock behaviour flags (shared with the benchmark CLI)."""
+    parser.add_argument("--latency", default=DEFAULT_CONFIG["latency"],
+                        help="fixed:S, uniform:LO,HI or lognormal:MEDIAN,SIGMA in seconds "
+                             f"(default: {DEFAULT_CONFIG['latency']})")
+    parser.add_argument("--error-rate", type=float, default=DEFAULT_CONFIG["error_rate"],
+                        help="Fraction of requests failing with 500/503")
+    parser.add_argument("--rate-limit-rate", type=float, default=DEFAULT_CONFIG["rate_limit_rate"],
+                        help="Fraction of requests failing with 429")
+    parser.add_argument("--retry-after", type=float, default=DEFAULT_CONFIG["retry_after"],
+                        help="Retry-After seconds sent with 429/503")
+    parser.add_argument("--reasoning-kb", type=int, default=DEFAULT_CONFIG["reasoning_kb"],
+                        help="Size of the OpenAI reasoning block in KB")
+    parser.add_argument("--response-words", type=int, default=DEFAULT_CONFIG["response_words"],
+                        help="Words per generated answer")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible runs")
+
+
+def config_from_args(args: argparse.Namespace) -> MockConfig:
+    """Build a MockConfig from parsed add_config_arguments flags."""
+    return MockConfig(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        reasoning_kb=args.reasoning_kb,
+        response_words=args.response_words,
+        stream_chunks=DEFAULT_CONFIG["stream_chunks"],
+        seed=args.seed,
+    )
+
+
+async def _serve(config: MockConfig, host: str, port: int) -> None:
+    server = MockProviderServer(config)
+    await server.start(host, port)
+    # The benchmark reads this line to discover the port
+    print(f"Mock provider server listening on http://{host}:{server.port}", flush=True)
+    await asyncio.Event().wait()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Mock OpenAI/Gemini server for offline benchmarks",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900, help="Port (0 picks a free one)")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(_serve(config_from_args(args), args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,9 +2,59 @@
 Response analysis utilities for the second-opinion skill.
 
 This module provides basic utilities for extracting structural info
-from responses. The actual analysis is performed by Claude.
+from responses, and an agreement engine that scores how much N responses
+overlap and flags the sections only one model wrote, so the analysis can
+start from the disagreements. The actual analysis is performed by Claude.
+
+Texts are compared as signed, hashed word unigram + bigram vectors
+(sublinear TF, L2-normalized) with NumPy cosine similarity. NumPy is optional; without
+it compute_agreement returns None.
 """
 
+import re
+from typing import TypedDict
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Hashed feature spaces for whole responses and for (much shorter) sections;
+# large enough that bucket collisions barely move cosines
+AGREEMENT_DIMENSIONS = 2 ** 14
+SECTION_DIMENSIONS = 2 ** 11
+
+# Sections whose best match in the other responses averages below this are divergent
+DIVERGENCE_THRESHOLD = 0.2
+
+# Shorter paragraphs are merged into the previous section
+MIN_SECTION_WORDS = 15
+
+# Maximum divergent sections reported
+MAX_DIVERGENT_SECTIONS = 8
+
+# \w matches Unicode letters, so non-English responses are compared too
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+# Multipliers for hashing word ids into buckets (large odd 64-bit constants)
+_UNIGRAM_SALT = 0x9E3779B97F4A7C15
+_BIGRAM_SALTS = (0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9)
+
+
+class DivergentSection(TypedDict):
+    """A section with little counterpart in the other responses."""
+    model: str
+    heading: str  # First line of the section, shortened
+    support: float  # Mean best-match similarity in the other responses (0-1)
+
+
+class AgreementReport(TypedDict):
+    """Pairwise agreement across responses and where they diverge."""
+    models: list[str]
+    matrix: list[list[float]]  # Cosine similarity, matrix[i][j] between models[i] and models[j]
+    divergent_sections: list[DivergentSection]  # Least supported first
+
 
 def extract_response_metadata(response: str) -> dict:
     """
@@ -34,44 +84,210 @@ def extract_response_metadata(response: str) -> dict:
 
 def identify_structural_differences(
     claude_response: str,
-    chatgpt_response: str | None,
-    gemini_response: str | None
+    model_responses: dict[str, str | None]
 ) -> list[str]:
     """
     Identify basic structural differences between responses.
 
     Args:
         claude_response: Claude's response
-        chatgpt_response: ChatGPT's response (None if failed)
-        gemini_response: Gemini's response (None if failed)
+        model_responses: Dict of model name -> response text (None if failed)
 
     Returns:
         List of structural observations
     """
     observations = []
 
-    if not chatgpt_response and not gemini_response:
+    if not any(model_responses.values()):
         return ["Only Claude's response available"]
 
-    if not chatgpt_response:
-        observations.append("ChatGPT response unavailable")
-    if not gemini_response:
-        observations.append("Gemini response unavailable")
+    for model, response in model_responses.items():
+        if not response:
+            observations.append(f"{model} response unavailable")
 
     claude_meta = extract_response_metadata(claude_response)
-    chatgpt_meta = extract_response_metadata(chatgpt_response) if chatgpt_response else None
-    gemini_meta = extract_response_metadata(gemini_response) if gemini_response else None
+    model_metas = {
+        model: extract_response_metadata(response)
+        for model, response in model_responses.items()
+        if response
+    }
 
     # Note code usage differences
-    if chatgpt_meta and claude_meta['has_code'] != chatgpt_meta['has_code']:
-        observations.append("Claude and ChatGPT differ in code example usage")
-    if gemini_meta and claude_meta['has_code'] != gemini_meta['has_code']:
-        observations.append("Claude and Gemini differ in code example usage")
+    for model, meta in model_metas.items():
+        if claude_meta['has_code'] != meta['has_code']:
+            observations.append(f"Claude and {model} differ in code example usage")
 
     # Note list usage differences
-    if chatgpt_meta and claude_meta['has_lists'] != chatgpt_meta['has_lists']:
-        observations.append("Claude and ChatGPT differ in list formatting")
-    if gemini_meta and claude_meta['has_lists'] != gemini_meta['has_lists']:
-        observations.append("Claude and Gemini differ in list formatting")
+    for model, meta in model_metas.items():
+        if claude_meta['has_lists'] != meta['has_lists']:
+            observations.append(f"Claude and {model} differ in list formatting")
 
     return observations if observations else ["All responses use similar formatting"]
+
+
+def split_sections(text: str) -> list[str]:
+    """
+    Split a response into sections at headings and blank lines.
+
+    Fenced code blocks are kept whole, and paragraphs shorter than
+    MIN_SECTION_WORDS are merged into the preceding section.
+    """
+    sections = []
+    current = []
+    in_fence = False
+
+    def _flush() -> None:
+        if current:
+            sections.append("\n".join(current).strip())
+            current.clear()
+
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("```"):
+            in_fence = not in_fence
+        elif not in_fence and (not stripped or stripped.startswith("#")):
+            _flush()
+        if stripped:
+            current.append(line)
+    _flush()
+
+    merged = []
+    for section in sections:
+        if merged and len(merged[-1].split()) < MIN_SECTION_WORDS:
+            merged[-1] += "\n" + section
+        elif merged and len(section.split()) < MIN_SECTION_WORDS and not section.startswith("#"):
+            merged[-1] += "\n" + section
+        else:
+            merged.append(section)
+    return merged
+
+
+def hashed_vectors(texts: list[str], dimensions: int = AGREEMENT_DIMENSIONS) -> "np.ndarray":
+    """
+    Embed texts as L2-normalized, signed, hashed unigram + bigram count vectors.
+
+    Tokens of all texts are mapped to integer ids in one pass, so hashing,
+    counting and normalization are vectorized across every text at once.
+    A hash bit picks each feature's sign so bucket collisions cancel out
+    in expectation instead of inflating similarity.
+
+    Args:
+        texts: Texts to embed
+        dimensions: Number of hash buckets
+
+    Returns:
+        float32 array of shape (len(texts), dimensions); empty texts are zero rows
+    """
+    token_lists = [_TOKEN_PATTERN.findall(text.lower()) for text in texts]
+    lengths = np.array([len(tokens) for tokens in token_lists])
+    vectors = np.zeros((len(texts), dimensions), dtype=np.float32)
+    if not lengths.sum():
+        return vectors
+
+    # A dict rather than np.unique: a fixed-width string array sizes every slot
+    # to the longest token, so one long unbroken token (base64, minified JS)
+    # would cost tokens x max_len x 4 bytes
+    vocabulary: dict[str, int] = {}
+    ids = np.fromiter(
+        (vocabulary.setdefault(token, len(vocabulary) + 1) for tokens in token_lists for token in tokens),
+        dtype=np.uint64,
+        count=int(lengths.sum())
+    )
+    rows = np.repeat(np.arange(len(texts)), lengths)
+
+    unigrams = (ids * np.uint64(_UNIGRAM_SALT)) >> np.uint64(40)
+    # Bigrams must not span two texts
+    same_text = rows[:-1] == rows[1:]
+    bigrams = (
+        ids[:-1][same_text] * np.uint64(_BIGRAM_SALTS[0])
+        + ids[1:][same_text] * np.uint64(_BIGRAM_SALTS[1])
+    ) >> np.uint64(40)
+
+    hashes = np.concatenate([unigrams, bigrams])
+    buckets = (hashes >> np.uint64(1)) % np.uint64(dimensions)
+    signs = np.where(hashes & np.uint64(1), 1.0, -1.0)
+    feature_rows = np.concatenate([rows, rows[:-1][same_text]])
+    counts = np.bincount(
+        feature_rows * dimensions + buckets.astype(np.int64),
+        weights=signs,
+        minlength=len(texts) * dimensions
+    ).reshape(len(texts), dimensions)
+
+    # Sublinear TF so repeated boilerplate does not dominate
+    vectors = (np.sign(counts) * np.log1p(np.abs(counts))).astype(np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+
+def _section_heading(section: str, width: int = 80) -> str:
+    first_line = section.splitlines()[0].strip().lstrip("#").strip()
+    if len(first_line) > width:
+        return first_line[:width - 1].rstrip() + "…"
+    return first_line
+
+
+def compute_agreement(
+    responses: dict[str, str],
+    divergence_threshold: float = DIVERGENCE_THRESHOLD
+) -> AgreementReport | None:
+    """
+    Score pairwise agreement across responses and flag divergent sections.
+
+    Each section of each response is matched against every section of every
+    other response; its support is the mean, over the other responses, of
+    its best match there. Sections with support below divergence_threshold
+    have little counterpart anywhere else.
+
+    Args:
+        responses: Dict of model name -> response text (empty texts are skipped)
+        divergence_threshold: Support below which a section is flagged
+
+    Returns:
+        AgreementReport, or None if NumPy is not installed or fewer than two
+        responses have text
+    """
+    if np is None:
+        return None
+    responses = {model: text for model, text in responses.items() if text and text.strip()}
+    if len(responses) < 2:
+        return None
+
+    models = list(responses)
+    sections = []
+    owners = []
+    for index, text in enumerate(responses.values()):
+        for section in split_sections(text):
+            sections.append(section)
+            owners.append(index)
+    owners = np.array(owners)
+
+    response_vectors = hashed_vectors(list(responses.values()), AGREEMENT_DIMENSIONS)
+    section_vectors = hashed_vectors(sections, SECTION_DIMENSIONS)
+    matrix = np.clip(response_vectors @ response_vectors.T, 0.0, 1.0)
+
+    # best[j, k]: best similarity of section k to any section of response j
+    similarity = section_vectors @ section_vectors.T
+    best = np.stack([
+        similarity[:, owners == j].max(axis=1) if np.any(owners == j) else np.zeros(len(sections))
+        for j in range(len(models))
+    ])
+    best[owners, np.arange(len(sections))] = np.nan
+    support = np.nanmean(best, axis=0)
+
+    divergent = []
+    for k in np.argsort(support):
+        if support[k] >= divergence_threshold or len(divergent) >= MAX_DIVERGENT_SECTIONS:
+            break
+        if len(sections[k].split()) < MIN_SECTION_WORDS:
+            continue
+        divergent.append(DivergentSection(
+            model=models[owners[k]],
+            heading=_section_heading(sections[k]),
+            support=round(float(support[k]), 2)
+        ))
+
+    return AgreementReport(
+        models=models,
+        matrix=np.round(matrix.astype(np.float64), 2).tolist(),
+        divergent_sections=divergent
+    )
@@ -1,20 +1,44 @@
 """
 Async API clients for querying OpenAI and Google Gemini models.
 
-Uses httpx for OpenAI (handles brotli compression) and aiohttp for Gemini.
+Models are described by Provider entries in a registry; any number of them
+can be fanned out concurrently with query_models_parallel. Register extra
+providers with register_provider() (query_openai/query_gemini work for any
+model ID on those APIs).
+
+All providers share one pooled httpx client (HTTP/2 when h2 is installed).
+httpx itself is imported on the first network call, so cache hits and
+missing-key failures never load it. The client is kept alive for the lifetime
+of the event loop and shared across attempts, models and invocations. Call
+close_clients() on shutdown to release pooled connections.
 """
 
 import asyncio
+import bisect
+import json
 import os
 import time
-from typing import TypedDict, Callable, Awaitable
+from collections import deque
+from functools import partial
+from typing import TYPE_CHECKING, TypedDict, Callable, Awaitable, AsyncIterator
 
-import aiohttp
-import httpx
+import tracing
+from response_parsing import parse_gemini_body, parse_openai_body
+from resilience import (
+    classify_failure,
+    compute_backoff,
+    get_circuit_breaker,
+    parse_retry_after,
+)
 
+if TYPE_CHECKING:
+    import httpx
 
-class ModelResponse(TypedDict):
-    """Response from a model API call."""
+    from metrics_store import MetricsStore
+    from response_cache import ResponseCache
+
+
+class _ModelResponseBase(TypedDict):
     model: str
     content: str
     success: bool
@@ -22,11 +46,64 @@ class ModelResponse(TypedDict):
     response_time_ms: int
 
 
+class ModelResponse(_ModelResponseBase, total=False):
+    """Response from a model API call."""
+    first_token_ms: int | None  # Only set for streamed calls
+    cached: bool  # True when served from the response cache
+    status_code: int | None  # HTTP status of a failed call, if one was received
+    retry_after: float | None  # Server-requested retry delay in seconds
+    phases: dict[str, int]  # Network phase durations in ms for the final attempt
+    input_tokens: int | None  # Prompt tokens reported by the provider
+    output_tokens: int | None  # Completion tokens (including reasoning) reported by the provider
+    attempts: int  # Attempts made, retries included (0 for cache hits and coalesced waiters)
+    coalesced: bool  # True when shared from an identical query already in flight
+    timed_out: bool  # True when the attempt ran out of its time limit
+    fatal: bool  # True when the call cannot succeed as-is (e.g. no API key configured)
+
+
+# Callback receiving each streamed text chunk as it arrives
+ChunkCallback = Callable[[str], None]
+
+# Provider query function: async (prompt, timeout, on_chunk=None) -> ModelResponse
+QueryFn = Callable[..., Awaitable[ModelResponse]]
+
+
+class Provider(TypedDict):
+    """A model that can be asked for a second opinion."""
+    name: str  # Display name used in formatted output
+    model_id: str  # API model identifier; also keys the cache, limits and breakers
+    api_key_env: str  # Environment variable holding the API key
+    query_fn: QueryFn
+
+
+class StreamError(Exception):
+    """Raised when a provider reports an error mid-stream."""
+
+
 # Model configurations
 OPENAI_MODEL = "gpt-5.2-pro"
 GEMINI_MODEL = "gemini-3-pro-preview"
 
 
+# API endpoints; override with OPENAI_BASE_URL / GEMINI_BASE_URL
+DEFAULT_OPENAI_BASE_URL = "https://api.openai.com/v1"
+DEFAULT_GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+
+# Per-model time budget in seconds, retries included (see attempt_timeout)
+DEFAULT_TIMEOUT_SECONDS = 300
+
+# Connection pool settings shared by all providers
+POOL_MAX_CONNECTIONS = 20
+POOL_KEEPALIVE_SECONDS = 120.0
+
+# Registered providers keyed by model ID, in registration (display) order
+PROVIDERS: dict[str, Provider] = {}
+
+# Pooled client, bound to the event loop it was created on
+_http_client: "httpx.AsyncClient | None" = None
+_clients_loop: asyncio.AbstractEventLoop | None = None
+
+
 def _get_openai_api_key() -> str | None:
     """Get OpenAI API key from environment."""
     return os.getenv("OPENAI_API_KEY")
@@ -37,41 +114,226 @@ def _get_gemini_api_key() -> str | None:
     return os.getenv("GEMINI_API_KEY")
 
 
-def validate_api_keys() -> tuple[bool, str]:
+def _get_openai_base_url() -> str:
+    """Get the OpenAI API base URL (overridable, e.g. for the local mock server)."""
+    return os.getenv("OPENAI_BASE_URL", DEFAULT_OPENAI_BASE_URL).rstrip("/")
+
+
+def _get_gemini_base_url() -> str:
+    """Get the Gemini API base URL (overridable, e.g. for the local mock server)."""
+    return os.getenv("GEMINI_BASE_URL", DEFAULT_GEMINI_BASE_URL).rstrip("/")
+
+
+def _http2_available() -> bool:
+    """Check whether the optional h2 package is installed for HTTP/2 support."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _check_clients_loop() -> None:
+    """Forget a client created on another event loop (e.g. a finished asyncio.run)."""
+    global _http_client, _clients_loop
+
+    loop = asyncio.get_running_loop()
+    if _clients_loop is not loop:
+        _http_client = None
+        _clients_loop = loop
+
+
+def _request_timeout(timeout: float) -> "httpx.Timeout":
+    """Short connect/write/pool timeouts, long read timeout for the LLM response."""
+    import httpx
+
+    return httpx.Timeout(connect=30.0, read=float(timeout), write=30.0, pool=30.0)
+
+
+def get_http_client() -> "httpx.AsyncClient":
+    """
+    Return the shared keep-alive httpx client used for every provider.
+
+    Imports httpx on first use and uses HTTP/2 when the h2 package is
+    installed. Must be called from within a running event loop.
+    """
+    global _http_client
+
+    import httpx
+
+    _check_clients_loop()
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=_http2_available(),
+            timeout=httpx.Timeout(connect=30.0, read=300.0, write=30.0, pool=30.0),
+            limits=httpx.Limits(
+                max_connections=POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=POOL_MAX_CONNECTIONS,
+                keepalive_expiry=POOL_KEEPALIVE_SECONDS
+            )
+        )
+    return _http_client
+
+
+async def close_clients() -> None:
+    """Close the pooled HTTP client. Safe to call more than once."""
+    global _http_client, _clients_loop
+
+    http_client = _http_client
+    _http_client = None
+    _clients_loop = None
+
+    if http_client is not None and not http_client.is_closed:
+        await http_client.aclose()
+
+
+def _parse_sse_line(line: str) -> dict | None:
+    """Parse one Server-Sent Events line, returning the JSON payload of data lines."""
+    if not line.startswith("data:"):
+        return None
+    data = line[5:].strip()
+    if not data or data == "[DONE]":
+        return None
+    return json.loads(data)
+
+
+async def iter_openai_stream(
+    response: "httpx.Response",
+    usage: dict | None = None
+) -> AsyncIterator[str]:
+    """
+    Yield output text deltas from an OpenAI Responses API SSE stream.
+
+    Args:
+        response: An open streaming httpx response
+        usage: Optional dict that receives input_tokens/output_tokens from
+               the response.completed event
+
+    Yields:
+        Text chunks in arrival order
+    """
+    async for line in response.aiter_lines():
+        event = _parse_sse_line(line)
+        if event is None:
+            continue
+        event_type = event.get("type")
+        if event_type == "response.output_text.delta":
+            delta = event.get("delta", "")
+            if delta:
+                yield delta
+        elif event_type == "response.completed" and usage is not None:
+            reported = event.get("response", {}).get("usage") or {}
+            usage["input_tokens"] = reported.get("input_tokens")
+            usage["output_tokens"] = reported.get("output_tokens")
+        elif event_type in ("response.failed", "error"):
+            error = event.get("error") or event.get("response", {}).get("error") or event
+            raise StreamError(str(error)[:500])
+
+
+async def iter_gemini_stream(
+    response: "httpx.Response",
+    usage: dict | None = None
+) -> AsyncIterator[str]:
+    """
+    Yield text chunks from a Gemini streamGenerateContent SSE stream.
+
+    Args:
+        response: An open streaming httpx response for a request made with alt=sse
+        usage: Optional dict that receives input_tokens/output_tokens from the
+               usageMetadata of the latest chunk carrying it
+
+    Yields:
+        Text chunks in arrival order
+    """
+    async for line in response.aiter_lines():
+        event = _parse_sse_line(line.strip())
+        if event is None:
+            continue
+        if "error" in event:
+            raise StreamError(str(event["error"])[:500])
+        if usage is not None and "usageMetadata" in event:
+            usage["input_tokens"] = event["usageMetadata"].get("promptTokenCount")
+            usage["output_tokens"] = event["usageMetadata"].get("candidatesTokenCount")
+        candidates = event.get("candidates") or []
+        if not candidates:
+            continue
+        parts = candidates[0].get("content", {}).get("parts", [])
+        text = "".join(part.get("text", "") for part in parts)
+        if text:
+            yield text
+
+
+async def _consume_stream(
+    chunks: AsyncIterator[str],
+    on_chunk: ChunkCallback,
+    start_time: float
+) -> tuple[str, int | None]:
+    """
+    Drain a text stream, forwarding chunks to on_chunk.
+
+    Returns:
+        Tuple of (full_text, time_to_first_token_ms)
+    """
+    pieces = []
+    first_token_ms = None
+    async for chunk in chunks:
+        if first_token_ms is None:
+            first_token_ms = int((time.perf_counter() - start_time) * 1000)
+        pieces.append(chunk)
+        on_chunk(chunk)
+    return "".join(pieces), first_token_ms
+
+
+def validate_api_keys(providers: list[Provider] | None = None) -> tuple[bool, str]:
     """
     Validate that required API keys are set.
 
+    Args:
+        providers: Providers that will be queried (default: all registered)
+
     Returns:
         Tuple of (is_valid, error_message)
     """
-    openai_key = _get_openai_api_key()
-    gemini_key = _get_gemini_api_key()
+    if providers is None:
+        providers = get_providers()
 
     missing = []
-    if not openai_key:
-        missing.append("OPENAI_API_KEY")
-    if not gemini_key:
-        missing.append("GEMINI_API_KEY")
+    for provider in providers:
+        env_var = provider["api_key_env"]
+        if not os.getenv(env_var) and env_var not in missing:
+            missing.append(env_var)
 
     if missing:
         error_lines = [f"ERROR: Missing required environment variable(s): {', '.join(missing)}"]
         error_lines.append("\nSet them with:")
-        if "OPENAI_API_KEY" in missing:
-            error_lines.append("  export OPENAI_API_KEY='your-openai-key'")
-        if "GEMINI_API_KEY" in missing:
-            error_lines.append("  export GEMINI_API_KEY='your-gemini-key'")
+        for env_var in missing:
+            vendor = env_var.split("_")[0].lower()
+            error_lines.append(f"  export {env_var}='your-{vendor}-key'")
         return False, "\n".join(error_lines)
 
     return True, ""
 
 
-async def query_openai(prompt: str, timeout: int = 300) -> ModelResponse:
+async def query_openai(
+    prompt: str,
+    timeout: float = DEFAULT_TIMEOUT_SECONDS,
+    on_chunk: ChunkCallback | None = None,
+    model_id: str = OPENAI_MODEL,
+    model_name: str = "GPT-5.2 Pro"
+) -> ModelResponse:
     """
-    Query OpenAI GPT-5.2 Pro via the Responses API asynchronously.
+    Query an OpenAI model (GPT-5.2 Pro by default) via the Responses API asynchronously.
+
+    When on_chunk is given the response is streamed over SSE, each text delta
+    is passed to on_chunk as it arrives and first_token_ms is recorded.
+    Cancelling the calling task aborts the generation.
 
     Args:
         prompt: The prompt to send to the model
-        timeout: Request timeout in seconds
+        timeout: Read timeout in seconds
+        on_chunk: Optional callback for streamed text chunks
+        model_id: OpenAI model identifier
+        model_name: Display name reported in the ModelResponse
 
     Returns:
         ModelResponse with content or error information
@@ -79,79 +341,83 @@ async def query_openai(prompt: str, timeout: int = 300) -> ModelResponse:
     api_key = _get_openai_api_key()
     if not api_key:
         return ModelResponse(
-            model="GPT-5.2 Pro",
+            model=model_name,
             content="",
             success=False,
             error="OPENAI_API_KEY not set",
-            response_time_ms=0
+            response_time_ms=0,
+            fatal=True
         )
 
     start_time = time.perf_counter()
 
-    url = "https://api.openai.com/v1/responses"
+    url = f"{_get_openai_base_url()}/responses"
     headers = {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json",
     }
     payload = {
-        "model": OPENAI_MODEL,
+        "model": model_id,
         "input": prompt
     }
 
+    import httpx
+
     try:
-        # Configure explicit timeouts: short connect, long read for LLM response
-        client_timeout = httpx.Timeout(
-            connect=30.0,
-            read=float(timeout),
-            write=30.0,
-            pool=30.0
-        )
-        async with httpx.AsyncClient(timeout=client_timeout) as client:
-            response = await client.post(url, headers=headers, json=payload)
-            elapsed_ms = int((time.perf_counter() - start_time) * 1000)
+        client_timeout = _request_timeout(timeout)
+        trace = tracing.current_attempt()
+        client = get_http_client()
+        if on_chunk is not None:
+            return await _stream_openai(
+                client, url, headers, {**payload, "stream": True},
+                client_timeout, on_chunk, start_time, model_name
+            )
 
+        # Stream the body into the parser so large reasoning items are never held whole
+        async with client.stream(
+            "POST", url, headers=headers, json=payload, timeout=client_timeout,
+            extensions={"trace": trace.httpcore_hook}
+        ) as response:
             if response.status_code != 200:
+                await response.aread()
+                elapsed_ms = int((time.perf_counter() - start_time) * 1000)
                 return ModelResponse(
-                    model="GPT-5.2 Pro",
+                    model=model_name,
                     content="",
                     success=False,
                     error=f"HTTP {response.status_code}: {response.text[:500]}",
-                    response_time_ms=elapsed_ms
+                    response_time_ms=elapsed_ms,
+                    status_code=response.status_code,
+                    retry_after=parse_retry_after(response.headers.get("retry-after"))
                 )
 
-            data = response.json()
+            parsed = await parse_openai_body(response.aiter_bytes())
+            trace.mark("parse_complete")
 
-            # Extract text from Responses API structure
-            # GPT-5.2+ returns reasoning block first, then message - find the message
-            message_output = next(
-                (item for item in data["output"] if item.get("type") == "message"),
-                None
-            )
-            if not message_output:
-                raise KeyError("No message output found in response")
-            content = message_output["content"][0]["text"]
-
-            return ModelResponse(
-                model="GPT-5.2 Pro",
-                content=content,
-                success=True,
-                error=None,
-                response_time_ms=elapsed_ms
-            )
+        return ModelResponse(
+            model=model_name,
+            content=parsed["content"],
+            success=True,
+            error=None,
+            response_time_ms=int((time.perf_counter() - start_time) * 1000),
+            input_tokens=parsed["input_tokens"],
+            output_tokens=parsed["output_tokens"]
+        )
 
     except httpx.TimeoutException:
         elapsed_ms = int((time.perf_counter() - start_time) * 1000)
         return ModelResponse(
-            model="GPT-5.2 Pro",
+            model=model_name,
             content="",
             success=False,
-            error=f"Request timed out after {timeout}s",
-            response_time_ms=elapsed_ms
+            error=f"Request timed out after {timeout:g}s",
+            response_time_ms=elapsed_ms,
+            timed_out=True
         )
     except httpx.HTTPError as e:
         elapsed_ms = int((time.perf_counter() - start_time) * 1000)
         return ModelResponse(
-            model="GPT-5.2 Pro",
+            model=model_name,
             content="",
             success=False,
             error=f"HTTP error: {str(e)}",
@@ -160,21 +426,91 @@ async def query_openai(prompt: str, timeout: int = 300) -> ModelResponse:
     except KeyError as e:
         elapsed_ms = int((time.perf_counter() - start_time) * 1000)
         return ModelResponse(
-            model="GPT-5.2 Pro",
+            model=model_name,
             content="",
             success=False,
             error=f"Unexpected response structure: missing key {e}",
             response_time_ms=elapsed_ms
         )
+    except (StreamError, json.JSONDecodeError) as e:
+        elapsed_ms = int((time.perf_counter() - start_time) * 1000)
+        return ModelResponse(
+            model=model_name,
+            content="",
+            success=False,
+            error=f"Stream error: {str(e)}",
+            response_time_ms=elapsed_ms
+        )
 
 
-async def query_gemini(prompt: str, timeout: int = 300) -> ModelResponse:
+async def _stream_openai(
+    client: "httpx.AsyncClient",
+    url: str,
+    headers: dict,
+    payload: dict,
+    client_timeout: "httpx.Timeout",
+    on_chunk: ChunkCallback,
+    start_time: float,
+    model_name: str
+) -> ModelResponse:
+    """Run a streaming Responses API request. Network errors propagate to the caller."""
+    trace = tracing.current_attempt()
+    async with client.stream(
+        "POST", url, headers=headers, json=payload, timeout=client_timeout,
+        extensions={"trace": trace.httpcore_hook}
+    ) as response:
+        if response.status_code != 200:
+            await response.aread()
+            elapsed_ms = int((time.perf_counter() - start_time) * 1000)
+            return ModelResponse(
+                model=model_name,
+                content="",
+                success=False,
+                error=f"HTTP {response.status_code}: {response.text[:500]}",
+                response_time_ms=elapsed_ms,
+                status_code=response.status_code,
+                retry_after=parse_retry_after(response.headers.get("retry-after"))
+            )
+
+        usage = {}
+        content, first_token_ms = await _consume_stream(
+            iter_openai_stream(response, usage), on_chunk, start_time
+        )
+        trace.mark("body_complete")
+        trace.mark("parse_complete")
+
+    return ModelResponse(
+        model=model_name,
+        content=content,
+        success=True,
+        error=None,
+        response_time_ms=int((time.perf_counter() - start_time) * 1000),
+        first_token_ms=first_token_ms,
+        input_tokens=usage.get("input_tokens"),
+        output_tokens=usage.get("output_tokens")
+    )
+
+
+async def query_gemini(
+    prompt: str,
+    timeout: float = DEFAULT_TIMEOUT_SECONDS,
+    on_chunk: ChunkCallback | None = None,
+    model_id: str = GEMINI_MODEL,
+    model_name: str = "Gemini 3 Pro"
+) -> ModelResponse:
     """
-    Query Google Gemini 3 Pro asynchronously.
+    Query a Google Gemini model (Gemini 3 Pro by default) asynchronously.
+
+    When on_chunk is given the response is streamed via streamGenerateContent,
+    each text chunk is passed to on_chunk as it arrives and first_token_ms is
+    recorded. Cancelling the calling task aborts the generation.
 
     Args:
         prompt: The prompt to send to the model
-        timeout: Request timeout in seconds
+        timeout: Read timeout in seconds
+        on_chunk: Optional callback for streamed text chunks
+        model_id: Gemini model identifier
+        model_name: Display name reported in the ModelResponse
 
     Returns:
         ModelResponse with content or error information
@@ -182,16 +518,21 @@ async def query_gemini(prompt: str, timeout: int = 300) -> ModelResponse:
     api_key = _get_gemini_api_key()
     if not api_key:
         return ModelResponse(
-            model="Gemini 3 Pro",
+            model=model_name,
             content="",
             success=False,
             error="GEMINI_API_KEY not set",
-            response_time_ms=0
+            response_time_ms=0,
+            fatal=True
         )
 
     start_time = time.perf_counter()
 
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent"
+    base_url = f"{_get_gemini_base_url()}/models/{model_id}"
+    if on_chunk is not None:
+        url = f"{base_url}:streamGenerateContent?alt=sse"
+    else:
+        url = f"{base_url}:generateContent"
     headers = {
         "Content-Type": "application/json",
         "x-goog-api-key": api_key
@@ -204,145 +545,738 @@ async def query_gemini(prompt: str, timeout: int = 300) -> ModelResponse:
         }
     }
 
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                url,
-                headers=headers,
-                json=payload,
-                timeout=aiohttp.ClientTimeout(total=timeout)
-            ) as response:
-                elapsed_ms = int((time.perf_counter() - start_time) * 1000)
+    import httpx
 
-                if response.status != 200:
-                    error_text = await response.text()
-                    return ModelResponse(
-                        model="Gemini 3 Pro",
-                        content="",
-                        success=False,
-                        error=f"HTTP {response.status}: {error_text[:200]}",
-                        response_time_ms=elapsed_ms
-                    )
+    trace = tracing.current_attempt()
 
-                data = await response.json()
-                content = data["candidates"][0]["content"]["parts"][0]["text"]
+    try:
+        async with get_http_client().stream(
+            "POST", url, headers=headers, json=payload, timeout=_request_timeout(timeout),
+            extensions={"trace": trace.httpcore_hook}
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                elapsed_ms = int((time.perf_counter() - start_time) * 1000)
+                return ModelResponse(
+                    model=model_name,
+                    content="",
+                    success=False,
+                    error=f"HTTP {response.status_code}: {response.text[:200]}",
+                    response_time_ms=elapsed_ms,
+                    status_code=response.status_code,
+                    retry_after=parse_retry_after(response.headers.get("retry-after"))
+                )
 
+            if on_chunk is not None:
+                usage = {}
+                content, first_token_ms = await _consume_stream(
+                    iter_gemini_stream(response, usage), on_chunk, start_time
+                )
+                trace.mark("body_complete")
+                trace.mark("parse_complete")
                 return ModelResponse(
-                    model="Gemini 3 Pro",
+                    model=model_name,
                     content=content,
                     success=True,
                     error=None,
-                    response_time_ms=elapsed_ms
+                    response_time_ms=int((time.perf_counter() - start_time) * 1000),
+                    first_token_ms=first_token_ms,
+                    input_tokens=usage.get("input_tokens"),
+                    output_tokens=usage.get("output_tokens")
                 )
 
-    except asyncio.TimeoutError:
+            parsed = await parse_gemini_body(response.aiter_bytes())
+            trace.mark("parse_complete")
+
+            return ModelResponse(
+                model=model_name,
+                content=parsed["content"],
+                success=True,
+                error=None,
+                response_time_ms=int((time.perf_counter() - start_time) * 1000),
+                input_tokens=parsed["input_tokens"],
+                output_tokens=parsed["output_tokens"]
+            )
+
+    except httpx.TimeoutException:
         elapsed_ms = int((time.perf_counter() - start_time) * 1000)
         return ModelResponse(
-            model="Gemini 3 Pro",
+            model=model_name,
             content="",
             success=False,
-            error=f"Request timed out after {timeout}s",
-            response_time_ms=elapsed_ms
+            error=f"Request timed out after {timeout:g}s",
+            response_time_ms=elapsed_ms,
+            timed_out=True
         )
-    except aiohttp.ClientError as e:
+    except httpx.HTTPError as e:
         elapsed_ms = int((time.perf_counter() - start_time) * 1000)
         return ModelResponse(
-            model="Gemini 3 Pro",
+            model=model_name,
             content="",
             success=False,
             error=f"Connection error: {str(e)}",
             response_time_ms=elapsed_ms
         )
+    except (KeyError, IndexError) as e:
+        elapsed_ms = int((time.perf_counter() - start_time) * 1000)
+        return ModelResponse(
+            model=model_name,
+            content="",
+            success=False,
+            error=f"Unexpected response structure: missing key {e}",
+            response_time_ms=elapsed_ms
+        )
+    except (StreamError, json.JSONDecodeError) as e:
+        elapsed_ms = int((time.perf_counter() - start_time) * 1000)
+        return ModelResponse(
+            model=model_name,
+            content="",
+            success=False,
+            error=f"Stream error: {str(e)}",
+            response_time_ms=elapsed_ms
+        )
+
+
+def register_provider(
+    name: str,
+    model_id: str,
+    api_key_env: str,
+    query_fn: QueryFn
+) -> Provider:
+    """
+    Add (or replace) a provider in the registry.
+
+    Args:
+        name: Display name used in formatted output, unique per provider
+        model_id: API model identifier, unique per provider
+        api_key_env: Environment variable holding the API key
+        query_fn: Async (prompt, timeout, on_chunk=None) -> ModelResponse
+
+    Returns:
+        The registered Provider
+
+    Raises:
+        ValueError: If another model is already registered under this name
+    """
+    # Results are keyed by display name, so a shared name would drop a response
+    for other in PROVIDERS.values():
+        if other["name"] == name and other["model_id"] != model_id:
+            raise ValueError(f"Provider name {name!r} is already used by {other['model_id']}")
+    provider = Provider(name=name, model_id=model_id, api_key_env=api_key_env, query_fn=query_fn)
+    PROVIDERS[model_id] = provider
+    return provider
+
+
+def register_openai_model(model_id: str, name: str) -> Provider:
+    """Register another model served by the OpenAI Responses API."""
+    return register_provider(
+        name, model_id, "OPENAI_API_KEY",
+        partial(query_openai, model_id=model_id, model_name=name)
+    )
+
+
+def register_gemini_model(model_id: str, name: str) -> Provider:
+    """Register another model served by the Gemini generateContent API."""
+    return register_provider(
+        name, model_id, "GEMINI_API_KEY",
+        partial(query_gemini, model_id=model_id, model_name=name)
+    )
+
+
+def get_providers(model_ids: list[str] | None = None) -> list[Provider]:
+    """
+    Look up registered providers.
+
+    Args:
+        model_ids: Model IDs to select, in order (default: all registered)
+
+    Returns:
+        List of Provider entries
+
+    Raises:
+        KeyError: If a requested model ID is not registered
+    """
+    if model_ids is None:
+        return list(PROVIDERS.values())
+    unknown = [model_id for model_id in model_ids if model_id not in PROVIDERS]
+    if unknown:
+        raise KeyError(
+            f"Unknown model(s): {', '.join(unknown)}. Registered: {', '.join(PROVIDERS)}"
+        )
+    return [PROVIDERS[model_id] for model_id in model_ids]
+
+
+register_openai_model(OPENAI_MODEL, "GPT-5.2 Pro")
+register_gemini_model(GEMINI_MODEL, "Gemini 3 Pro")
 
 
 async def query_with_retry(
-    query_fn: Callable[[str, int], Awaitable[ModelResponse]],
+    query_fn: Callable[[str, float], Awaitable[ModelResponse]],
     prompt: str,
     max_retries: int = 2,
     backoff_base: float = 2.0,
-    timeout: int = 300
+    timeout: float = DEFAULT_TIMEOUT_SECONDS,
+    provider: str | None = None,
+    max_retry_delay: float = 30.0,
+    adaptive_timeout: bool = False
 ) -> ModelResponse:
     """
-    Query a model with exponential backoff retry logic.
+    Query a model, retrying only failures that can succeed on a later attempt.
+
+    Fatal errors (bad request, bad key, exhausted quota) return immediately.
+    Retryable ones wait for the server's Retry-After when given, otherwise a
+    jittered exponential backoff. When a provider is named, its circuit
+    breaker is consulted before every attempt so an outage fails fast.
+
+    With adaptive_timeout, timeout is the budget for all attempts together:
+    each attempt's timeout comes from attempt_timeout() and is capped by
+    what is left, and no retry is started that could not get at least
+    MIN_ATTEMPT_TIMEOUT_SECONDS.
 
     Args:
         query_fn: Async function that performs the API call
         prompt: The prompt to send
         max_retries: Maximum number of retry attempts
         backoff_base: Base for exponential backoff calculation
-        timeout: Request timeout in seconds
+        timeout: Request timeout in seconds per attempt, or the overall
+                 budget with adaptive_timeout
+        provider: Optional provider key for the circuit breaker and latency
+                  history (model ID)
+        max_retry_delay: Give up instead of waiting longer than this many seconds
+        adaptive_timeout: Size attempt timeouts from the provider's latency history
 
     Returns:
-        ModelResponse from the last attempt
+        ModelResponse from the last attempt, with the number of attempts made
     """
+    breaker = get_circuit_breaker(provider) if provider else None
     last_result: ModelResponse | None = None
+    start_time = time.monotonic()
 
     for attempt in range(max_retries + 1):
-        result = await query_fn(prompt, timeout)
+        if breaker is not None and not breaker.allow_request():
+            if last_result is not None:
+                return last_result
+            return ModelResponse(
+                model=PROVIDERS[provider]["name"] if provider in PROVIDERS else provider,
+                content="",
+                success=False,
+                error=f"Circuit open for {provider}: failing fast, "
+                      f"retry in {breaker.retry_in():.0f}s",
+                response_time_ms=0,
+                attempts=0
+            )
+
+        attempt_limit = timeout
+        if adaptive_timeout:
+            remaining = timeout - (time.monotonic() - start_time)
+            attempt_limit = attempt_timeout(provider or "", len(prompt), attempt, remaining)
+
+        try:
+            result = await query_fn(prompt, attempt_limit)
+        except (asyncio.CancelledError, Exception):
+            # Otherwise a cancelled half-open trial would keep the breaker shut for good
+            if breaker is not None:
+                breaker.release_trial()
+            raise
+        result["attempts"] = attempt + 1
 
         if result["success"]:
+            if breaker is not None:
+                breaker.record_success()
             return result
 
         last_result = result
-
-        # Don't sleep after the last attempt
-        if attempt < max_retries:
-            await asyncio.sleep(backoff_base ** attempt)
+        failure = classify_failure(result)
+        if breaker is not None:
+            breaker.record_failure(failure)
+
+        # Don't sleep after the last attempt or on errors that cannot succeed
+        if attempt >= max_retries or not failure["retryable"]:
+            break
+        retry_after = failure["retry_after"]
+        if retry_after is not None and retry_after > max_retry_delay:
+            break
+        delay = compute_backoff(attempt, backoff_base, retry_after, max_retry_delay)
+        if adaptive_timeout:
+            remaining = timeout - (time.monotonic() - start_time) - delay
+            if remaining < MIN_ATTEMPT_TIMEOUT_SECONDS:
+                break
+        await asyncio.sleep(delay)
 
     # Return the last failed result
     return last_result  # type: ignore
 
 
-async def query_models_parallel(
-    openai_prompt: str,
-    gemini_prompt: str,
-    timeout: int = 300,
-    use_retry: bool = True
-) -> tuple[ModelResponse, ModelResponse]:
+# Upper bounds in prompt characters of the size buckets latency is tracked in
+PROMPT_SIZE_BUCKETS = (4_000, 16_000, 64_000, 256_000)
+
+
+def prompt_size_bucket(prompt_chars: int) -> int:
+    """Return the index of the PROMPT_SIZE_BUCKETS bucket a prompt falls in."""
+    return bisect.bisect_left(PROMPT_SIZE_BUCKETS, prompt_chars)
+
+
+class LatencyTracker:
+    """
+    Rolling window of successful attempt latencies per model, used for hedging.
+
+    Samples recorded with a prompt size are also kept per prompt-size bucket,
+    since a model's latency grows with the prompt it is given.
+    """
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        """
+        Args:
+            window: Number of recent samples kept per model (and per bucket)
+            min_samples: Samples required before percentiles are reported
+        """
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: dict[str, deque[int]] = {}
+        self._bucketed: dict[tuple[str, int], deque[int]] = {}
+
+    def record(self, model_id: str, latency_ms: int, prompt_chars: int | None = None) -> None:
+        """Record the latency of one successful attempt."""
+        samples = self._samples.setdefault(model_id, deque(maxlen=self.window))
+        samples.append(latency_ms)
+        if prompt_chars is not None:
+            key = (model_id, prompt_size_bucket(prompt_chars))
+            self._bucketed.setdefault(key, deque(maxlen=self.window)).append(latency_ms)
+
+    def percentile(
+        self,
+        model_id: str,
+        pct: float,
+        prompt_chars: int | None = None
+    ) -> float | None:
+        """
+        Return the pct-th percentile latency in ms, or None without enough samples.
+
+        With prompt_chars, only samples from that prompt-size bucket count.
+        """
+        if prompt_chars is None:
+            samples = self._samples.get(model_id)
+        else:
+            samples = self._bucketed.get((model_id, prompt_size_bucket(prompt_chars)))
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return float(ordered[index])
+
+
+# Process-wide latency history shared by all fan-outs
+latency_tracker = LatencyTracker()
+
+# Attempts slower than this percentile of a provider's history get a hedged duplicate
+HEDGE_PERCENTILE = 95
+
+# Adaptive attempt timeouts: this percentile of the model's latency for the
+# prompt's size bucket, times a factor plus a fixed margin, shrunk on each retry
+TIMEOUT_PERCENTILE = 99
+TIMEOUT_MARGIN_FACTOR = 1.5
+TIMEOUT_MARGIN_SECONDS = 5.0
+RETRY_TIMEOUT_SHRINK = 0.75
+MIN_ATTEMPT_TIMEOUT_SECONDS = 10.0
+
+
+def attempt_timeout(model_id: str, prompt_chars: int, attempt: int, remaining: float) -> float:
     """
-    Query both OpenAI and Gemini models concurrently using asyncio.gather.
+    Pick the read timeout for one attempt from the model's latency history.
+
+    Without enough history for the prompt's size bucket the attempt may use
+    all of the remaining budget. Otherwise it gets the high percentile plus
+    margin, reduced by RETRY_TIMEOUT_SHRINK for every earlier attempt so the
+    retries fit in what is left. Attempts that time out are recorded at their
+    limit, so a model that slows down pushes its own timeout up.
 
     Args:
-        openai_prompt: Prompt for ChatGPT
-        gemini_prompt: Prompt for Gemini
-        timeout: Request timeout in seconds per model
-        use_retry: Whether to use retry logic with backoff
+        model_id: Provider model identifier
+        prompt_chars: Length of the prompt
+        attempt: Zero-based attempt index
+        remaining: Seconds left in the model's overall budget
 
     Returns:
-        Tuple of (openai_response, gemini_response)
+        Timeout in seconds, never more than remaining
     """
-    if use_retry:
-        openai_task = query_with_retry(query_openai, openai_prompt, timeout=timeout)
-        gemini_task = query_with_retry(query_gemini, gemini_prompt, timeout=timeout)
-    else:
-        openai_task = query_openai(openai_prompt, timeout)
-        gemini_task = query_gemini(gemini_prompt, timeout)
+    high_ms = latency_tracker.percentile(model_id, TIMEOUT_PERCENTILE, prompt_chars)
+    if high_ms is None:
+        return round(max(remaining, 0.0), 1)
+    learned = (high_ms / 1000 * TIMEOUT_MARGIN_FACTOR + TIMEOUT_MARGIN_SECONDS)
+    learned *= RETRY_TIMEOUT_SHRINK ** attempt
+    return round(max(0.0, min(remaining, max(MIN_ATTEMPT_TIMEOUT_SECONDS, learned))), 1)
+
 
-    results = await asyncio.gather(openai_task, gemini_task, return_exceptions=True)
+# Models whose latency history has been loaded from the metrics store
+_seeded_models: set[str] = set()
 
-    # Handle any exceptions that were caught by return_exceptions=True
-    openai_result = results[0]
-    gemini_result = results[1]
 
-    if isinstance(openai_result, Exception):
-        openai_result = ModelResponse(
-            model="GPT-5.2 Pro",
+async def _seed_latency_history(metrics: "MetricsStore", model_ids: list[str]) -> None:
+    """Load recent latencies from the metrics store once per model and process."""
+    limit = latency_tracker.window * (len(PROMPT_SIZE_BUCKETS) + 1)
+    for model_id in model_ids:
+        if model_id in _seeded_models:
+            continue
+        _seeded_models.add(model_id)
+        # SQLite may wait on a busy lock; keep that off the event loop
+        rows = await asyncio.to_thread(metrics.recent_latencies, model_id, limit)
+        for latency_ms, prompt_chars in rows:
+            latency_tracker.record(model_id, latency_ms, prompt_chars)
+
+
+async def _hedged_attempt(
+    query_fn: Callable[[str, float], Awaitable[ModelResponse]],
+    prompt: str,
+    timeout: float,
+    model_id: str
+) -> ModelResponse:
+    """
+    Run one attempt, firing a duplicate request if it outlives the provider's p95.
+
+    The first successful response wins and the other request is cancelled.
+    Without enough latency history this is a plain single attempt.
+    """
+    threshold_ms = latency_tracker.percentile(model_id, HEDGE_PERCENTILE)
+    primary = asyncio.create_task(query_fn(prompt, timeout))
+    tasks = {primary}
+    try:
+        if threshold_ms is None:
+            return await primary
+
+        done, _ = await asyncio.wait(tasks, timeout=threshold_ms / 1000)
+        if done:
+            return primary.result()
+
+        tasks.add(asyncio.create_task(query_fn(prompt, timeout)))
+        pending = set(tasks)
+        last_result: ModelResponse | None = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                result = task.result()
+                if result["success"]:
+                    return result
+                last_result = result
+        return last_result  # type: ignore
+    finally:
+        # Also reached when the caller is cancelled, so no request outlives it
+        unfinished = [task for task in tasks if not task.done()]
+        for task in unfinished:
+            task.cancel()
+        await asyncio.gather(*unfinished, return_exceptions=True)
+
+
+def _build_attempt_fn(
+    query_fn: Callable[[str, int], Awaitable[ModelResponse]],
+    model_id: str,
+    semaphore: asyncio.Semaphore | None,
+    hedge: bool
+) -> Callable[[str, int], Awaitable[ModelResponse]]:
+    """
+    Wrap a provider query so each attempt is rate-capped, traced, timed and optionally hedged.
+
+    The semaphore is held per request, so backoff sleeps between retries
+    do not hold a slot.
+    """
+    async def _attempt(prompt: str, timeout: float) -> ModelResponse:
+        if semaphore is not None:
+            async with semaphore:
+                return await _traced(prompt, timeout)
+        return await _traced(prompt, timeout)
+
+    async def _traced(prompt: str, timeout: float) -> ModelResponse:
+        trace = tracing.start_attempt(model_id)
+        try:
+            # The provider timeout bounds each read; this bounds the whole attempt
+            result = await asyncio.wait_for(query_fn(prompt, timeout), timeout)
+        except asyncio.TimeoutError:
+            result = ModelResponse(
+                model=PROVIDERS[model_id]["name"] if model_id in PROVIDERS else model_id,
+                content="",
+                success=False,
+                error=f"Request timed out after {timeout:g}s",
+                response_time_ms=int(timeout * 1000),
+                timed_out=True
+            )
+        except asyncio.CancelledError:
+            trace.finish(False, "cancelled")
+            raise
+        result["phases"] = trace.finish(result["success"], result["error"])
+        if result["success"]:
+            latency_tracker.record(model_id, result["response_time_ms"], len(prompt))
+        elif result.get("timed_out"):
+            # Censored sample: the real latency is at least the limit. Without it a
+            # model that slows down past its learned timeout never yields another
+            # sample, and every later attempt times out at the same limit
+            latency_tracker.record(model_id, int(timeout * 1000), len(prompt))
+        return result
+
+    if not hedge:
+        return _attempt
+    return partial(_hedged_attempt, _attempt, model_id=model_id)
+
+
+async def _fetch_model(
+    query_fn: Callable[[str, float], Awaitable[ModelResponse]],
+    model_id: str,
+    prompt: str,
+    timeout: float,
+    use_retry: bool,
+    cache: "ResponseCache | None",
+    semaphore: asyncio.Semaphore | None,
+    hedge: bool,
+    metrics: "MetricsStore | None"
+) -> ModelResponse:
+    """Make the upstream call for one model, filling the cache and recording metrics if given."""
+    query_trace = tracing.start_query(model_id)
+    attempt_fn = _build_attempt_fn(query_fn, model_id, semaphore, hedge)
+    start_time = time.perf_counter()
+    try:
+        if use_retry:
+            result = await query_with_retry(
+                attempt_fn, prompt, timeout=timeout, provider=model_id, adaptive_timeout=True
+            )
+        else:
+            result = await attempt_fn(prompt, attempt_timeout(model_id, len(prompt), 0, timeout))
+            result["attempts"] = 1
+    except asyncio.CancelledError:
+        if metrics is not None:
+            metrics.record_cancelled(
+                model_id, len(prompt), int((time.perf_counter() - start_time) * 1000)
+            )
+        raise
+    query_trace.finish(result["success"], result["error"])
+    if metrics is not None:
+        metrics.record(model_id, len(prompt), result)
+
+    if cache is not None:
+        cache.put(model_id, prompt, result)
+        result["cached"] = False
+
+    return result
+
+
+class _Flight:
+    """An upstream call shared by every concurrent identical query."""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+# Upstream calls in flight keyed by (model ID, prompt)
+_in_flight: dict[tuple[str, str], _Flight] = {}
+
+
+async def _query_model(
+    query_fn: Callable[[str, float], Awaitable[ModelResponse]],
+    model_id: str,
+    prompt: str,
+    timeout: float,
+    use_retry: bool,
+    cache: "ResponseCache | None",
+    semaphore: asyncio.Semaphore | None = None,
+    hedge: bool = False,
+    metrics: "MetricsStore | None" = None,
+    coalesce: bool = True
+) -> ModelResponse:
+    """
+    Query one model, consulting the response cache and coalescing identical queries.
+
+    Concurrent queries for the same model and prompt share one upstream call
+    (single-flight): the first starts it, later ones wait on it and receive a
+    copy of its ModelResponse marked coalesced, failures included. Waiters
+    can be cancelled individually; the upstream call is only cancelled once
+    every waiter has gone. The first waiter's timeout, limits and hedging
+    apply to the shared call.
+
+    Args:
+        query_fn: Provider query function
+        model_id: Provider model identifier
+        prompt: Prompt to send
+        timeout: Time budget in seconds, retries included
+        use_retry: Whether to use retry logic with backoff
+        cache: Optional response cache consulted before the call and filled after it
+        semaphore: Optional cap on in-flight requests to this model
+        hedge: Fire a duplicate request when an attempt is slow
+        metrics: Optional store that records the call
+        coalesce: Share identical in-flight calls; streamed queries pass False
+                  since a late waiter would miss the chunks already sent
+
+    Returns:
+        ModelResponse for the model
+    """
+    if cache is not None:
+        cached = cache.get(model_id, prompt)
+        if cached is not None:
+            cached["attempts"] = 0
+            if metrics is not None:
+                metrics.record(model_id, len(prompt), cached)
+            return cached
+
+    fetch = _fetch_model(
+        query_fn, model_id, prompt, timeout, use_retry, cache, semaphore, hedge, metrics
+    )
+    if not coalesce:
+        return await fetch
+
+    key = (model_id, prompt)
+    flight = _in_flight.get(key)
+    # A flight left over from a finished event loop cannot be awaited from this one
+    leader = flight is None or flight.task.get_loop() is not asyncio.get_running_loop()
+    if leader:
+        flight = _Flight(asyncio.create_task(fetch))
+        _in_flight[key] = flight
+
+        def _land(_: asyncio.Task, flight: _Flight = flight) -> None:
+            if _in_flight.get(key) is flight:
+                del _in_flight[key]
+
+        flight.task.add_done_callback(_land)
+    else:
+        fetch.close()  # Never started; the shared call is used instead
+
+    flight.waiters += 1
+    try:
+        # Shielded so one waiter's cancellation does not cancel the others' call
+        result = await asyncio.shield(flight.task)
+    except asyncio.CancelledError:
+        flight.waiters -= 1
+        if flight.waiters == 0 and not flight.task.done():
+            if _in_flight.get(key) is flight:
+                del _in_flight[key]
+            flight.task.cancel()
+        raise
+    flight.waiters -= 1
+
+    if leader:
+        return result
+    shared = ModelResponse(**result)
+    shared["coalesced"] = True
+    shared["attempts"] = 0
+    if metrics is not None:
+        metrics.record(model_id, len(prompt), shared)
+    return shared
+
+
+def _task_to_response(task: asyncio.Task, model_name: str, deadline: float | None) -> ModelResponse:
+    """Convert a finished (or cancelled) fan-out task into a ModelResponse."""
+    if task.cancelled():
+        # Without a deadline, the fan-out itself was cancelled
+        error = ("Request cancelled" if deadline is None
+                 else f"Deadline of {deadline:g}s exceeded; request cancelled")
+        return ModelResponse(
+            model=model_name,
             content="",
             success=False,
-            error=f"Unexpected error: {str(openai_result)}",
-            response_time_ms=0
+            error=error,
+            response_time_ms=int((deadline or 0) * 1000)
         )
-
-    if isinstance(gemini_result, Exception):
-        gemini_result = ModelResponse(
-            model="Gemini 3 Pro",
+    if task.exception() is not None:
+        return ModelResponse(
+            model=model_name,
             content="",
             success=False,
-            error=f"Unexpected error: {str(gemini_result)}",
+            error=f"Unexpected error: {str(task.exception())}",
             response_time_ms=0
         )
+    return task.result()
+
+
+async def _wait_labelled(name: str, task: asyncio.Task) -> str:
+    """Wait for task without raising its outcome, then return its name."""
+    await asyncio.wait([task])
+    return name
 
-    return openai_result, gemini_result
+
+async def query_models_parallel(
+    prompt: str,
+    providers: list[Provider] | None = None,
+    timeout: float = DEFAULT_TIMEOUT_SECONDS,
+    use_retry: bool = True,
+    on_chunk: Callable[[str, str], None] | None = None,
+    cache: "ResponseCache | None" = None,
+    provider_limits: dict[str, asyncio.Semaphore] | None = None,
+    deadline: float | None = None,
+    hedge: bool = False,
+    on_result: Callable[[str, ModelResponse], None] | None = None,
+    metrics: "MetricsStore | None" = None
+) -> dict[str, ModelResponse]:
+    """
+    Query any number of models concurrently under one deadline and concurrency policy.
+
+    With a deadline, whatever has completed when the budget runs out is
+    returned and stragglers are cancelled, so callers can render a partial
+    result instead of blocking on the slowest provider. Unless streaming,
+    a model already being asked the same prompt by another caller is not
+    asked again; the in-flight call's response is shared (see _query_model).
+
+    Args:
+        prompt: Prompt sent to every model
+        providers: Providers to query (default: all registered)
+        timeout: Time budget in seconds per model, retries included; each
+                 attempt's timeout is sized from the model's latency history
+                 for this prompt size (see attempt_timeout)
+        use_retry: Whether to use retry logic with backoff
+        on_chunk: Optional callback (model_name, chunk) to stream all models
+        cache: Optional response cache consulted before each network call
+        provider_limits: Optional model ID -> semaphore capping in-flight requests
+        deadline: Optional overall latency budget in seconds, retries included
+        hedge: Fire a duplicate request when an attempt passes the provider's
+               observed p95 latency (ignored when streaming)
+        on_result: Optional callback (model_name, response) run as each model
+                   finishes, in completion order; models cut off by the
+                   deadline are reported last
+        metrics: Optional store that records every model call; its history
+                 also seeds the latency percentiles on first use
+
+    Returns:
+        Dict of model display name -> ModelResponse, in provider order
+    """
+    if providers is None:
+        providers = get_providers()
+    if on_chunk is not None:
+        # Duplicate requests would interleave two copies of the same stream
+        hedge = False
+    provider_limits = provider_limits or {}
+    if metrics is not None:
+        await _seed_latency_history(metrics, [provider["model_id"] for provider in providers])
+
+    tasks = {}
+    for provider in providers:
+        query_fn = provider["query_fn"]
+        if on_chunk is not None:
+            query_fn = partial(query_fn, on_chunk=partial(on_chunk, provider["name"]))
+        tasks[provider["name"]] = asyncio.create_task(_query_model(
+            query_fn, provider["model_id"], prompt, timeout, use_retry, cache,
+            provider_limits.get(provider["model_id"]), hedge, metrics, coalesce=on_chunk is None
+        ))
+
+    reported = set()
+
+    def _report(name: str) -> None:
+        reported.add(name)
+        if on_result is not None:
+            on_result(name, _task_to_response(tasks[name], name, deadline))
+
+    try:
+        labelled = [_wait_labelled(name, task) for name, task in tasks.items()]
+        for next_done in asyncio.as_completed(labelled, timeout=deadline):
+            _report(await next_done)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        # Cancel stragglers on deadline, or everything if we were cancelled ourselves
+        pending = [task for task in tasks.values() if not task.done()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    for name in tasks:
+        if name not in reported:
+            _report(name)
+
+    return {name: _task_to_response(task, name, deadline) for name, task in tasks.items()}
 
 
 def generate_prompt(original_task: str, context_summary: str = "") -> str:
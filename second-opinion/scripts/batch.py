@@ -0,0 +1,188 @@
+"""
+Bulk JSONL batch mode for the second-opinion skill.
+
+Reads one {"conversation_history": [...], "claude_response": "..."} record per
+line, runs up to `concurrency` records at once with separate per-provider
+in-flight caps, and writes one JSONL result per record as soon as it
+completes. Records are read lazily, so memory stays bounded by the
+concurrency limit rather than the input size.
+"""
+
+import asyncio
+import json
+from typing import TextIO
+
+from api_clients import DEFAULT_TIMEOUT_SECONDS, Provider
+from extract_context import DEFAULT_TOKEN_BUDGET
+from metrics_store import MetricsStore
+from pipeline import collect_second_opinion_async
+from response_cache import ResponseCache
+
+
+def _model_summary(response: dict) -> dict:
+    """Reduce a ModelResponse to the per-model fields written to batch output."""
+    return {
+        "success": response["success"],
+        "response_time_ms": response["response_time_ms"],
+        "first_token_ms": response.get("first_token_ms"),
+        "cached": response.get("cached", False),
+        "coalesced": response.get("coalesced", False),
+        "input_tokens": response.get("input_tokens"),
+        "output_tokens": response.get("output_tokens"),
+        "attempts": response.get("attempts"),
+        "error": response["error"],
+    }
+
+
+async def _process_record(
+    index: int,
+    line: str,
+    timeout: float,
+    cache: ResponseCache | None,
+    provider_limits: dict[str, asyncio.Semaphore],
+    deadline: float | None,
+    hedge: bool,
+    providers: list[Provider] | None,
+    token_budget: int | None,
+    metrics: MetricsStore | None
+) -> dict:
+    """Run one JSONL record through the second-opinion pipeline."""
+    result = {
+        "index": index,
+        "id": None,
+        "formatted": None,
+        "models": {},
+        "tokens_saved": 0,
+        "agreement": None,
+        "error": None,
+    }
+
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError as e:
+        result["error"] = f"Invalid JSON: {e}"
+        return result
+
+    if not isinstance(record, dict):
+        result["error"] = "Record must be a JSON object"
+        return result
+
+    result["id"] = record.get("id")
+    conversation_history = record.get("conversation_history", [])
+    claude_response = record.get("claude_response", "")
+    if not conversation_history or not claude_response:
+        result["error"] = "Record must contain 'conversation_history' and 'claude_response'"
+        return result
+
+    try:
+        outcome = await collect_second_opinion_async(
+            conversation_history,
+            claude_response,
+            timeout=timeout,
+            cache=cache,
+            provider_limits=provider_limits,
+            deadline=deadline,
+            hedge=hedge,
+            providers=providers,
+            token_budget=token_budget,
+            metrics=metrics
+        )
+    except Exception as e:
+        result["error"] = f"Unexpected error: {str(e)}"
+        return result
+
+    result["formatted"] = outcome["formatted"]
+    result["tokens_saved"] = outcome["tokens_saved"]
+    result["agreement"] = outcome["agreement"]
+    responses = outcome["responses"]
+    result["models"] = {model: _model_summary(response) for model, response in responses.items()}
+    if responses and not any(response["success"] for response in responses.values()):
+        result["error"] = "All models failed"
+    return result
+
+
+async def run_batch_async(
+    input_stream: TextIO,
+    output_stream: TextIO,
+    concurrency: int = 8,
+    provider_in_flight: dict[str, int] | None = None,
+    timeout: float = DEFAULT_TIMEOUT_SECONDS,
+    cache: ResponseCache | None = None,
+    deadline: float | None = None,
+    hedge: bool = False,
+    providers: list[Provider] | None = None,
+    token_budget: int | None = DEFAULT_TOKEN_BUDGET,
+    metrics: MetricsStore | None = None
+) -> dict:
+    """
+    Process JSONL records concurrently, streaming JSONL results as they complete.
+
+    Results are written in completion order; each carries the input line
+    index (and the record's "id" if present) for correlation.
+
+    Args:
+        input_stream: Text stream of JSONL records
+        output_stream: Text stream for JSONL results
+        concurrency: Maximum records in flight at once
+        provider_in_flight: Model ID -> maximum concurrent requests to that provider
+        timeout: Per-model time budget in seconds, retries included
+        cache: Optional response cache shared by all records
+        deadline: Optional per-record latency budget in seconds
+        hedge: Hedge attempts slower than the provider's observed p95
+        providers: Models to query (default: all registered providers)
+        token_budget: Token budget for each record's outgoing prompt (None disables)
+        metrics: Optional store that records every model call
+
+    Returns:
+        Dict with counts of processed and failed records
+
+    Raises:
+        ValueError: If concurrency or a provider limit is below 1
+    """
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+    for model_id, limit in (provider_in_flight or {}).items():
+        if limit < 1:
+            raise ValueError(f"In-flight limit for {model_id} must be at least 1, got {limit}")
+    provider_limits = {
+        model_id: asyncio.Semaphore(limit)
+        for model_id, limit in (provider_in_flight or {}).items()
+    }
+    stats = {"records": 0, "failed": 0}
+    pending: set[asyncio.Task] = set()
+
+    def _write(result: dict) -> None:
+        stats["records"] += 1
+        if result["error"]:
+            stats["failed"] += 1
+        output_stream.write(json.dumps(result) + "\n")
+        output_stream.flush()
+
+    async def _drain_one() -> None:
+        nonlocal pending
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            _write(task.result())
+
+    index = -1
+    while True:
+        # Read in a worker thread so a slow producer never stalls in-flight records
+        line = await asyncio.to_thread(input_stream.readline)
+        if not line:
+            break
+        index += 1
+        if not line.strip():
+            continue
+        if len(pending) >= concurrency:
+            await _drain_one()
+        pending.add(asyncio.create_task(
+            _process_record(
+                index, line, timeout, cache, provider_limits, deadline, hedge,
+                providers, token_budget, metrics
+            )
+        ))
+
+    while pending:
+        await _drain_one()
+
+    return stats
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Warm local daemon for the second-opinion skill.
+
+A standalone `python main.py` run pays for importing the HTTP stacks,
+creating an event loop and opening fresh TLS connections every time. The
+daemon keeps all of that alive between calls: it listens on a Unix socket and
+serves each request on one long-lived event loop, with the pooled clients,
+response cache, circuit breakers and latency history already warm. It exits
+after DEFAULT_IDLE_SECONDS without a request.
+
+main.py is the client (through daemon_client.run_remote), and starts the
+daemon on first use.
+
+Protocol, one connection per request:
+- client -> daemon: a JSON header line {"options": {...}}, then the raw input
+  JSON until the client shuts down its write side
+- daemon -> client: JSON lines, {"event": "output", "text": ...} and
+  {"event": "chunk", "model": ..., "text": ...} while the request runs, then
+  {"event": "done", "exit_code": ...}
+- A client that stops reading long enough to fill MAX_QUEUED_MESSAGES is
+  disconnected; its request still runs to completion (and is cached)
+
+Usage:
+    python daemon.py                  # serve in the foreground
+    python daemon.py --stop           # ask the running daemon to exit
+"""
+
+import argparse
+import asyncio
+import codecs
+import fcntl
+import json
+import os
+import signal
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+from daemon_client import DEFAULT_IDLE_SECONDS, READ_CHUNK_BYTES, socket_path, stop
+
+
+IDLE_CHECK_SECONDS = 5.0
+# Messages queued for one client; a client this far behind has stopped reading and is dropped
+MAX_QUEUED_MESSAGES = 1000
+
+
+class _SocketTextReader:
+    """Blocking text reader over an asyncio StreamReader, for use from a worker thread."""
+
+    def __init__(self, reader: asyncio.StreamReader, loop: asyncio.AbstractEventLoop):
+        self._reader = reader
+        self._loop = loop
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+
+    def read(self, size: int = READ_CHUNK_BYTES) -> str:
+        while True:
+            data = asyncio.run_coroutine_threadsafe(self._reader.read(size), self._loop).result()
+            text = self._decoder.decode(data, final=not data)
+            # A read ending inside a multi-byte character decodes to nothing yet
+            if text or not data:
+                return text
+
+
+class _DaemonState:
+    """Process-wide state shared by every connection."""
+
+    def __init__(self, idle_seconds: float):
+        self.idle_seconds = idle_seconds
+        self.active = 0
+        self.last_active = time.monotonic()
+        self.stopping = asyncio.Event()
+        self.cache = None
+        self.metrics = None
+
+
+async def _serve_request(
+    options: dict,
+    reader: asyncio.StreamReader,
+    send: Callable[[dict], None]
+) -> int:
+    """Run one second-opinion request, sending output events; return its exit code."""
+    from api_clients import get_providers
+    from extract_context import load_conversation_input
+    from pipeline import collect_second_opinion_async
+
+    def _output(text: str) -> None:
+        send({"event": "output", "text": text})
+
+    try:
+        providers = get_providers(options["models"]) if options.get("models") else get_providers()
+    except KeyError as e:
+        _output(f"ERROR: {e.args[0]}\n")
+        return 1
+
+    stream = _SocketTextReader(reader, asyncio.get_running_loop())
+    try:
+        input_data = await asyncio.to_thread(load_conversation_input, stream)
+    except json.JSONDecodeError as e:
+        _output(f"ERROR: Invalid JSON input: {e}\n")
+        return 1
+
+    conversation_history = input_data.get("conversation_history", [])
+    claude_response = input_data.get("claude_response", "")
+    if not conversation_history or not claude_response:
+        _output("ERROR: JSON input must contain 'conversation_history' and 'claude_response'\n")
+        return 1
+
+    on_chunk = None
+    if options.get("stream"):
+        def on_chunk(model: str, chunk: str) -> None:
+            send({"event": "chunk", "model": model, "text": chunk})
+
+    result = await collect_second_opinion_async(
+        conversation_history,
+        claude_response,
+        on_chunk=on_chunk,
+        cache=None if options.get("no_cache") else _state.cache,
+        deadline=options.get("deadline"),
+        hedge=options.get("hedge", False),
+        providers=providers,
+        token_budget=options.get("token_budget"),
+        on_output=None if options.get("buffered") else _output,
+        metrics=None if options.get("no_metrics") else _state.metrics
+    )
+    if options.get("buffered"):
+        _output(result["formatted"])
+    return 0
+
+
+async def _handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    _state.active += 1
+    outbox: asyncio.Queue[dict | None] = asyncio.Queue(MAX_QUEUED_MESSAGES)
+
+    def send(message: dict) -> None:
+        if writer.is_closing():
+            return
+        try:
+            outbox.put_nowait(message)
+        except asyncio.QueueFull:
+            # Buffering for a client that is not reading would grow without bound
+            writer.transport.abort()
+
+    async def _write_messages() -> None:
+        # Drain after every message, so a slow client backs up the bounded queue
+        # rather than the transport's unbounded write buffer
+        while (message := await outbox.get()) is not None:
+            if writer.is_closing():
+                continue
+            writer.write(json.dumps(message).encode("utf-8") + b"\n")
+            try:
+                await writer.drain()
+            except ConnectionError:
+                writer.close()
+
+    sender = asyncio.create_task(_write_messages())
+    try:
+        header = json.loads(await reader.readline() or b"{}")
+        if header.get("command") == "shutdown":
+            _state.stopping.set()
+            exit_code = 0
+        else:
+            try:
+                exit_code = await _serve_request(header.get("options", {}), reader, send)
+            except Exception as e:
+                send({"event": "output", "text": f"ERROR: Daemon request failed: {e}\n"})
+                exit_code = 1
+        # A request rejected early leaves input unread; closing with it unread would
+        # reset the connection while the client is still sending, losing the error
+        while await reader.read(READ_CHUNK_BYTES):
+            pass
+        send({"event": "done", "exit_code": exit_code})
+        if not writer.is_closing():
+            await outbox.put(None)
+            await sender
+    except (ConnectionError, json.JSONDecodeError):
+        pass  # Client went away or spoke garbage; nothing to report back
+    finally:
+        sender.cancel()
+        _state.active -= 1
+        _state.last_active = time.monotonic()
+        writer.close()
+
+
+async def _watch_idle() -> None:
+    while not _state.stopping.is_set():
+        await asyncio.sleep(min(_state.idle_seconds, IDLE_CHECK_SECONDS))
+        if _state.active == 0 and time.monotonic() - _state.last_active >= _state.idle_seconds:
+            _state.stopping.set()
+
+
+_state: _DaemonState
+
+
+async def serve(path: Path, idle_seconds: float = DEFAULT_IDLE_SECONDS) -> None:
+    """
+    Serve requests on a Unix socket until idle for idle_seconds or stopped.
+
+    Only one daemon serves a given socket: a lock file next to it is held
+    for the daemon's lifetime, and a second daemon exits immediately.
+
+    Args:
+        path: Socket path to listen on
+        idle_seconds: Exit after this long without a request
+    """
+    global _state
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lock_file = open(path.with_suffix(".lock"), "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return
+
+    # Warm up the pipeline before accepting connections
+    from api_clients import close_clients
+    from metrics_store import MetricsStore
+    from response_cache import ResponseCache
+    import pipeline  # noqa: F401
+
+    _state = _DaemonState(idle_seconds)
+    _state.cache = ResponseCache()
+    _state.metrics = MetricsStore()
+
+    # Requests run with this user's API keys, so keep the socket private
+    os.umask(0o077)
+    path.unlink(missing_ok=True)  # Left behind by a daemon that crashed
+    server = await asyncio.start_unix_server(_handle_connection, path=str(path))
+
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, _state.stopping.set)
+    watcher = asyncio.create_task(_watch_idle())
+
+    try:
+        await _state.stopping.wait()
+    finally:
+        watcher.cancel()
+        server.close()
+        await server.wait_closed()
+        await close_clients()
+        _state.metrics.close()
+        path.unlink(missing_ok=True)
+        lock_file.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Warm daemon for the second-opinion skill")
+    parser.add_argument(
+        "--socket",
+        metavar="PATH",
+        help="Socket to listen on (default: derived from the environment, see socket_path())"
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=DEFAULT_IDLE_SECONDS,
+        metavar="SECONDS",
+        help=f"Exit after this long without a request (default: {DEFAULT_IDLE_SECONDS})"
+    )
+    parser.add_argument(
+        "--stop",
+        action="store_true",
+        help="Ask the daemon for the current environment to exit"
+    )
+    args = parser.parse_args()
+
+    if args.socket:
+        os.environ["SECOND_OPINION_SOCKET"] = args.socket
+    if args.stop:
+        if not stop():
+            print("No daemon running", file=sys.stderr)
+            return 1
+        return 0
+
+    asyncio.run(serve(socket_path(), args.idle_timeout))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
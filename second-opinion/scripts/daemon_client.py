@@ -0,0 +1,183 @@
+"""
+Client side of the warm second-opinion daemon (see daemon.py).
+
+Only the standard library is imported here, so a thin caller like main.py
+can reach a running daemon without paying for the HTTP stacks or an event
+loop. The socket name carries a fingerprint of the provider environment and
+of the script sources, so a changed API key or an upgraded skill gets a
+fresh daemon instead of a stale one (the old daemon idles out).
+"""
+
+import hashlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import BinaryIO, Callable
+
+
+DEFAULT_RUNTIME_DIR = "~/.cache/second-opinion"
+DEFAULT_IDLE_SECONDS = 600
+STARTUP_TIMEOUT_SECONDS = 10.0
+READ_CHUNK_BYTES = 64 * 1024
+
+# Environment that changes what the daemon would do; part of the socket name
+FINGERPRINT_ENV_PREFIXES = ("OPENAI_", "GEMINI_", "SECOND_OPINION_")
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+DAEMON_SCRIPT = SCRIPTS_DIR / "daemon.py"
+
+
+class DaemonUnavailable(Exception):
+    """The daemon could not be reached or started."""
+
+
+def _fingerprint() -> str:
+    """Hash the provider environment and script sources into a short ID."""
+    digest = hashlib.sha256()
+    for name in sorted(os.environ):
+        if name.startswith(FINGERPRINT_ENV_PREFIXES) and name != "SECOND_OPINION_SOCKET":
+            digest.update(f"{name}={os.environ[name]}\0".encode("utf-8"))
+    for source in sorted(SCRIPTS_DIR.glob("*.py")):
+        stat = source.stat()
+        digest.update(f"{source.name}:{stat.st_mtime_ns}:{stat.st_size}\0".encode("utf-8"))
+    digest.update(sys.executable.encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def socket_path() -> Path:
+    """Return the daemon socket for the current environment ($SECOND_OPINION_SOCKET overrides)."""
+    override = os.getenv("SECOND_OPINION_SOCKET")
+    if override:
+        return Path(override).expanduser()
+    return Path(DEFAULT_RUNTIME_DIR).expanduser() / f"daemon-{_fingerprint()}.sock"
+
+
+def _try_connect(path: Path) -> socket.socket | None:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(path))
+    except (FileNotFoundError, ConnectionRefusedError):
+        sock.close()
+        return None
+    return sock
+
+
+def _spawn(path: Path, idle_seconds: float) -> Path:
+    """Start a detached daemon for path and return its log file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    log_path = path.with_suffix(".log")
+    with open(log_path, "ab") as log:
+        subprocess.Popen(
+            [sys.executable, str(DAEMON_SCRIPT),
+             "--socket", str(path), "--idle-timeout", str(idle_seconds)],
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=log,
+            start_new_session=True,
+        )
+    return log_path
+
+
+def connect(autostart: bool = True, idle_seconds: float = DEFAULT_IDLE_SECONDS) -> socket.socket:
+    """
+    Connect to the daemon, starting it first if it is not running.
+
+    Args:
+        autostart: Spawn a daemon when none is listening
+        idle_seconds: Idle timeout for a newly spawned daemon
+
+    Returns:
+        A connected socket
+
+    Raises:
+        DaemonUnavailable: If Unix sockets are unsupported or the daemon
+            does not come up within STARTUP_TIMEOUT_SECONDS
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        raise DaemonUnavailable("Unix sockets are not supported on this platform")
+
+    path = socket_path()
+    sock = _try_connect(path)
+    if sock is not None:
+        return sock
+    if not autostart:
+        raise DaemonUnavailable(f"No daemon listening on {path}")
+
+    log_path = _spawn(path, idle_seconds)
+    give_up_at = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+    while time.monotonic() < give_up_at:
+        time.sleep(0.02)
+        sock = _try_connect(path)
+        if sock is not None:
+            return sock
+    raise DaemonUnavailable(
+        f"Daemon did not start within {STARTUP_TIMEOUT_SECONDS:.0f}s (see {log_path})"
+    )
+
+
+def run_remote(
+    input_stream: BinaryIO,
+    options: dict,
+    on_output: Callable[[str], None],
+    on_chunk: Callable[[str, str], None] | None = None,
+    autostart: bool = True
+) -> int:
+    """
+    Forward one request to the daemon and relay its output.
+
+    The daemon is reached before any input is read, so on DaemonUnavailable
+    the caller can still run the request in-process.
+
+    Args:
+        input_stream: Binary stream with the request JSON (usually stdin)
+        options: Request options (models, deadline, hedge, token_budget,
+                 no_cache, stream, buffered)
+        on_output: Callback receiving the report piece by piece
+        on_chunk: Optional callback (model_name, chunk) for streamed output
+        autostart: Spawn a daemon when none is listening
+
+    Returns:
+        Exit code for the request
+
+    Raises:
+        DaemonUnavailable: If the daemon cannot be reached or started
+        ConnectionError: If the connection drops mid-request
+    """
+    with connect(autostart) as sock:
+        sock.sendall(json.dumps({"options": options}).encode("utf-8") + b"\n")
+        try:
+            while chunk := input_stream.read(READ_CHUNK_BYTES):
+                sock.sendall(chunk)
+            sock.shutdown(socket.SHUT_WR)
+        except (BrokenPipeError, ConnectionResetError):
+            # The daemon stopped reading, normally after rejecting the request;
+            # its error is still waiting to be read below
+            pass
+
+        with sock.makefile("rb") as replies:
+            for line in replies:
+                message = json.loads(line)
+                if message["event"] == "output":
+                    on_output(message["text"])
+                elif message["event"] == "chunk" and on_chunk:
+                    on_chunk(message["model"], message["text"])
+                elif message["event"] == "done":
+                    return message["exit_code"]
+    raise ConnectionError("Daemon closed the connection before the request finished")
+
+
+def stop() -> bool:
+    """Ask the running daemon to exit; return False if none is listening."""
+    try:
+        sock = connect(autostart=False)
+    except DaemonUnavailable:
+        return False
+    with sock:
+        sock.sendall(json.dumps({"command": "shutdown"}).encode("utf-8") + b"\n")
+        sock.shutdown(socket.SHUT_WR)
+        sock.recv(READ_CHUNK_BYTES)
+    return True
@@ -2,12 +2,138 @@
 Context extraction module for the second-opinion skill.
 
 Extracts the original task, Claude's response, and determines
-content type and length from conversation history.
+content type and length from conversation history. Also compacts the
+task and response to a token budget before they are sent to other models.
 """
 
 import json
 import re
-from typing import TypedDict
+from typing import Iterable, TextIO, TypedDict
+
+
+# Rough characters-per-token ratio for English prose and code
+CHARS_PER_TOKEN = 4
+
+# Default token budget for the task plus Claude's response in the outgoing prompt
+DEFAULT_TOKEN_BUDGET = 32000
+
+# Share of the budget reserved for the task; unused budget flows to the response
+TASK_BUDGET_SHARE = 0.4
+
+# Share of a trimmed text kept from its head; the rest comes from its tail
+HEAD_WINDOW_SHARE = 0.6
+
+# User messages longer than this are preferred as the original task
+MIN_TASK_CHARS = 20
+
+# Read size for streamed stdin input; grows while a single value spans many reads
+STREAM_CHUNK_CHARS = 64 * 1024
+
+_CODE_BLOCK_PATTERN = re.compile(r"```[^\n]*\n.*?```", re.DOTALL)
+_BLANK_LINES_PATTERN = re.compile(r"\n{3,}")
+_TRAILING_SPACE_PATTERN = re.compile(r"[ \t]+\n")
+_NUMBER_TAIL_PATTERN = re.compile(r"[0-9eE.+-]*")
+
+
+# Content type markers: category -> {marker: weight}, matched as whole words
+# in lowercased text. Categories are listed in tie-break order.
+CONTENT_TYPE_MARKERS = {
+    'code': {
+        '```': 3, 'def': 3, 'class': 3, 'function': 2, 'import': 2, 'from': 2,
+        'await': 1, 'async': 1,
+    },
+    'creative': {
+        'poem': 3, 'poems': 3, 'story': 3, 'stories': 3,
+        'draft': 2, 'drafts': 2, 'drafted': 2, 'compose': 2, 'composed': 2,
+        'email': 2, 'emails': 2,
+        'write': 1, 'writes': 1, 'writing': 1, 'written': 1, 'post': 1, 'posts': 1,
+        'letter': 1, 'letters': 1,
+    },
+    'strategic': {
+        'strategy': 3, 'strategies': 3, 'best practice': 3, 'best practices': 3,
+        'recommend': 2, 'recommends': 2, 'recommended': 2, 'recommendation': 2,
+        'recommendations': 2, 'decision': 2, 'decisions': 2,
+        'approach': 1, 'approaches': 1, 'plan': 1, 'plans': 1, 'should': 1,
+    },
+    'analysis': {
+        'analyze': 2, 'analyse': 2, 'analysis': 2, 'breakdown': 2, 'comparison': 2,
+        'evaluate': 2, 'evaluation': 2, 'assessment': 2,
+        'explain': 1, 'explains': 1, 'explained': 1, 'explanation': 1,
+    },
+}
+
+# Code keywords only count in code-like context ("def name(" rather than prose
+# "def"): word contexts start at a word boundary, line contexts start a line
+_CODE_WORD_CONTEXTS = {
+    'def': r"def \w+\s*\(",
+    'class': r"class \w+\s*(?:[:({<]|extends\b|implements\b)",
+    'function': r"function\s*\w*\s*\(",
+    'await': r"await \w",
+    'async': r"async def\b",
+}
+_CODE_LINE_CONTEXTS = {
+    'import': r"import [\w.]+",
+    'from': r"from [\w.]+ import\b",
+}
+
+_CODE_KEYWORD_PATTERN = re.compile(r"\s*(```|\w+)")
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """
+    Build a regex alternation of words factored by common prefix.
+
+    Python's re tries alternatives one by one, so sharing prefixes
+    ("recommend|recommends|..." -> "recommend(?:s|ed|...)?") cuts the work
+    per text position.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def _build(node: dict) -> str:
+        branches = [re.escape(char) + _build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return _build(trie)
+
+
+def _compile_markers() -> tuple[re.Pattern, dict[str, tuple[str, int]]]:
+    """Combine every marker into one pattern and map each marker to (category, weight)."""
+    weights = {
+        marker: (category, weight)
+        for category, markers in CONTENT_TYPE_MARKERS.items()
+        for marker, weight in markers.items()
+    }
+    words = [
+        marker for marker in weights
+        if marker != '```' and marker not in _CODE_WORD_CONTEXTS and marker not in _CODE_LINE_CONTEXTS
+    ]
+    # A single leading \b shared by every word alternative is ~3x faster than one per alternative
+    word_alternatives = [_trie_pattern(words) + r"\b", *_CODE_WORD_CONTEXTS.values()]
+    pattern = (
+        "```"
+        + r"|\b(?:" + "|".join(word_alternatives) + ")"
+        + r"|(?m:^)[ \t]*(?:" + "|".join(_CODE_LINE_CONTEXTS.values()) + ")"
+    )
+    return re.compile(pattern), weights
+
+
+_CONTENT_MARKER_PATTERN, _MARKER_WEIGHTS = _compile_markers()
+
+
+class CompactedContext(TypedDict):
+    """Task and response after token-budgeted compaction."""
+    original_task: str
+    claude_response: str
+    tokens_before: int
+    tokens_after: int
 
 
 class ExtractedContext(TypedDict):
@@ -19,31 +145,33 @@ class ExtractedContext(TypedDict):
     word_count: int
 
 
-def classify_content_type(text: str) -> str:
-    """Classify the type of content based on characteristics."""
-    text_lower = text.lower()
+def content_type_scores(text: str) -> dict[str, int]:
+    """Return the weighted marker score of every content category in one scan of text."""
+    scores = dict.fromkeys(CONTENT_TYPE_MARKERS, 0)
+    for marker in _CONTENT_MARKER_PATTERN.findall(text.lower()):
+        if marker not in _MARKER_WEIGHTS:
+            # Code markers match with context ("def name("); key them by keyword
+            marker = _CODE_KEYWORD_PATTERN.match(marker).group(1)
+        category, weight = _MARKER_WEIGHTS[marker]
+        scores[category] += weight
+    return scores
 
-    # Check for code indicators
-    if any(pattern in text for pattern in ['```', 'def ', 'class ', 'function ', 'import ', 'async ', 'await ']):
-        return 'code'
 
-    # Check for creative content indicators
-    creative_markers = ['draft', 'write', 'compose', 'post', 'email', 'letter', 'story', 'poem']
-    if any(marker in text_lower for marker in creative_markers):
-        return 'creative'
+def classify_content_type(text: str) -> str:
+    """
+    Classify the type of content based on characteristics.
 
-    # Check for strategic/advisory indicators
-    strategic_markers = ['recommend', 'strategy', 'approach', 'decision', 'plan', 'should', 'best practice']
-    if any(marker in text_lower for marker in strategic_markers):
-        return 'strategic'
+    The highest-scoring category wins, ties going to the earlier category in
+    CONTENT_TYPE_MARKERS; text with no markers is 'qa'.
+    """
+    scores = content_type_scores(text)
+    best = max(scores, key=scores.get)
+    return best if scores[best] > 0 else 'qa'
 
-    # Check for analysis indicators
-    analysis_markers = ['analyze', 'explain', 'breakdown', 'comparison', 'evaluate', 'assessment']
-    if any(marker in text_lower for marker in analysis_markers):
-        return 'analysis'
 
-    # Default to Q&A
-    return 'qa'
+def classify_content_types(texts: Iterable[str]) -> list[str]:
+    """Classify many texts; equivalent to classify_content_type on each."""
+    return [classify_content_type(text) for text in texts]
 
 
 def categorize_length(word_count: int) -> str:
@@ -62,6 +190,123 @@ def count_words(text: str) -> int:
     return len(words)
 
 
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of text (about 4 characters per token)."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _normalize_whitespace(text: str) -> str:
+    """Strip trailing spaces and collapse runs of blank lines outside fenced code blocks."""
+    parts = []
+    prose_start = 0
+    for match in _CODE_BLOCK_PATTERN.finditer(text):
+        prose = _TRAILING_SPACE_PATTERN.sub("\n", text[prose_start:match.start()])
+        parts.append(_BLANK_LINES_PATTERN.sub("\n\n", prose))
+        parts.append(match.group(0))
+        prose_start = match.end()
+    prose = _TRAILING_SPACE_PATTERN.sub("\n", text[prose_start:])
+    parts.append(_BLANK_LINES_PATTERN.sub("\n\n", prose))
+    return "".join(parts).strip()
+
+
+def dedupe_code_blocks(text: str) -> str:
+    """Replace repeated identical fenced code blocks with a short reference."""
+    seen = set()
+
+    def _replace(match: re.Match) -> str:
+        block = match.group(0)
+        if block in seen:
+            return "```\n[duplicate of a code block above, omitted]\n```"
+        seen.add(block)
+        return block
+
+    return _CODE_BLOCK_PATTERN.sub(_replace, text)
+
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Trim text to roughly max_tokens, keeping a head and a tail window.
+
+    Cuts are snapped to line boundaries where possible and the omitted
+    middle is replaced by a marker stating how much was dropped.
+
+    Args:
+        text: Text to trim
+        max_tokens: Token budget for the result
+
+    Returns:
+        The original text if within budget, otherwise head + marker + tail
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    max_chars = max(0, max_tokens * CHARS_PER_TOKEN)
+    head_chars = int(max_chars * HEAD_WINDOW_SHARE)
+    tail_chars = max_chars - head_chars
+
+    head_end = text.rfind("\n", 0, head_chars)
+    if head_end < head_chars // 2:
+        head_end = head_chars
+    tail_start = text.find("\n", len(text) - tail_chars)
+    if tail_start == -1 or tail_start - (len(text) - tail_chars) > tail_chars // 2:
+        tail_start = len(text) - tail_chars
+
+    omitted = estimate_tokens(text[head_end:tail_start])
+    return (
+        f"{text[:head_end].rstrip()}\n\n"
+        f"[... {omitted} tokens omitted ...]\n\n"
+        f"{text[tail_start:].lstrip()}"
+    )
+
+
+def compact_context(
+    original_task: str,
+    claude_response: str,
+    token_budget: int = DEFAULT_TOKEN_BUDGET
+) -> CompactedContext:
+    """
+    Compact the task and Claude's response to fit a token budget.
+
+    Texts that already fit are returned unchanged. Otherwise whitespace
+    outside fenced code blocks is normalized and repeated code blocks are
+    deduplicated first; if still over budget, head/tail windows of each
+    text are kept. The task gets up to TASK_BUDGET_SHARE of the budget and
+    any share it does not need goes to the response.
+
+    Args:
+        original_task: The user task sent to the other models
+        claude_response: Claude's response sent as context
+        token_budget: Token budget for both texts together
+
+    Returns:
+        CompactedContext with the compacted texts and token counts
+    """
+    tokens_before = estimate_tokens(original_task) + estimate_tokens(claude_response)
+    if tokens_before <= token_budget:
+        # Whitespace can be meaningful (Markdown hard breaks, YAML, diffs), so
+        # nothing is rewritten unless it has to be
+        return CompactedContext(
+            original_task=original_task,
+            claude_response=claude_response,
+            tokens_before=tokens_before,
+            tokens_after=tokens_before
+        )
+
+    task = _normalize_whitespace(dedupe_code_blocks(original_task))
+    response = _normalize_whitespace(dedupe_code_blocks(claude_response))
+
+    task_budget = int(token_budget * TASK_BUDGET_SHARE)
+    task = trim_to_tokens(task, task_budget)
+    response = trim_to_tokens(response, token_budget - estimate_tokens(task))
+
+    return CompactedContext(
+        original_task=task,
+        claude_response=response,
+        tokens_before=tokens_before,
+        tokens_after=estimate_tokens(task) + estimate_tokens(response)
+    )
+
+
 def extract_context(conversation_history: list, last_claude_message: str) -> ExtractedContext:
     """
     Extract context from conversation history and Claude's last response.
@@ -77,7 +322,7 @@ def extract_context(conversation_history: list, last_claude_message: str) -> Ext
     # Find the original user task (usually the first or most recent substantive user message)
     original_task = ""
     for msg in reversed(conversation_history):
-        if msg.get('role') == 'user' and len(msg.get('content', '')) > 20:
+        if msg.get('role') == 'user' and len(msg.get('content', '')) > MIN_TASK_CHARS:
             original_task = msg.get('content', '')
             break
 
@@ -126,3 +371,175 @@ def extract_from_json(conversation_json: str, last_claude_message: str) -> Extra
             response_length=categorize_length(count_words(last_claude_message)),
             word_count=count_words(last_claude_message)
         )
+
+
+class _StreamScanner:
+    """Reads consecutive JSON values from a text stream without loading all of it."""
+
+    def __init__(self, stream: TextIO, chunk_chars: int):
+        self._stream = stream
+        self._chunk_chars = chunk_chars
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        # Input dropped from the front of the buffer, for error positions
+        self._dropped_chars = 0
+        self._dropped_lines = 0
+        self._dropped_line_chars = 0  # Characters of the current line already dropped
+
+    def _fill(self, min_chars: int = 0) -> bool:
+        """Drop consumed input and append at least one more read; False at EOF."""
+        if self._eof:
+            return False
+        dropped = self._buffer[:self._pos]
+        self._dropped_chars += len(dropped)
+        newlines = dropped.count("\n")
+        if newlines:
+            self._dropped_lines += newlines
+            self._dropped_line_chars = len(dropped) - dropped.rfind("\n") - 1
+        else:
+            self._dropped_line_chars += len(dropped)
+        self._buffer = self._buffer[self._pos:]
+        self._pos = 0
+        data = self._stream.read(max(self._chunk_chars, min_chars))
+        if not data:
+            self._eof = True
+            return False
+        self._buffer += data
+        return True
+
+    def error(self, message: str, pos: int | None = None) -> json.JSONDecodeError:
+        """Build a decode error at a buffer position (default: the current one), located in the whole input."""
+        pos = self._pos if pos is None else pos
+        error = json.JSONDecodeError(message, self._buffer, pos)
+        last_newline = self._buffer.rfind("\n", 0, pos)
+        error.pos = self._dropped_chars + pos
+        error.lineno = self._dropped_lines + self._buffer.count("\n", 0, pos) + 1
+        error.colno = pos - last_newline if last_newline != -1 else self._dropped_line_chars + pos + 1
+        error.args = (f"{message}: line {error.lineno} column {error.colno} (char {error.pos})",)
+        return error
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it ('' at EOF)."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        """Consume char as the next non-whitespace character."""
+        if self.peek() != char:
+            raise self.error(f"Expecting '{char}'")
+        self._pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as e:
+                # Probably cut off mid-value: read at least as much again so a value
+                # spanning many reads is re-scanned a logarithmic number of times
+                offset = e.pos - self._pos  # _fill moves the buffer start even at EOF
+                if self._fill(len(self._buffer) - self._pos):
+                    continue
+                raise self.error(e.msg, self._pos + offset) from None
+            # A number running to the buffer edge (e.g. "1e" of "1e5") may continue in the next read
+            is_number = isinstance(value, (int, float)) and not isinstance(value, bool)
+            if is_number and _NUMBER_TAIL_PATTERN.fullmatch(self._buffer, end) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+
+def _read_task_candidates(scanner: _StreamScanner) -> list:
+    """
+    Decode a history array one message at a time, keeping only possible tasks.
+
+    Keeps the last substantive user message and the last non-empty user
+    message (in their original order), which is all extract_context reads.
+    If there are neither, the final message is kept so a non-empty history
+    stays non-empty.
+    """
+    scanner.expect("[")
+    substantive = latest = final = None
+    index = 0
+    if scanner.peek() == "]":
+        scanner.expect("]")
+        return []
+
+    while True:
+        msg = scanner.value()
+        final = (index, msg)
+        is_user = isinstance(msg, dict) and msg.get('role') == 'user'
+        content = msg.get('content') if is_user else None
+        if isinstance(content, (str, list)) and content:
+            latest = (index, msg)
+            if len(content) > MIN_TASK_CHARS:
+                substantive = (index, msg)
+        index += 1
+
+        if scanner.peek() == ",":
+            scanner.expect(",")
+        else:
+            scanner.expect("]")
+            break
+
+    kept = dict(candidate for candidate in (substantive, latest) if candidate is not None)
+    if not kept and final is not None:
+        kept = dict([final])
+    return [kept[position] for position in sorted(kept)]
+
+
+def load_conversation_input(stream: TextIO, chunk_chars: int = STREAM_CHUNK_CHARS) -> dict:
+    """
+    Read a {"conversation_history": [...], "claude_response": "..."} document from a stream.
+
+    The history is decoded one message at a time and only the messages
+    extract_context could pick as the task are kept, so memory is bounded by
+    the largest single message rather than the whole transcript. Other
+    top-level keys are parsed and discarded.
+
+    Args:
+        stream: Text stream containing one JSON object
+        chunk_chars: Characters per read
+
+    Returns:
+        Dict with the reduced "conversation_history" and "claude_response" (when present)
+
+    Raises:
+        json.JSONDecodeError: If the input is not a valid JSON object
+    """
+    scanner = _StreamScanner(stream, chunk_chars)
+    document = {}
+
+    scanner.expect("{")
+    if scanner.peek() == "}":
+        scanner.expect("}")
+    else:
+        while True:
+            key = scanner.value()
+            if not isinstance(key, str):
+                raise scanner.error("Expecting property name")
+            scanner.expect(":")
+            if key == "conversation_history" and scanner.peek() == "[":
+                document[key] = _read_task_candidates(scanner)
+            else:
+                value = scanner.value()
+                if key == "claude_response":
+                    document[key] = value
+
+            if scanner.peek() == ",":
+                scanner.expect(",")
+            else:
+                scanner.expect("}")
+                break
+
+    if scanner.peek():
+        raise scanner.error("Extra data")
+    return document
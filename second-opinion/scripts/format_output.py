@@ -26,39 +26,88 @@ def _format_error_notice(errors: dict) -> str:
     return notice
 
 
-def _format_timing_info(response_times: dict) -> str:
+def _format_network_phases(network_phases: dict) -> str:
+    """Format per-model network phase breakdowns, one line per model."""
+    lines = ""
+    for model, phases in network_phases.items():
+        if not phases:
+            continue
+        parts = [f"{phase} {_format_response_time(ms) if ms else '0ms'}" for phase, ms in phases.items()]
+        lines += f"*Network ({model}): {' · '.join(parts)}*\n"
+    return lines
+
+
+def _format_timing_info(
+    response_times: dict,
+    first_token_times: dict | None = None,
+    cache_hits: dict | None = None,
+    network_phases: dict | None = None
+) -> str:
     """Format response timing information."""
     if not response_times:
         return ""
 
+    first_token_times = first_token_times or {}
+    cache_hits = cache_hits or {}
     times = []
     for model, ms in response_times.items():
-        times.append(f"{model}: {_format_response_time(ms)}")
+        if cache_hits.get(model) and ms == 0:
+            entry = f"{model}: <1ms"
+        else:
+            entry = f"{model}: {_format_response_time(ms)}"
+        if first_token_times.get(model):
+            entry += f" (first token {_format_response_time(first_token_times[model])})"
+        if model in cache_hits:
+            entry += " (cache hit)" if cache_hits[model] else " (cache miss)"
+        times.append(entry)
+
+    output = f"\n*Response times: {' | '.join(times)}*\n"
+    if network_phases:
+        output += _format_network_phases(network_phases)
+    return output
 
-    return f"\n*Response times: {' | '.join(times)}*\n"
 
+def _format_compaction_info(compaction: dict) -> str:
+    """Format how many prompt tokens compaction saved."""
+    saved = compaction["tokens_before"] - compaction["tokens_after"]
+    if saved <= 0:
+        return ""
+    return (
+        f"*Prompt compacted: ~{compaction['tokens_before']:,} → "
+        f"~{compaction['tokens_after']:,} tokens ({saved:,} saved per model)*\n"
+    )
+
+
+def _format_agreement(agreement: dict) -> str:
+    """Format the pairwise agreement matrix and the divergent sections."""
+    models = agreement["models"]
+    output = "\n## Agreement\n\n"
+    output += "*Word overlap between responses (1.00 = same wording, not necessarily same conclusions)*\n\n"
+    output += "| | " + " | ".join(models) + " |\n"
+    output += "|---" * (len(models) + 1) + "|\n"
+    for model, row in zip(models, agreement["matrix"]):
+        cells = ["—" if other == model else f"{score:.2f}" for other, score in zip(models, row)]
+        output += f"| **{model}** | " + " | ".join(cells) + " |\n"
+
+    divergent = agreement["divergent_sections"]
+    if divergent:
+        output += "\n**Divergent sections** (little counterpart in the other responses; compare these first):\n\n"
+        for section in divergent:
+            output += f"- **{section['model']}**: \"{section['heading']}\" (support {section['support']:.2f})\n"
+    return output
 
-def format_responses(
-    claude_response: str,
-    chatgpt_response: str | None,
-    gemini_response: str | None,
-    original_task: str,
-    response_times: dict | None = None,
-    errors: dict | None = None
-) -> str:
+
+def format_header(original_task: str, claude_response: str, errors: dict | None = None) -> str:
     """
-    Format all responses for Claude to analyze.
+    Format the task and Claude's response, the part of the report known before any model answers.
 
     Args:
-        claude_response: Claude's original response
-        chatgpt_response: ChatGPT's response (None if failed)
-        gemini_response: Gemini's response (None if failed)
         original_task: The original user task
-        response_times: Dict of model -> response time in ms
-        errors: Dict of model -> error message for failures
+        claude_response: Claude's original response
+        errors: Dict of model -> error message for failures, noted under the task
 
     Returns:
-        Formatted markdown string for Claude to analyze
+        Markdown for the top of the report
     """
     output = """# Second Opinion Results
 
@@ -78,51 +127,133 @@ def format_responses(
 
 """
     output += claude_response + "\n"
+    return output
 
-    output += """
----
 
-## GPT-5.2 Pro's Response
+def format_model_section(model: str, response: str | None, error: str | None = None) -> str:
+    """
+    Format one external model's response.
 
-"""
-    if chatgpt_response:
-        output += chatgpt_response + "\n"
-    else:
-        output += "*[Response unavailable]*\n"
+    Args:
+        model: Model display name
+        response: The model's response text (None if failed)
+        error: Optional failure reason shown in place of a missing response
 
-    output += """
+    Returns:
+        Markdown section for the model
+    """
+    output = f"""
 ---
 
-## Gemini 3 Pro's Response
+## {model}'s Response
 
 """
-    if gemini_response:
-        output += gemini_response + "\n"
+    if response:
+        output += response + "\n"
+    elif error:
+        output += f"*[Response unavailable: {error}]*\n"
     else:
         output += "*[Response unavailable]*\n"
+    return output
+
+
+def format_footer(
+    response_times: dict | None = None,
+    first_token_times: dict | None = None,
+    cache_hits: dict | None = None,
+    compaction: dict | None = None,
+    network_phases: dict | None = None,
+    agreement: dict | None = None
+) -> str:
+    """
+    Format the agreement, timing and compaction notes that close the report.
+
+    Args:
+        response_times: Dict of model -> response time in ms
+        first_token_times: Dict of model -> time to first token in ms (streamed calls)
+        cache_hits: Dict of model -> whether the response came from the cache
+        compaction: Dict with tokens_before/tokens_after from prompt compaction
+        network_phases: Dict of model -> {phase: ms} from tracing, summarized
+                        under the response times
+        agreement: AgreementReport from analyze_responses.compute_agreement
+
+    Returns:
+        Markdown for the end of the report
+    """
+    output = "\n---\n"
 
-    output += "\n---\n"
+    if agreement:
+        output += _format_agreement(agreement)
 
     # Add timing info
     if response_times:
-        output += _format_timing_info(response_times)
+        output += _format_timing_info(
+            response_times, first_token_times, cache_hits, network_phases
+        )
+
+    if compaction:
+        output += _format_compaction_info(compaction)
 
     return output
 
 
-def format_analysis_prompt() -> str:
+def format_responses(
+    claude_response: str,
+    model_responses: dict[str, str | None],
+    original_task: str,
+    response_times: dict | None = None,
+    errors: dict | None = None,
+    first_token_times: dict | None = None,
+    cache_hits: dict | None = None,
+    compaction: dict | None = None,
+    network_phases: dict | None = None,
+    agreement: dict | None = None
+) -> str:
+    """
+    Format all responses for Claude to analyze.
+
+    Args:
+        claude_response: Claude's original response
+        model_responses: Dict of model name -> response text (None if failed),
+                         rendered in order
+        original_task: The original user task
+        response_times: Dict of model -> response time in ms
+        errors: Dict of model -> error message for failures
+        first_token_times: Dict of model -> time to first token in ms (streamed calls)
+        cache_hits: Dict of model -> whether the response came from the cache
+        compaction: Dict with tokens_before/tokens_after from prompt compaction
+        network_phases: Dict of model -> {phase: ms} from tracing, summarized
+                        under the response times
+        agreement: AgreementReport from analyze_responses.compute_agreement
+
+    Returns:
+        Formatted markdown string for Claude to analyze
+    """
+    output = format_header(original_task, claude_response, errors)
+    for model, response in model_responses.items():
+        output += format_model_section(model, response)
+    output += format_footer(
+        response_times, first_token_times, cache_hits, compaction, network_phases, agreement
+    )
+    return output
+
+
+def format_analysis_prompt(response_count: int = 3) -> str:
     """
     Return the prompt for Claude to analyze the responses.
 
+    Args:
+        response_count: Number of responses shown, Claude's included
+
     Returns:
         Analysis instruction string
     """
-    return """
+    return f"""
 ---
 
 ## Your Analysis Task
 
-Please provide an objective comparative analysis of the three responses above:
+Please provide an objective comparative analysis of the {response_count} responses above:
 
 1. **Accuracy**: Which response(s) are factually correct? Are there any errors?
 2. **Completeness**: Which response best addresses all aspects of the task?
@@ -1,127 +1,155 @@
 """
-Main orchestrator for the second-opinion skill.
+Command-line entry point for the second-opinion skill.
 
-This module coordinates the workflow:
-1. Validates API keys
-2. Extracts context from conversation
-3. Queries ChatGPT and Gemini IN PARALLEL via asyncio
-4. Formats responses for Claude to analyze
+A request read from stdin is forwarded to the warm local daemon (daemon.py),
+which is started on first use and keeps the event loop, pooled HTTP clients
+and caches alive between calls, so this process only imports the standard
+library. With --no-daemon or --trace, when the daemon cannot be started, and
+for --batch and the built-in test run, the pipeline (pipeline.py) runs
+in-process instead.
 
 Claude performs the actual comparative analysis.
 """
 
-import asyncio
+import argparse
 import json
 import sys
+from typing import TYPE_CHECKING, Callable
 
-from extract_context import extract_context
-from api_clients import (
-    validate_api_keys,
-    query_models_parallel,
-    generate_prompt,
-)
-from format_output import format_responses, format_analysis_prompt
+from daemon_client import DaemonUnavailable, run_remote
+from extract_context import DEFAULT_TOKEN_BUDGET
 
+if TYPE_CHECKING:
+    from api_clients import Provider
+    from metrics_store import MetricsStore
+    from response_cache import ResponseCache
 
-async def run_second_opinion_async(
-    conversation_history: list,
-    claude_response: str,
-    timeout: int = 300
-) -> str:
-    """
-    Fetch responses from ChatGPT and Gemini, format for Claude to analyze.
-
-    Args:
-        conversation_history: List of conversation messages
-        claude_response: Claude's response
-        timeout: Timeout for API calls in seconds
-
-    Returns:
-        Formatted output string for Claude to analyze
-    """
-    # Step 1: Validate environment
-    is_valid, error_msg = validate_api_keys()
-    if not is_valid:
-        return error_msg
 
-    # Step 2: Extract context
-    context = extract_context(conversation_history, claude_response)
-    original_task = context['original_task']
+# Batch mode defaults
+DEFAULT_CONCURRENCY = 8
+DEFAULT_PROVIDER_IN_FLIGHT = 4
 
-    # Step 3: Prepare prompt
-    prompt = generate_prompt(original_task, f"Claude's response:\n{claude_response}")
 
-    # Step 4: Query both models IN PARALLEL
-    openai_result, gemini_result = await query_models_parallel(
-        prompt, prompt, timeout=timeout, use_retry=True
-    )
+def _run_batch_cli(
+    args: argparse.Namespace,
+    cache: "ResponseCache | None",
+    metrics: "MetricsStore | None"
+) -> int:
+    """Run --batch mode, returning the process exit code."""
+    import asyncio
 
-    # Step 5: Extract responses and metadata
-    chatgpt_response = openai_result["content"] if openai_result["success"] else None
-    gemini_response = gemini_result["content"] if gemini_result["success"] else None
+    from api_clients import GEMINI_MODEL, OPENAI_MODEL, close_clients, validate_api_keys
+    from batch import run_batch_async
 
-    response_times = {
-        "GPT-5.2 Pro": openai_result["response_time_ms"],
-        "Gemini 3 Pro": gemini_result["response_time_ms"]
-    }
+    providers = _selected_providers(args)
+    is_valid, error_msg = validate_api_keys(providers)
+    if not is_valid:
+        print(error_msg, file=sys.stderr)
+        return 1
 
-    errors = {}
-    if not openai_result["success"]:
-        errors["GPT-5.2 Pro"] = openai_result["error"]
-    if not gemini_result["success"]:
-        errors["Gemini 3 Pro"] = gemini_result["error"]
+    provider_in_flight = {provider["model_id"]: args.in_flight for provider in providers}
+    if args.openai_in_flight is not None:
+        provider_in_flight[OPENAI_MODEL] = args.openai_in_flight
+    if args.gemini_in_flight is not None:
+        provider_in_flight[GEMINI_MODEL] = args.gemini_in_flight
 
-    # If both failed, return error
-    if not chatgpt_response and not gemini_response:
-        return _format_total_failure(errors)
+    input_stream = sys.stdin if args.batch == "-" else open(args.batch, encoding="utf-8")
+    output_stream = sys.stdout if not args.output else open(args.output, "w", encoding="utf-8")
 
-    # Step 6: Format responses for Claude
-    formatted = format_responses(
-        claude_response=claude_response,
-        chatgpt_response=chatgpt_response,
-        gemini_response=gemini_response,
-        original_task=original_task,
-        response_times=response_times,
-        errors=errors if errors else None
+    async def _run() -> dict:
+        try:
+            return await run_batch_async(
+                input_stream,
+                output_stream,
+                concurrency=args.concurrency,
+                provider_in_flight=provider_in_flight,
+                cache=cache,
+                deadline=args.deadline,
+                hedge=args.hedge,
+                providers=providers,
+                token_budget=args.token_budget,
+                metrics=metrics
+            )
+        finally:
+            await close_clients()
+
+    try:
+        stats = asyncio.run(_run())
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output_stream is not sys.stdout:
+            output_stream.close()
+
+    print(
+        f"Batch complete: {stats['records']} records, {stats['failed']} failed",
+        file=sys.stderr
     )
-
-    # Step 7: Add analysis prompt for Claude
-    formatted += format_analysis_prompt()
-
-    return formatted
-
-
-def _format_total_failure(errors: dict) -> str:
-    """Format error message when both models fail."""
-    output = "# Second Opinion - Error\n\n"
-    output += "Both external models failed to respond:\n\n"
-
-    for model, error in errors.items():
-        output += f"- **{model}**: {error}\n"
-
-    output += "\nPlease check your API keys and network connection, then try again.\n"
-    return output
+    return 0
+
+
+def _model_ids(args: argparse.Namespace) -> list[str] | None:
+    """Split --models into model IDs (None selects every registered provider)."""
+    if not args.models:
+        return None
+    return [model_id.strip() for model_id in args.models.split(",")]
+
+
+def _selected_providers(args: argparse.Namespace) -> "list[Provider]":
+    """Resolve --models into registered providers, exiting on unknown IDs."""
+    from api_clients import get_providers
+
+    if not args.models:
+        return get_providers()
+    try:
+        return get_providers(_model_ids(args))
+    except KeyError as e:
+        print(f"ERROR: {e.args[0]}", file=sys.stderr)
+        sys.exit(1)
+
+
+def _write_flushed(text: str) -> None:
+    """Write a piece of the report to stdout and flush it immediately."""
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+
+def _run_via_daemon(args: argparse.Namespace) -> int:
+    """Send the stdin request to the warm daemon, returning the exit code."""
+    options = {
+        "models": _model_ids(args),
+        "deadline": args.deadline,
+        "hedge": args.hedge,
+        "token_budget": args.token_budget,
+        "no_cache": args.no_cache,
+        "no_metrics": args.no_metrics,
+        "stream": args.stream,
+        "buffered": args.buffered,
+    }
+    on_chunk = _make_live_printer() if args.stream else None
+    try:
+        exit_code = run_remote(sys.stdin.buffer, options, _write_flushed, on_chunk)
+    except (ConnectionError, BrokenPipeError) as e:
+        print(f"ERROR: Lost connection to the second-opinion daemon: {e}", file=sys.stderr)
+        return 1
+    if exit_code == 0:
+        print(flush=True)
+    return exit_code
 
 
-def run_second_opinion(
-    conversation_history: list,
-    claude_response: str,
-    timeout: int = 300
-) -> str:
-    """
-    Synchronous wrapper for run_second_opinion_async.
+def _make_live_printer() -> Callable[[str, str], None]:
+    """Return an on_chunk callback that echoes streamed chunks to stderr."""
+    current_model = None
 
-    Args:
-        conversation_history: List of conversation messages
-        claude_response: Claude's response
-        timeout: Timeout for API calls in seconds
+    def _print_chunk(model: str, chunk: str) -> None:
+        nonlocal current_model
+        if model != current_model:
+            sys.stderr.write(f"\n\n[{model}]\n")
+            current_model = model
+        sys.stderr.write(chunk)
+        sys.stderr.flush()
 
-    Returns:
-        Formatted output string for Claude to analyze
-    """
-    return asyncio.run(
-        run_second_opinion_async(conversation_history, claude_response, timeout)
-    )
+    return _print_chunk
 
 
 def main():
@@ -134,12 +162,147 @@ def main():
         "claude_response": "..."
     }
 
+    With --batch, processes a JSONL file of such records concurrently and
+    writes one JSONL result per record as each completes (see batch.py).
+
+    With --stream, partial model output is echoed to stderr as it arrives;
+    the formatted result is still printed to stdout at the end.
+
+    Stdin requests go through the warm daemon unless --no-daemon or --trace
+    is given; if the daemon cannot be started they run in-process.
+
     If no stdin input is provided, runs a test example.
     """
+    parser = argparse.ArgumentParser(description="Get second opinions from other models")
+    parser.add_argument(
+        "--models",
+        metavar="IDS",
+        help="Comma-separated model IDs to query (default: all registered providers)"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream partial model output to stderr as it arrives"
+    )
+    parser.add_argument(
+        "--buffered",
+        action="store_true",
+        help="Print the report once every model has finished instead of section by section"
+    )
+    parser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="Run in this process instead of forwarding to the warm background daemon"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the on-disk response cache"
+    )
+    parser.add_argument(
+        "--no-metrics",
+        action="store_true",
+        help="Do not record per-call metrics (see metrics_store.py for the report)"
+    )
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        default=DEFAULT_TOKEN_BUDGET,
+        help="Token budget for the task plus Claude's response sent to other models; "
+             f"longer inputs are compacted (default: {DEFAULT_TOKEN_BUDGET}, 0 disables)"
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        metavar="SECONDS",
+        help="Overall latency budget; return whatever has completed when it expires"
+    )
+    parser.add_argument(
+        "--hedge",
+        action="store_true",
+        help="Send a duplicate request when an attempt is slower than the provider's p95"
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="Append per-attempt network phase spans (OpenTelemetry-shaped JSONL) to PATH "
+             "and summarize phases in the timing footer"
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="INPUT",
+        help="Batch mode: read JSONL records from INPUT ('-' for stdin)"
+    )
+    parser.add_argument(
+        "--output",
+        metavar="PATH",
+        help="Batch mode: write JSONL results to PATH (default: stdout)"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Batch mode: records processed at once (default: {DEFAULT_CONCURRENCY})"
+    )
+    parser.add_argument(
+        "--in-flight",
+        type=int,
+        default=DEFAULT_PROVIDER_IN_FLIGHT,
+        help=f"Batch mode: max concurrent requests per model (default: {DEFAULT_PROVIDER_IN_FLIGHT})"
+    )
+    parser.add_argument(
+        "--openai-in-flight",
+        type=int,
+        help="Batch mode: override --in-flight for the default OpenAI model"
+    )
+    parser.add_argument(
+        "--gemini-in-flight",
+        type=int,
+        help="Batch mode: override --in-flight for the default Gemini model"
+    )
+    args = parser.parse_args()
+    # Zero would stall the batch forever instead of failing
+    for flag in ("concurrency", "in_flight", "openai_in_flight", "gemini_in_flight"):
+        value = getattr(args, flag)
+        if value is not None and value < 1:
+            parser.error(f"--{flag.replace('_', '-')} must be at least 1")
+    if args.deadline is not None and args.deadline <= 0:
+        parser.error("--deadline must be greater than 0")
+    if args.token_budget < 0:
+        parser.error("--token-budget must not be negative")
+    has_stdin_input = not args.batch and not sys.stdin.isatty()
+    # Check --models here: a daemon rejecting it would only find out mid-upload
+    if args.models:
+        _selected_providers(args)
+
+    # Spans are exported by the process that makes the calls, so --trace stays local
+    if has_stdin_input and not args.no_daemon and not args.trace:
+        try:
+            sys.exit(_run_via_daemon(args))
+        except DaemonUnavailable as e:
+            print(f"Daemon unavailable ({e}); running in-process", file=sys.stderr)
+
+    from extract_context import load_conversation_input
+    from pipeline import run_second_opinion
+    from metrics_store import MetricsStore
+    from response_cache import ResponseCache
+    import tracing
+
+    on_chunk = _make_live_printer() if args.stream else None
+    on_output = None if args.buffered else _write_flushed
+    cache = None if args.no_cache else ResponseCache()
+    metrics = None if args.no_metrics else MetricsStore()
+    providers = _selected_providers(args)
+    if args.trace:
+        tracing.configure_export(args.trace)
+
+    if args.batch:
+        sys.exit(_run_batch_cli(args, cache, metrics))
+
     # Check if there's input from stdin
-    if not sys.stdin.isatty():
+    if has_stdin_input:
         try:
-            input_data = json.load(sys.stdin)
+            input_data = load_conversation_input(sys.stdin)
             conversation_history = input_data.get("conversation_history", [])
             claude_response = input_data.get("claude_response", "")
 
@@ -147,8 +310,12 @@ def main():
                 print("ERROR: JSON input must contain 'conversation_history' and 'claude_response'")
                 sys.exit(1)
 
-            result = run_second_opinion(conversation_history, claude_response)
-            print(result)
+            result = run_second_opinion(
+                conversation_history, claude_response, on_chunk=on_chunk, cache=cache,
+                deadline=args.deadline, hedge=args.hedge, providers=providers,
+                token_budget=args.token_budget, on_output=on_output, metrics=metrics
+            )
+            print(result if args.buffered else "", flush=True)
             return
         except json.JSONDecodeError as e:
             print(f"ERROR: Invalid JSON input: {e}")
@@ -162,9 +329,13 @@ def main():
 
     example_claude_response = "The capital of France is Paris."
 
-    print("Second-Opinion Skill - Test Run\n")
-    result = run_second_opinion(example_conversation, example_claude_response)
-    print(result)
+    print("Second-Opinion Skill - Test Run\n", flush=True)
+    result = run_second_opinion(
+        example_conversation, example_claude_response, on_chunk=on_chunk, cache=cache,
+        deadline=args.deadline, hedge=args.hedge, providers=providers,
+        token_budget=args.token_budget, on_output=on_output, metrics=metrics
+    )
+    print(result if args.buffered else "", flush=True)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Local SQLite store of per-call model metrics, with a report command.
+
+Every model call made through query_models_parallel can be recorded with its
+model, prompt size, input/output tokens, tokens/sec, latency, attempts and
+outcome. The report summarizes p50/p95/p99 latency and throughput per model
+over trailing time windows, which is the data timeouts and concurrency
+limits should be sized from.
+
+Usage:
+    python metrics_store.py                        # last 1h, 24h and 7d
+    python metrics_store.py --window 24h --bucket 1h
+    python metrics_store.py --window 7d --model gpt-5.2-pro --json
+"""
+
+import argparse
+import atexit
+import json
+import os
+import queue
+import re
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import TYPE_CHECKING, TypedDict
+
+from resilience import classify_failure
+
+if TYPE_CHECKING:
+    from api_clients import ModelResponse
+
+
+DEFAULT_METRICS_PATH = "~/.cache/second-opinion/metrics.sqlite3"
+DEFAULT_RETENTION_DAYS = 30
+DEFAULT_WINDOWS = "1h,24h,7d"
+
+# Outcomes besides the resilience failure kinds
+OK = "ok"
+CACHED = "cached"
+COALESCED = "coalesced"  # Shared an identical call already in flight
+CANCELLED = "cancelled"
+TIMEOUT = "timeout"  # Latency is the time limit, a lower bound on the real latency
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    model_id TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    latency_ms INTEGER NOT NULL,
+    first_token_ms INTEGER,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    tokens_per_sec REAL,
+    attempts INTEGER NOT NULL,
+    prompt_chars INTEGER NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS calls_ts_model ON calls (ts, model_id);
+"""
+
+_DURATION_PATTERN = re.compile(r"^(\d+(?:\.\d+)?)([smhd])$")
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+class ModelStats(TypedDict):
+    """Aggregated calls for one model over a time range."""
+    model_id: str
+    calls: int
+    succeeded: int  # Network calls that succeeded (cache hits excluded)
+    cached: int
+    coalesced: int
+    failed: int
+    cancelled: int
+    retries: int  # Attempts beyond the first, summed over calls
+    p50_ms: int | None  # Latency percentiles of successful network calls
+    p95_ms: int | None
+    p99_ms: int | None
+    calls_per_hour: float
+    output_tokens: int
+    tokens_per_sec_p50: float | None
+
+
+def parse_duration(value: str) -> float:
+    """
+    Parse a duration like "90s", "30m", "24h" or "7d".
+
+    Returns:
+        Duration in seconds
+
+    Raises:
+        ValueError: If the value is not a number followed by s, m, h or d
+    """
+    match = _DURATION_PATTERN.match(value.strip())
+    if not match:
+        raise ValueError(f"Invalid duration {value!r} (expected e.g. 30m, 24h, 7d)")
+    return float(match.group(1)) * _DURATION_UNITS[match.group(2)]
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    """Nearest-rank percentile of values (None for an empty list)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class MetricsStore:
+    """
+    Append-only SQLite log of model calls.
+
+    Rows are written by a background thread, so recording never blocks the
+    caller (usually the event loop) on disk I/O or a locked database.
+    """
+
+    def __init__(self, path: str | None = None, retention_days: int = DEFAULT_RETENTION_DAYS):
+        """
+        Args:
+            path: Database file (default: $SECOND_OPINION_METRICS_DB or
+                  ~/.cache/second-opinion/metrics.sqlite3)
+            retention_days: Rows older than this are deleted when the writer thread starts
+        """
+        location = path or os.getenv("SECOND_OPINION_METRICS_DB") or DEFAULT_METRICS_PATH
+        self.path = Path(location).expanduser()
+        self.retention_days = retention_days
+        self._db: sqlite3.Connection | None = None
+        self._rows: queue.SimpleQueue[dict | None] = queue.SimpleQueue()
+        self._writer: threading.Thread | None = None
+        self._writer_lock = threading.Lock()
+
+    def _open(self, prune: bool = False) -> sqlite3.Connection:
+        """Open a connection, creating the schema and, if prune, deleting expired rows."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(self.path, timeout=5.0)
+        # WAL lets the daemon, batch runs and reports use the file concurrently
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(_SCHEMA)
+        if prune:
+            db.execute(
+                "DELETE FROM calls WHERE ts < ?",
+                (time.time() - self.retention_days * 86400,)
+            )
+            db.commit()
+        return db
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the connection used for reads on first use."""
+        if self._db is None:
+            self._db = self._open()
+        return self._db
+
+    def _insert(self, row: dict) -> None:
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._write_rows, name="metrics-writer", daemon=True
+                )
+                self._writer.start()
+                # Flush queued rows on exit; close() is safe to call again
+                atexit.register(self.close)
+        self._rows.put(row)
+
+    def _write_rows(self) -> None:
+        """Writer thread: insert queued rows, committing once per batch."""
+        db: sqlite3.Connection | None = None
+        stopping = False
+        while not stopping:
+            rows = [self._rows.get()]
+            while not self._rows.empty():
+                rows.append(self._rows.get())
+            if None in rows:
+                stopping = True
+                rows = [row for row in rows if row is not None]
+            if not rows:
+                continue
+            try:
+                db = db or self._open(prune=True)
+                db.executemany(
+                    "INSERT INTO calls (ts, model_id, outcome, latency_ms, first_token_ms, "
+                    "input_tokens, output_tokens, tokens_per_sec, attempts, prompt_chars, error) "
+                    "VALUES (:ts, :model_id, :outcome, :latency_ms, :first_token_ms, :input_tokens, "
+                    ":output_tokens, :tokens_per_sec, :attempts, :prompt_chars, :error)",
+                    rows
+                )
+                db.commit()
+            except sqlite3.Error:
+                # Metrics are best-effort; a locked or unwritable file must not fail the call
+                pass
+        if db is not None:
+            db.close()
+
+    def record(self, model_id: str, prompt_chars: int, response: "ModelResponse") -> None:
+        """
+        Record one completed model call.
+
+        Args:
+            model_id: Provider model identifier
+            prompt_chars: Length of the prompt sent
+            response: The call's final ModelResponse
+        """
+        if response.get("cached"):
+            outcome = CACHED
+        elif response.get("coalesced"):
+            outcome = COALESCED
+        elif response["success"]:
+            outcome = OK
+        elif response.get("timed_out"):
+            outcome = TIMEOUT
+        else:
+            outcome = classify_failure(response)["kind"]
+
+        latency_ms = response["response_time_ms"]
+        output_tokens = response.get("output_tokens")
+        tokens_per_sec = None
+        if outcome == OK and output_tokens and latency_ms:
+            tokens_per_sec = round(output_tokens / (latency_ms / 1000), 2)
+
+        self._insert({
+            "ts": time.time(),
+            "model_id": model_id,
+            "outcome": outcome,
+            "latency_ms": latency_ms,
+            "first_token_ms": response.get("first_token_ms"),
+            "input_tokens": response.get("input_tokens"),
+            "output_tokens": output_tokens,
+            "tokens_per_sec": tokens_per_sec,
+            "attempts": response.get("attempts", 1),
+            "prompt_chars": prompt_chars,
+            "error": (response["error"] or "")[:500] or None,
+        })
+
+    def record_cancelled(self, model_id: str, prompt_chars: int, elapsed_ms: int) -> None:
+        """Record a call cancelled before it finished (e.g. by the overall deadline)."""
+        self._insert({
+            "ts": time.time(),
+            "model_id": model_id,
+            "outcome": CANCELLED,
+            "latency_ms": elapsed_ms,
+            "first_token_ms": None,
+            "input_tokens": None,
+            "output_tokens": None,
+            "tokens_per_sec": None,
+            "attempts": 0,
+            "prompt_chars": prompt_chars,
+            "error": None,
+        })
+
+    def recent_latencies(self, model_id: str, limit: int) -> list[tuple[int, int]]:
+        """
+        Return (latency_ms, prompt_chars) of the model's latest successful or timed-out calls.
+
+        Args:
+            model_id: Provider model identifier
+            limit: Maximum number of calls
+
+        Returns:
+            Oldest first, so they can be replayed into a rolling window
+        """
+        try:
+            # A connection of its own, since callers run this in a worker thread
+            with closing(self._open()) as db:
+                rows = db.execute(
+                    "SELECT latency_ms, prompt_chars FROM calls WHERE model_id = ? AND outcome IN (?, ?) "
+                    "ORDER BY ts DESC LIMIT ?",
+                    (model_id, OK, TIMEOUT, limit)
+                ).fetchall()
+        except sqlite3.Error:
+            return []
+        return rows[::-1]
+
+    def summarize(
+        self,
+        since: float,
+        until: float | None = None,
+        model_id: str | None = None
+    ) -> list[ModelStats]:
+        """
+        Aggregate calls per model over [since, until).
+
+        Args:
+            since: Range start as a Unix timestamp
+            until: Range end as a Unix timestamp (default: now)
+            model_id: Only summarize this model
+
+        Returns:
+            ModelStats per model that had calls in the range, sorted by model ID
+        """
+        until = time.time() if until is None else until
+        query = (
+            "SELECT model_id, outcome, latency_ms, output_tokens, tokens_per_sec, attempts "
+            "FROM calls WHERE ts >= ? AND ts < ?"
+        )
+        params: list = [since, until]
+        if model_id:
+            query += " AND model_id = ?"
+            params.append(model_id)
+
+        rows_by_model: dict[str, list[tuple]] = {}
+        for row in self._connect().execute(query, params):
+            rows_by_model.setdefault(row[0], []).append(row[1:])
+
+        hours = max(until - since, 1.0) / 3600
+        stats = []
+        for model, rows in sorted(rows_by_model.items()):
+            latencies = [latency for outcome, latency, *_ in rows if outcome == OK]
+            rates = [rate for outcome, _, _, rate, _ in rows if outcome == OK and rate]
+            p50, p95, p99 = (percentile(latencies, pct) for pct in (50, 95, 99))
+            tokens_p50 = percentile(rates, 50)
+            stats.append(ModelStats(
+                model_id=model,
+                calls=len(rows),
+                succeeded=len(latencies),
+                cached=sum(1 for row in rows if row[0] == CACHED),
+                coalesced=sum(1 for row in rows if row[0] == COALESCED),
+                failed=sum(1 for row in rows if row[0] not in (OK, CACHED, COALESCED, CANCELLED)),
+                cancelled=sum(1 for row in rows if row[0] == CANCELLED),
+                retries=sum(max(0, row[4] - 1) for row in rows),
+                p50_ms=p50,
+                p95_ms=p95,
+                p99_ms=p99,
+                calls_per_hour=round(len(rows) / hours, 2),
+                output_tokens=sum(row[2] or 0 for row in rows),
+                tokens_per_sec_p50=tokens_p50
+            ))
+        return stats
+
+    def close(self) -> None:
+        """Write any queued rows and close the database. Safe to call more than once."""
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._rows.put(None)
+            writer.join()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def _format_ms(value: int | None) -> str:
+    return "-" if value is None else f"{value:,}"
+
+
+def format_report(sections: list[tuple[str, list[ModelStats]]]) -> str:
+    """Render (title, stats) sections as plain-text tables."""
+    header = (f"{'model':<24} {'calls':>6} {'ok':>5} {'cached':>6} {'shared':>6} {'failed':>6} {'cancel':>6} "
+              f"{'retries':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'calls/h':>8} {'tok/s':>7}")
+    lines = []
+    for title, stats in sections:
+        lines.append(title)
+        if not stats:
+            lines.append("  (no calls)")
+            lines.append("")
+            continue
+        lines.append(header)
+        for s in stats:
+            tokens = "-" if s["tokens_per_sec_p50"] is None else f"{s['tokens_per_sec_p50']:.1f}"
+            lines.append(
+                f"{s['model_id']:<24} {s['calls']:>6} {s['succeeded']:>5} {s['cached']:>6} "
+                f"{s['coalesced']:>6} {s['failed']:>6} {s['cancelled']:>6} {s['retries']:>7} "
+                f"{_format_ms(s['p50_ms']):>8} {_format_ms(s['p95_ms']):>8} "
+                f"{_format_ms(s['p99_ms']):>8} {s['calls_per_hour']:>8} {tokens:>7}"
+            )
+        lines.append("")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Report second-opinion latency and throughput per model",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument(
+        "--window",
+        default=DEFAULT_WINDOWS,
+        help=f"Comma-separated trailing windows, e.g. 1h,24h,7d (default: {DEFAULT_WINDOWS})"
+    )
+    parser.add_argument(
+        "--bucket",
+        metavar="DURATION",
+        help="Split each window into consecutive buckets of this size (e.g. 1h)"
+    )
+    parser.add_argument("--model", metavar="ID", help="Only report this model ID")
+    parser.add_argument("--db", metavar="PATH", help="Metrics database (default: see MetricsStore)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    try:
+        windows = [(label.strip(), parse_duration(label)) for label in args.window.split(",")]
+        bucket = parse_duration(args.bucket) if args.bucket else None
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+    if bucket is not None and bucket <= 0:
+        parser.error("--bucket must be longer than zero")
+
+    store = MetricsStore(args.db)
+    if not store.path.exists():
+        print(f"No metrics recorded yet ({store.path})", file=sys.stderr)
+        return 1
+
+    now = time.time()
+    sections = []
+    for label, seconds in windows:
+        if bucket is None:
+            sections.append((f"Last {label}", store.summarize(now - seconds, now, args.model)))
+            continue
+        start = now - seconds
+        while start < now:
+            end = min(start + bucket, now)
+            title = (f"Last {label}: {time.strftime('%Y-%m-%d %H:%M', time.localtime(start))}"
+                     f" - {time.strftime('%H:%M', time.localtime(end))}")
+            sections.append((title, store.summarize(start, end, args.model)))
+            start = end
+    store.close()
+
+    if args.json:
+        print(json.dumps([{"window": title, "models": stats} for title, stats in sections], indent=2))
+    else:
+        print(format_report(sections), end="")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,287 @@
+"""
+Second-opinion pipeline: the workflow behind main.py and the daemon.
+
+This module coordinates the workflow:
+1. Validates API keys
+2. Extracts context from conversation
+3. Queries the registered models (ChatGPT and Gemini by default) IN PARALLEL via asyncio
+4. Formats responses for Claude to analyze
+
+Claude performs the actual comparative analysis.
+"""
+
+import asyncio
+from typing import Callable, TypedDict
+
+from extract_context import (
+    extract_context,
+    compact_context,
+    DEFAULT_TOKEN_BUDGET,
+)
+from api_clients import (
+    DEFAULT_TIMEOUT_SECONDS,
+    ModelResponse,
+    Provider,
+    get_providers,
+    validate_api_keys,
+    query_models_parallel,
+    generate_prompt,
+    close_clients,
+)
+from analyze_responses import AgreementReport, compute_agreement
+from format_output import (
+    format_responses,
+    format_header,
+    format_model_section,
+    format_footer,
+    format_analysis_prompt,
+)
+from metrics_store import MetricsStore
+from response_cache import ResponseCache
+import tracing
+
+
+class SecondOpinionResult(TypedDict):
+    """Formatted output plus the raw per-model responses behind it."""
+    formatted: str
+    original_task: str
+    responses: dict[str, ModelResponse]  # Keyed by model display name
+    tokens_saved: int  # Estimated prompt tokens removed by compaction, per model
+    agreement: AgreementReport | None  # None if NumPy is missing or under two responses
+
+
+async def collect_second_opinion_async(
+    conversation_history: list,
+    claude_response: str,
+    timeout: float = DEFAULT_TIMEOUT_SECONDS,
+    on_chunk: Callable[[str, str], None] | None = None,
+    cache: ResponseCache | None = None,
+    provider_limits: dict[str, asyncio.Semaphore] | None = None,
+    deadline: float | None = None,
+    hedge: bool = False,
+    providers: list[Provider] | None = None,
+    token_budget: int | None = DEFAULT_TOKEN_BUDGET,
+    on_output: Callable[[str], None] | None = None,
+    metrics: MetricsStore | None = None
+) -> SecondOpinionResult:
+    """
+    Fetch responses from the external models and keep the raw results alongside the formatted output.
+
+    With on_output the report is rendered progressively: the task and
+    Claude's response first, then each model's section as soon as that
+    model finishes (completion order, failures inline), then the agreement,
+    timing and analysis footer. The formatted result is the same text.
+
+    Args:
+        conversation_history: List of conversation messages
+        claude_response: Claude's response
+        timeout: Per-model time budget in seconds, retries included
+        on_chunk: Optional callback (model_name, chunk) to stream partial output
+        cache: Optional response cache; identical prompts are served from disk
+        provider_limits: Optional model ID -> semaphore capping in-flight requests
+        deadline: Optional overall latency budget in seconds; slower models are
+                  cancelled and reported as partial failures
+        hedge: Send a duplicate request when an attempt passes the provider's p95
+        providers: Models to query (default: all registered providers)
+        token_budget: Token budget for the task plus Claude's response in the
+                      outgoing prompt (None or 0 disables compaction)
+        on_output: Optional callback receiving the report piece by piece
+        metrics: Optional store that records every model call
+
+    Returns:
+        SecondOpinionResult with formatted output and per-model responses
+    """
+    if providers is None:
+        providers = get_providers()
+
+    # Step 1: Validate environment
+    is_valid, error_msg = validate_api_keys(providers)
+    if not is_valid:
+        if on_output:
+            on_output(error_msg)
+        return SecondOpinionResult(
+            formatted=error_msg, original_task="", responses={}, tokens_saved=0,
+            agreement=None
+        )
+
+    # Step 2: Extract context
+    context = extract_context(conversation_history, claude_response)
+    original_task = context['original_task']
+
+    # Progressive mode: everything emitted so far, in order
+    rendered = []
+
+    def _emit(text: str) -> None:
+        rendered.append(text)
+        on_output(text)
+
+    def _emit_model_section(model: str, result: ModelResponse) -> None:
+        content = result["content"] if result["success"] else None
+        _emit(format_model_section(model, content, result["error"]))
+
+    if on_output:
+        _emit(format_header(original_task, claude_response))
+
+    # Step 3: Compact to the token budget, then prepare prompt
+    prompt_task, prompt_response = original_task, claude_response
+    compaction = None
+    if token_budget:
+        compaction = compact_context(original_task, claude_response, token_budget)
+        prompt_task = compaction["original_task"]
+        prompt_response = compaction["claude_response"]
+    tokens_saved = compaction["tokens_before"] - compaction["tokens_after"] if compaction else 0
+
+    prompt = generate_prompt(prompt_task, f"Claude's response:\n{prompt_response}")
+
+    # Step 4: Query all models IN PARALLEL
+    responses = await query_models_parallel(
+        prompt, providers, timeout=timeout, use_retry=True, on_chunk=on_chunk, cache=cache,
+        provider_limits=provider_limits, deadline=deadline, hedge=hedge,
+        on_result=_emit_model_section if on_output else None, metrics=metrics
+    )
+
+    # Step 5: Extract responses and metadata
+    model_responses = {
+        model: result["content"] if result["success"] else None
+        for model, result in responses.items()
+    }
+    response_times = {model: result["response_time_ms"] for model, result in responses.items()}
+    first_token_times = {model: result.get("first_token_ms") for model, result in responses.items()}
+
+    cache_hits = None
+    if cache is not None:
+        cache_hits = {model: result.get("cached", False) for model, result in responses.items()}
+
+    errors = {
+        model: result["error"] for model, result in responses.items() if not result["success"]
+    }
+
+    network_phases = None
+    if tracing.export_enabled():
+        network_phases = {model: result.get("phases", {}) for model, result in responses.items()}
+
+    # If every model failed, return error
+    if not any(model_responses.values()):
+        if on_output:
+            _emit("\n" + _format_total_failure(errors))
+        return SecondOpinionResult(
+            formatted="".join(rendered) if on_output else _format_total_failure(errors),
+            original_task=original_task,
+            responses=responses,
+            tokens_saved=tokens_saved,
+            agreement=None
+        )
+
+    # Step 6: Score agreement so the analysis can start from the disagreements
+    # (CPU-bound on long responses, so keep it off the event loop for batch runs)
+    agreement = await asyncio.to_thread(compute_agreement, {
+        "Claude": claude_response,
+        **{model: text for model, text in model_responses.items() if text}
+    })
+
+    # Step 7: Format responses for Claude (just the footer if sections were already emitted)
+    if on_output:
+        _emit(format_footer(
+            response_times, first_token_times, cache_hits, compaction, network_phases, agreement
+        ) + format_analysis_prompt(len(model_responses) + 1))
+        return SecondOpinionResult(
+            formatted="".join(rendered),
+            original_task=original_task,
+            responses=responses,
+            tokens_saved=tokens_saved,
+            agreement=agreement
+        )
+
+    formatted = format_responses(
+        claude_response=claude_response,
+        model_responses=model_responses,
+        original_task=original_task,
+        response_times=response_times,
+        errors=errors if errors else None,
+        first_token_times=first_token_times,
+        cache_hits=cache_hits,
+        compaction=compaction,
+        network_phases=network_phases,
+        agreement=agreement
+    )
+
+    # Step 8: Add analysis prompt for Claude
+    formatted += format_analysis_prompt(len(model_responses) + 1)
+
+    return SecondOpinionResult(
+        formatted=formatted,
+        original_task=original_task,
+        responses=responses,
+        tokens_saved=tokens_saved,
+        agreement=agreement
+    )
+
+
+async def run_second_opinion_async(
+    conversation_history: list,
+    claude_response: str,
+    timeout: float = DEFAULT_TIMEOUT_SECONDS,
+    **options
+) -> str:
+    """
+    Fetch responses from the external models, format for Claude to analyze.
+
+    Args:
+        conversation_history: List of conversation messages
+        claude_response: Claude's response
+        timeout: Per-model time budget in seconds, retries included
+        **options: Keyword options for collect_second_opinion_async
+                   (on_chunk, cache, deadline, hedge, providers, metrics, ...)
+
+    Returns:
+        Formatted output string for Claude to analyze
+    """
+    result = await collect_second_opinion_async(
+        conversation_history, claude_response, timeout, **options
+    )
+    return result["formatted"]
+
+
+def _format_total_failure(errors: dict) -> str:
+    """Format error message when every model fails."""
+    output = "# Second Opinion - Error\n\n"
+    output += "All external models failed to respond:\n\n"
+
+    for model, error in errors.items():
+        output += f"- **{model}**: {error}\n"
+
+    output += "\nPlease check your API keys and network connection, then try again.\n"
+    return output
+
+
+def run_second_opinion(
+    conversation_history: list,
+    claude_response: str,
+    timeout: float = DEFAULT_TIMEOUT_SECONDS,
+    **options
+) -> str:
+    """
+    Synchronous wrapper for run_second_opinion_async.
+
+    Runs on a fresh event loop, so pooled HTTP clients are closed before
+    returning. Long-running async callers should use run_second_opinion_async
+    directly and call close_clients() once on shutdown.
+
+    Args:
+        conversation_history: List of conversation messages
+        claude_response: Claude's response
+        timeout: Per-model time budget in seconds, retries included
+        **options: Keyword options for collect_second_opinion_async
+
+    Returns:
+        Formatted output string for Claude to analyze
+    """
+    async def _run() -> str:
+        try:
+            return await run_second_opinion_async(
+                conversation_history, claude_response, timeout, **options
+            )
+        finally:
+            await close_clients()
+
+    return asyncio.run(_run())
@@ -0,0 +1,186 @@
+"""
+Failure classification, backoff and circuit breaking for provider calls.
+
+query_with_retry uses these helpers to decide whether a failed attempt is
+worth retrying, how long to wait (honoring Retry-After, with jitter), and
+whether a provider is currently down and should fail fast.
+"""
+
+import random
+import re
+import time
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING, TypedDict
+
+if TYPE_CHECKING:
+    from api_clients import ModelResponse
+
+
+# Failure kinds
+FATAL = "fatal"                # Will never succeed as-is (bad request, bad key, no quota)
+RATE_LIMITED = "rate_limited"  # 429: provider is up but throttling us
+OVERLOADED = "overloaded"      # 503/529: provider is shedding load
+TRANSIENT = "transient"        # Timeouts, connection errors, other 5xx
+
+FATAL_STATUS_CODES = {400, 401, 403, 404, 405, 413, 422}
+OVERLOADED_STATUS_CODES = {503, 529}
+
+# Provider error codes for failures that look retryable by status but are not
+FATAL_ERROR_MARKERS = ("insufficient_quota", "API_KEY_INVALID")
+
+_STATUS_PATTERN = re.compile(r"^HTTP (\d{3})")
+
+
+class FailureClass(TypedDict):
+    """Classification of a failed attempt."""
+    kind: str  # FATAL, RATE_LIMITED, OVERLOADED or TRANSIENT
+    retryable: bool
+    retry_after: float | None  # Server-requested delay in seconds, if any
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Parse a Retry-After header value.
+
+    Args:
+        value: Header value, either delay-seconds or an HTTP date
+
+    Returns:
+        Delay in seconds, or None if absent or unparseable
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def classify_failure(response: "ModelResponse") -> FailureClass:
+    """
+    Classify a failed ModelResponse from its HTTP status and error text.
+
+    Args:
+        response: A ModelResponse with success=False
+
+    Returns:
+        FailureClass describing whether and how to retry
+    """
+    error = response.get("error") or ""
+    status = response.get("status_code")
+    if status is None:
+        match = _STATUS_PATTERN.match(error)
+        if match:
+            status = int(match.group(1))
+    retry_after = response.get("retry_after")
+
+    if response.get("fatal"):
+        kind = FATAL
+    elif any(marker in error for marker in FATAL_ERROR_MARKERS):
+        kind = FATAL
+    elif status in FATAL_STATUS_CODES:
+        kind = FATAL
+    elif status == 429:
+        kind = RATE_LIMITED
+    elif status in OVERLOADED_STATUS_CODES:
+        kind = OVERLOADED
+    else:
+        kind = TRANSIENT
+
+    return FailureClass(kind=kind, retryable=kind != FATAL, retry_after=retry_after)
+
+
+def compute_backoff(
+    attempt: int,
+    backoff_base: float = 2.0,
+    retry_after: float | None = None,
+    max_delay: float = 30.0
+) -> float:
+    """
+    Compute the delay before the next attempt.
+
+    Uses "full jitter" (uniform between 0 and the exponential step) so
+    concurrent callers do not retry in lockstep. A server-provided
+    Retry-After wins, with a little jitter added on top.
+
+    Args:
+        attempt: Zero-based index of the attempt that just failed
+        backoff_base: Base for exponential backoff calculation
+        retry_after: Server-requested delay in seconds, if any
+        max_delay: Upper bound on the computed delay
+
+    Returns:
+        Delay in seconds
+    """
+    if retry_after is not None:
+        return min(max_delay, retry_after + random.uniform(0, 0.5))
+    return random.uniform(0, min(max_delay, backoff_base ** (attempt + 1)))
+
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker.
+
+    Opens after `failure_threshold` consecutive provider-side failures and
+    fails fast for `cooldown_seconds`; then lets a single trial request
+    through (half-open) and closes again on success.
+    """
+
+    def __init__(self, failure_threshold: int = 5, cooldown_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._consecutive_failures = 0
+        self._opened_at: float | None = None
+        self._trial_in_flight = False
+
+    def allow_request(self) -> bool:
+        """Return True if a request may be sent now."""
+        if self._opened_at is None:
+            return True
+        if time.monotonic() - self._opened_at < self.cooldown_seconds:
+            return False
+        if self._trial_in_flight:
+            return False
+        self._trial_in_flight = True
+        return True
+
+    def retry_in(self) -> float:
+        """Seconds until the breaker lets a trial request through."""
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self.cooldown_seconds - (time.monotonic() - self._opened_at))
+
+    def record_success(self) -> None:
+        """Close the breaker after a successful request."""
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Free the half-open trial slot of a request that ended without an outcome."""
+        self._trial_in_flight = False
+
+    def record_failure(self, failure: FailureClass) -> None:
+        """Count a failure; only provider-side failures can open the breaker."""
+        self._trial_in_flight = False
+        if failure["kind"] not in (OVERLOADED, TRANSIENT):
+            return
+        self._consecutive_failures += 1
+        if self._opened_at is not None or self._consecutive_failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(provider: str) -> CircuitBreaker:
+    """Return the process-wide circuit breaker for a provider."""
+    if provider not in _breakers:
+        _breakers[provider] = CircuitBreaker()
+    return _breakers[provider]
@@ -0,0 +1,188 @@
+"""
+On-disk response cache for the second-opinion skill.
+
+Successful model responses are stored as small JSON files named by a hash of
+the model ID and the exact prompt. Entries expire after a TTL, and the cache
+directory is kept under a size bound by evicting least recently used entries
+(file mtime doubles as the last-access time).
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from api_clients import ModelResponse
+
+
+DEFAULT_CACHE_DIR = "~/.cache/second-opinion/responses"
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+# Puts between full eviction scans while the cache looks under its size bound
+EVICT_INTERVAL_PUTS = 100
+# Eviction trims to this fraction of max_bytes, leaving room for the next puts
+EVICT_TARGET_RATIO = 0.9
+
+
+def cache_key(model_id: str, prompt: str) -> str:
+    """Return the content address for a (model, prompt) pair."""
+    digest = hashlib.sha256()
+    digest.update(model_id.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(prompt.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """Content-addressed, TTL- and size-bounded cache of model responses."""
+
+    def __init__(
+        self,
+        cache_dir: str | None = None,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+        max_bytes: int = DEFAULT_MAX_BYTES
+    ):
+        """
+        Args:
+            cache_dir: Directory for cache files (default: $SECOND_OPINION_CACHE_DIR
+                       or ~/.cache/second-opinion/responses)
+            ttl_seconds: Entries older than this are treated as misses
+            max_bytes: Total size bound for the cache directory
+        """
+        directory = cache_dir or os.getenv("SECOND_OPINION_CACHE_DIR") or DEFAULT_CACHE_DIR
+        self.cache_dir = Path(directory).expanduser()
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        # Directory size at the last eviction scan plus bytes written since (None: not scanned)
+        self._approx_bytes: int | None = None
+        self._puts_since_evict = 0
+
+    def _path(self, model_id: str, prompt: str) -> Path:
+        return self.cache_dir / f"{cache_key(model_id, prompt)}.json"
+
+    def get(self, model_id: str, prompt: str) -> ModelResponse | None:
+        """
+        Look up a cached response.
+
+        Args:
+            model_id: Provider model identifier
+            prompt: The exact prompt text
+
+        Returns:
+            ModelResponse marked cached=True, or None on a miss
+        """
+        start_time = time.perf_counter()
+        path = self._path(model_id, prompt)
+
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        if time.time() - entry.get("created_at", 0) > self.ttl_seconds:
+            path.unlink(missing_ok=True)
+            return None
+
+        # Touch the file so eviction treats it as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return ModelResponse(
+            model=entry["model"],
+            content=entry["content"],
+            success=True,
+            error=None,
+            response_time_ms=int((time.perf_counter() - start_time) * 1000),
+            cached=True
+        )
+
+    def put(self, model_id: str, prompt: str, response: ModelResponse) -> None:
+        """
+        Store a successful response. Failed responses are never cached.
+
+        Args:
+            model_id: Provider model identifier
+            prompt: The exact prompt text
+            response: The response to store
+        """
+        if not response["success"]:
+            return
+
+        entry = {
+            "model": response["model"],
+            "model_id": model_id,
+            "content": response["content"],
+            "created_at": time.time(),
+        }
+
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Write atomically so concurrent readers never see a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+                size = f.tell()
+            os.replace(tmp_path, self._path(model_id, prompt))
+        except (OSError, TypeError, ValueError):
+            Path(tmp_path).unlink(missing_ok=True)
+            return
+
+        # A full directory scan per put would make writes O(entries); scan only
+        # when the tracked size crosses the bound, or every EVICT_INTERVAL_PUTS
+        # puts to pick up expired entries and other processes' writes
+        self._puts_since_evict += 1
+        if self._approx_bytes is not None:
+            self._approx_bytes += size
+        if (
+            self._approx_bytes is None
+            or self._approx_bytes > self.max_bytes
+            or self._puts_since_evict >= EVICT_INTERVAL_PUTS
+        ):
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop expired entries; if over max_bytes, drop least recently used ones to the target."""
+        now = time.time()
+        entries = []
+        total_bytes = 0
+
+        with os.scandir(self.cache_dir) as it:
+            for item in it:
+                if not item.name.endswith(".json"):
+                    continue
+                try:
+                    stat = item.stat()
+                except OSError:
+                    continue
+                if now - stat.st_mtime > self.ttl_seconds:
+                    Path(item.path).unlink(missing_ok=True)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, item.path))
+                total_bytes += stat.st_size
+
+        self._puts_since_evict = 0
+        if total_bytes > self.max_bytes:
+            target_bytes = self.max_bytes * EVICT_TARGET_RATIO
+            entries.sort()
+            for _, size, path in entries:
+                if total_bytes <= target_bytes:
+                    break
+                Path(path).unlink(missing_ok=True)
+                total_bytes -= size
+        self._approx_bytes = total_bytes
+
+    def clear(self) -> None:
+        """Remove every cached entry."""
+        if not self.cache_dir.exists():
+            return
+        for path in self.cache_dir.glob("*.json"):
+            path.unlink(missing_ok=True)
+        self._approx_bytes = 0
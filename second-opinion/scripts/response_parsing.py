@@ -0,0 +1,195 @@
+"""
+Extraction of answer text and token usage from provider response bodies.
+
+Reasoning models return reasoning items ahead of the message in the
+Responses API output, and those can be far larger than the answer itself.
+When ijson is installed, bodies are parsed incrementally as they arrive:
+only the message text and usage counters are kept, and reasoning objects are
+never built. Otherwise the body is read whole and decoded with orjson if it
+is installed, falling back to the standard library json module.
+"""
+
+import json
+from typing import AsyncIterator, Callable, TypedDict
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+if ijson is not None:
+    BACKEND = f"ijson ({ijson.backend})"
+elif orjson is not None:
+    BACKEND = "orjson"
+else:
+    BACKEND = "json"
+
+# ijson event prefixes -> ParsedBody usage field
+_OPENAI_USAGE_PREFIXES = {
+    "usage.input_tokens": "input_tokens",
+    "usage.output_tokens": "output_tokens",
+}
+_GEMINI_USAGE_PREFIXES = {
+    "usageMetadata.promptTokenCount": "input_tokens",
+    "usageMetadata.candidatesTokenCount": "output_tokens",
+}
+
+
+class ParsedBody(TypedDict):
+    """The parts of a provider response the skill uses."""
+    content: str
+    input_tokens: int | None
+    output_tokens: int | None
+
+
+def _loads(body: bytes):
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+async def _read_all(chunks: AsyncIterator[bytes]) -> bytes:
+    return b"".join([chunk async for chunk in chunks])
+
+
+async def _parse_incrementally(
+    chunks: AsyncIterator[bytes],
+    handle: Callable[[str, str, object], None]
+) -> None:
+    """Push each chunk through ijson and pass the resulting (prefix, event, value) to handle."""
+    # The push interface keeps parsing in C; ijson's async file API costs far more per event
+    events = ijson.sendable_list()
+    parser = ijson.parse_coro(events)
+    try:
+        async for chunk in chunks:
+            parser.send(chunk)
+            for prefix, event, value in events:
+                handle(prefix, event, value)
+            del events[:]
+        parser.close()
+    except ijson.JSONError as e:
+        raise json.JSONDecodeError(f"Invalid response body: {e}", "", 0) from e
+    for prefix, event, value in events:
+        handle(prefix, event, value)
+
+
+async def parse_openai_body(
+    chunks: AsyncIterator[bytes]
+) -> ParsedBody:
+    """
+    Extract the message text and usage from a Responses API body.
+
+    Args:
+        chunks: The response body as an async iterator of byte chunks
+
+    Returns:
+        ParsedBody with the first content part of the first message item
+
+    Raises:
+        KeyError: If the body has no message output
+        json.JSONDecodeError: If the body is not valid JSON
+    """
+    if ijson is None:
+        body = await _read_all(chunks)
+        data = _loads(body)
+        # GPT-5.2+ returns reasoning block first, then message - find the message
+        message_output = next(
+            (item for item in data["output"] if item.get("type") == "message"),
+            None
+        )
+        if not message_output:
+            raise KeyError("No message output found in response")
+        usage = data.get("usage") or {}
+        return ParsedBody(
+            content=message_output["content"][0]["text"],
+            input_tokens=usage.get("input_tokens"),
+            output_tokens=usage.get("output_tokens")
+        )
+
+    usage = {}
+    # Current output item: type, content part index, text of its first part
+    item = {"type": None, "part": -1, "text": None}
+    found = []
+
+    def _handle(prefix: str, event: str, value) -> None:
+        if prefix == "output.item.type":
+            item["type"] = value
+        elif prefix == "output.item.content.item" and event == "start_map":
+            item["part"] += 1
+        elif prefix == "output.item.content.item.text" and item["part"] == 0:
+            item["text"] = value
+        elif prefix == "output.item" and event == "end_map":
+            # Keys may come in any order, so decide once the item is complete
+            if not found and item["type"] == "message" and item["text"] is not None:
+                found.append(item["text"])
+            item.update(type=None, part=-1, text=None)
+        elif prefix in _OPENAI_USAGE_PREFIXES:
+            usage[_OPENAI_USAGE_PREFIXES[prefix]] = int(value)
+
+    await _parse_incrementally(chunks, _handle)
+
+    if not found:
+        raise KeyError("No message output found in response")
+    return ParsedBody(
+        content=found[0],
+        input_tokens=usage.get("input_tokens"),
+        output_tokens=usage.get("output_tokens")
+    )
+
+
+async def parse_gemini_body(
+    chunks: AsyncIterator[bytes]
+) -> ParsedBody:
+    """
+    Extract the answer text and usage from a Gemini generateContent body.
+
+    Args:
+        chunks: The response body as an async iterator of byte chunks
+
+    Returns:
+        ParsedBody with the text of candidates[0].content.parts[0]
+
+    Raises:
+        KeyError: If the first candidate has no text part
+        json.JSONDecodeError: If the body is not valid JSON
+    """
+    if ijson is None:
+        body = await _read_all(chunks)
+        data = _loads(body)
+        usage = data.get("usageMetadata") or {}
+        return ParsedBody(
+            content=data["candidates"][0]["content"]["parts"][0]["text"],
+            input_tokens=usage.get("promptTokenCount"),
+            output_tokens=usage.get("candidatesTokenCount")
+        )
+
+    usage = {}
+    position = {"candidate": -1, "part": -1}
+    found = []
+
+    def _handle(prefix: str, event: str, value) -> None:
+        if prefix == "candidates.item" and event == "start_map":
+            position.update(candidate=position["candidate"] + 1, part=-1)
+        elif prefix == "candidates.item.content.parts.item" and event == "start_map":
+            position["part"] += 1
+        elif prefix == "candidates.item.content.parts.item.text":
+            if position["candidate"] == 0 and position["part"] == 0:
+                found.append(value)
+        elif prefix in _GEMINI_USAGE_PREFIXES:
+            usage[_GEMINI_USAGE_PREFIXES[prefix]] = int(value)
+
+    await _parse_incrementally(chunks, _handle)
+
+    if not found:
+        raise KeyError("text")
+    return ParsedBody(
+        content=found[0],
+        input_tokens=usage.get("input_tokens"),
+        output_tokens=usage.get("output_tokens")
+    )
@@ -0,0 +1,191 @@
+"""
+Per-phase network tracing for provider calls.
+
+Each attempt records timestamps for connect, TLS, request sent, first
+byte, body complete and parse complete. Every provider call goes through
+httpx and is instrumented with httpcore's "trace" request extension (httpcore
+resolves DNS inside the TCP connect, so that time is part of "connect").
+Attempts are grouped under one trace per model query, so retries and hedged
+duplicates show up as sibling spans.
+
+Spans are written as OpenTelemetry-shaped JSON lines when an export file is
+configured (configure_export or $SECOND_OPINION_TRACE_FILE).
+"""
+
+import json
+import os
+import secrets
+import time
+from contextvars import ContextVar
+
+
+# Phase durations derived from marks: name -> (start mark, end mark)
+PHASES = {
+    "connect": ("connect_start", "connect_end"),
+    "tls": ("tls_start", "tls_end"),
+    "send": ("request_start", "request_sent"),
+    "wait": ("request_sent", "first_byte"),
+    "download": ("first_byte", "body_complete"),
+    "parse": ("body_complete", "parse_complete"),
+}
+
+# httpcore trace event suffixes (after the "http11."/"http2."/"connection." prefix) -> mark
+_HTTPCORE_EVENTS = {
+    "connect_tcp.started": "connect_start",
+    "connect_tcp.complete": "connect_end",
+    "start_tls.started": "tls_start",
+    "start_tls.complete": "tls_end",
+    "send_request_headers.started": "request_start",
+    "send_request_body.complete": "request_sent",
+    "receive_response_headers.complete": "first_byte",
+    "receive_response_body.complete": "body_complete",
+}
+
+_export_path: str | None = os.getenv("SECOND_OPINION_TRACE_FILE") or None
+
+
+def configure_export(path: str | None) -> None:
+    """Write spans to path as JSON lines (None disables export)."""
+    global _export_path
+    _export_path = path
+
+
+def export_enabled() -> bool:
+    """Return True if spans are being written to a file."""
+    return _export_path is not None
+
+
+def _export(span: dict) -> None:
+    if _export_path is None:
+        return
+    with open(_export_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(span) + "\n")
+
+
+def _new_id(n_bytes: int) -> str:
+    return secrets.token_hex(n_bytes)
+
+
+class _Clock:
+    """Pairs a wall-clock origin with a monotonic one for OTel timestamps."""
+
+    def __init__(self):
+        self.wall_ns = time.time_ns()
+        self.perf_ns = time.perf_counter_ns()
+
+    def unix_ns(self, perf_ns: int) -> int:
+        return self.wall_ns + (perf_ns - self.perf_ns)
+
+
+class QueryTrace:
+    """Root span covering every attempt of one model query."""
+
+    def __init__(self, model_id: str):
+        self.model_id = model_id
+        self.trace_id = _new_id(16)
+        self.span_id = _new_id(8)
+        self.attempts = 0
+        self._clock = _Clock()
+
+    def finish(self, success: bool, error: str | None) -> None:
+        """Export the root span."""
+        end_ns = time.perf_counter_ns()
+        _export({
+            "name": "second_opinion.query",
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": None,
+            "start_time_unix_nano": self._clock.wall_ns,
+            "end_time_unix_nano": self._clock.unix_ns(end_ns),
+            "attributes": {"model.id": self.model_id, "attempts": self.attempts},
+            "events": [],
+            "status": {"code": "OK" if success else "ERROR", "message": error or ""},
+        })
+
+
+class AttemptTrace:
+    """Phase timestamps for one HTTP attempt."""
+
+    def __init__(self, model_id: str, parent: QueryTrace | None = None):
+        self.model_id = model_id
+        self.parent = parent
+        self.span_id = _new_id(8)
+        self.attempt = 0
+        if parent is not None:
+            parent.attempts += 1
+            self.attempt = parent.attempts
+        self._clock = _Clock()
+        self._marks: dict[str, int] = {}
+        self._events: list[tuple[str, int]] = []
+
+    def mark(self, name: str) -> None:
+        """Record that a phase boundary was reached now (later marks win)."""
+        now = time.perf_counter_ns()
+        self._marks[name] = now
+        self._events.append((name, now))
+
+    async def httpcore_hook(self, event_name: str, info: dict) -> None:
+        """httpcore "trace" extension callback for httpx requests."""
+        suffix = event_name.split(".", 1)[-1]
+        mark = _HTTPCORE_EVENTS.get(suffix)
+        if mark is not None:
+            self.mark(mark)
+
+    def phases(self) -> dict[str, int]:
+        """Return phase durations in ms for the phases that were observed."""
+        result = {}
+        for phase, (start, end) in PHASES.items():
+            if start in self._marks and end in self._marks:
+                result[phase] = max(0, (self._marks[end] - self._marks[start]) // 1_000_000)
+        return result
+
+    def finish(self, success: bool, error: str | None) -> dict[str, int]:
+        """Export the attempt span and return its phase durations in ms."""
+        phases = self.phases()
+        end_ns = time.perf_counter_ns()
+        _export({
+            "name": "second_opinion.attempt",
+            "trace_id": self.parent.trace_id if self.parent else _new_id(16),
+            "span_id": self.span_id,
+            "parent_span_id": self.parent.span_id if self.parent else None,
+            "start_time_unix_nano": self._clock.wall_ns,
+            "end_time_unix_nano": self._clock.unix_ns(end_ns),
+            "attributes": {
+                "model.id": self.model_id,
+                "attempt": self.attempt,
+                **{f"phase.{phase}_ms": ms for phase, ms in phases.items()},
+            },
+            "events": [
+                {"name": name, "time_unix_nano": self._clock.unix_ns(ns)}
+                for name, ns in self._events
+            ],
+            "status": {"code": "OK" if success else "ERROR", "message": error or ""},
+        })
+        return phases
+
+
+_current_query: ContextVar[QueryTrace | None] = ContextVar("current_query", default=None)
+_current_attempt: ContextVar[AttemptTrace | None] = ContextVar("current_attempt", default=None)
+
+
+def start_query(model_id: str) -> QueryTrace:
+    """Start the root trace for a model query in the current context."""
+    query = QueryTrace(model_id)
+    _current_query.set(query)
+    return query
+
+
+def start_attempt(model_id: str) -> AttemptTrace:
+    """Start an attempt span under the current query and make it current."""
+    attempt = AttemptTrace(model_id, _current_query.get())
+    _current_attempt.set(attempt)
+    return attempt
+
+
+def current_attempt() -> AttemptTrace:
+    """Return the attempt being traced, or a detached one for untraced calls."""
+    attempt = _current_attempt.get()
+    if attempt is None:
+        return AttemptTrace("")
+    return attempt
+